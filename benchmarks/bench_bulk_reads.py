@@ -0,0 +1,50 @@
+"""
+Bulk integer read benchmark.
+
+Walks a pointer table with scalar `read_pointer` calls and with one
+`read_pointers` call, on both loaders, and checks the results agree.
+
+    python -m benchmarks.bench_bulk_reads [--count 200000] [--stride 8]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.loaders.mmap_loader import MmapRomLoader
+from src.loaders.rom_loader import RomLoader
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200000, help="Table entries")
+    parser.add_argument("--stride", type=int, default=8, help="Bytes per table entry")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    data = rng.randbytes(args.count * args.stride + 4)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "table.gba"
+        path.write_bytes(data)
+        for name, loader in (("RomLoader", RomLoader(str(path))),
+                             ("MmapRomLoader", MmapRomLoader(str(path)))):
+            t0 = time.perf_counter()
+            scalar = [loader.read_pointer(i * args.stride) for i in range(args.count)]
+            scalar_secs = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            bulk = loader.read_pointers(0, args.count, stride=args.stride)
+            bulk_secs = time.perf_counter() - t0
+
+            assert bulk.tolist() == scalar
+            print(f"{name}: {args.count} pointers, stride {args.stride}")
+            print(f"  read_pointer loop {scalar_secs * 1e3:9.2f} ms")
+            print(f"  read_pointers     {bulk_secs * 1e3:9.2f} ms  x{scalar_secs / bulk_secs:.0f}")
+            if isinstance(loader, MmapRomLoader):
+                loader.close()
+
+
+if __name__ == "__main__":
+    main()
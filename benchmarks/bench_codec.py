@@ -0,0 +1,101 @@
+"""
+Gen3TextCodec decode/encode throughput benchmark.
+
+Compares the table-driven codec against the baseline implementation on a
+synthetic text bank (or on segments cut out of a real ROM).
+
+    python -m benchmarks.bench_codec [--rom gba_rom/fire_red.gba]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.legacy import legacy_decode, legacy_encode
+from src.codecs.gen3 import Gen3TextCodec
+from src.codecs.tables import GEN3_TABLE
+
+# Printable glyphs, with extra spaces to get word-like runs
+_TEXT_BYTES = [b for b, c in GEN3_TABLE.items() if len(c) == 1 and c.isprintable()]
+_TEXT_BYTES += [0x00] * 12
+
+
+def synthetic_bank(count: int, seed: int = 0) -> List[bytes]:
+    rng = random.Random(seed)
+    lines: List[bytes] = []
+    for _ in range(count):
+        body = bytearray(rng.choice(_TEXT_BYTES) for _ in range(rng.randint(8, 120)))
+        if rng.random() < 0.2:
+            pos = rng.randrange(len(body))
+            body[pos:pos] = bytes([0xFC, rng.choice([0x10, 0x11])])
+        if rng.random() < 0.3:
+            body[rng.randrange(len(body))] = 0xFE
+        body.append(rng.choice([0xFF, 0xFB]))
+        lines.append(bytes(body))
+    return lines
+
+
+def rom_bank(path: Path, start: int, end: int) -> List[bytes]:
+    data = path.read_bytes()[start:end]
+    lines = [seg + b"\xff" for seg in data.split(b"\xff") if seg]
+    return lines
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(lines: List[bytes], repeat: int = 5) -> None:
+    codec = Gen3TextCodec()
+    texts = [legacy_decode(line) for line in lines]
+    assert [codec.decode(line) for line in lines] == texts
+    assert codec.decode_many(lines) == texts
+    encoded = [legacy_encode(text) for text in texts]
+    assert [codec.encode(text) for text in texts] == encoded
+    assert codec.encode_many(texts) == encoded
+
+    total = sum(len(line) for line in lines)
+    print(f"{len(lines)} lines, {total / 1e6:.2f} MB")
+    _report(total, {
+        "legacy decode": _time(lambda: [legacy_decode(x) for x in lines], repeat),
+        "decode": _time(lambda: [codec.decode(x) for x in lines], repeat),
+        "decode_many": _time(lambda: codec.decode_many(lines), repeat),
+    })
+    _report(total, {
+        "legacy encode": _time(lambda: [legacy_encode(t) for t in texts], repeat),
+        "encode": _time(lambda: [codec.encode(t) for t in texts], repeat),
+        "encode_many": _time(lambda: codec.encode_many(texts), repeat),
+    })
+
+
+def _report(total: int, timings: Dict[str, float]) -> None:
+    base = next(iter(timings.values()))
+    for name, secs in timings.items():
+        print(f"  {name:<14} {secs * 1e3:8.2f} ms  {total / secs / 1e6:7.1f} MB/s"
+              f"  x{base / secs:.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rom", type=Path, help="Decode segments from a real ROM")
+    parser.add_argument("--start", type=lambda v: int(v, 0), default=0x00172250)
+    parser.add_argument("--end", type=lambda v: int(v, 0), default=0x1A4E26)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.rom:
+        lines = rom_bank(args.rom, args.start, args.end)
+    else:
+        lines = synthetic_bank(args.lines)
+    run(lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
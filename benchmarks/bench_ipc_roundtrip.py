@@ -0,0 +1,98 @@
+"""
+IPC round-trip benchmark.
+
+Round-trip latency of an echoed request through IpcService with the
+file backend (request written and renamed like lua/hook.lua does,
+response file polled then removed) and with the shared-memory ring
+backend (RingIpcClient); both poll every 100 us. The socket backend
+(SocketIpcClient, Unix socket) pushes responses instead.
+
+    python -m benchmarks.bench_ipc_roundtrip [--requests 500]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.bench_ipc_wakeup import bench_settings
+from src.ipc.file_backend import IPC_IN_PREFIX, IPC_OUT_PREFIX, IPC_SUFFIX
+from src.ipc.ring_client import RingIpcClient
+from src.ipc.service import IpcService
+from src.ipc.socket_client import SocketIpcClient
+
+PAYLOAD = bytes(range(0xBB, 0xEE)) * 4
+POLL_DELAY = 0.0001
+
+
+def _serve(service: IpcService, count: int) -> None:
+    for _ in range(count):
+        req = None
+        while req is None:
+            req = service.wait_for_request(5.0)
+        service.write_response(req[0], req[1])
+
+
+def _file_request(ipc_dir: Path) -> Callable[[int], bytes]:
+    def request(i: int) -> bytes:
+        req_id = f"{int(time.time())}_{i}"
+        tmp = ipc_dir / f"{IPC_IN_PREFIX}{req_id}.tmp"
+        tmp.write_bytes(PAYLOAD)
+        os.replace(tmp, ipc_dir / f"{IPC_IN_PREFIX}{req_id}{IPC_SUFFIX}")
+        out = ipc_dir / f"{IPC_OUT_PREFIX}{req_id}{IPC_SUFFIX}"
+        while True:
+            try:
+                data = out.read_bytes()
+            except FileNotFoundError:
+                time.sleep(POLL_DELAY)
+                continue
+            out.unlink()
+            return data
+    return request
+
+
+def measure(service: IpcService, request: Callable[[int], Optional[bytes]],
+            count: int) -> List[float]:
+    server = threading.Thread(target=_serve, args=(service, count))
+    server.start()
+    times = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        assert request(i) == PAYLOAD
+        times.append(time.perf_counter() - t0)
+    server.join()
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<8} {'p50 us':>9} {'p99 us':>9} {'mean us':>9}")
+    for name in ("file", "ring", "socket"):
+        with tempfile.TemporaryDirectory() as tmp:
+            ipc_dir = Path(tmp)
+            settings = bench_settings(ipc_dir)
+            settings.ipc.backend = name
+            service = IpcService.from_settings(settings)
+            if name == "file":
+                times = measure(service, _file_request(ipc_dir), args.requests)
+            elif name == "ring":
+                with RingIpcClient(ipc_dir / "ipc_ring.bin") as client:
+                    times = measure(service, lambda i: client.request(PAYLOAD, 5.0, POLL_DELAY),
+                                    args.requests)
+            else:
+                with SocketIpcClient(ipc_dir / "ipc.sock", timeout=5.0) as sock_client:
+                    times = measure(service, lambda i: sock_client.request(PAYLOAD), args.requests)
+            service.close()
+        us = sorted(t * 1e6 for t in times)
+        p99 = us[min(len(us) - 1, int(len(us) * 0.99))]
+        print(f"{name:<8} {statistics.median(us):9.1f} {p99:9.1f} {statistics.fmean(us):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
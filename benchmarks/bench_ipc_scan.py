@@ -0,0 +1,64 @@
+"""
+File IPC directory scan benchmark.
+
+Per-poll cost of FileIpcBackend.read_request when no request is pending,
+with 10, 1k and 10k leftover files in ipc_dir (responses and temp files
+orphaned by emulator crashes, younger than the TTL), for:
+
+- legacy: cleanup iterdir + stat of every file, then iterdir + is_file
+- scandir: one os.scandir pass per poll (inotify unavailable)
+- inotify: events only, no scan between stale sweeps
+
+    python -m benchmarks.bench_ipc_scan [--files 10 1000 10000] [--polls 200]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.bench_ipc_wakeup import _backend
+from benchmarks.legacy import legacy_read_request
+from src.ipc.file_backend import IPC_OUT_PREFIX, IPC_SUFFIX
+
+
+def _fill(ipc_dir: Path, count: int) -> None:
+    for i in range(count):
+        name = f"{IPC_OUT_PREFIX}{i}{IPC_SUFFIX}" if i % 4 else f"{IPC_OUT_PREFIX}{i}.tmp.x"
+        (ipc_dir / name).write_bytes(b"\xff")
+
+
+def per_poll(poll: Callable[[], object], polls: int) -> float:
+    poll()
+    t0 = time.perf_counter()
+    for _ in range(polls):
+        assert poll() is None
+    return (time.perf_counter() - t0) / polls
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"{'files':>6} {'legacy us':>10} {'scandir us':>11} {'inotify us':>11}")
+    for count in args.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            ipc_dir = Path(tmp)
+            _fill(ipc_dir, count)
+            polls = max(args.polls * 10 // max(count, 10), 5)
+            legacy = per_poll(lambda: legacy_read_request(ipc_dir, 60), polls)
+            scanning = _backend(ipc_dir, watch=False)
+            scandir = per_poll(scanning.read_request, polls)
+            watching = _backend(ipc_dir, watch=True)
+            if watching._watcher is None:
+                inotify = float("nan")
+            else:
+                inotify = per_poll(watching.read_request, polls)
+            watching.close()
+        print(f"{count:>6} {legacy * 1e6:10.1f} {scandir * 1e6:11.1f} {inotify * 1e6:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
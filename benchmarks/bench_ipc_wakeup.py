@@ -0,0 +1,114 @@
+"""
+IPC request wake-up benchmark.
+
+Measures how long a request renamed into ipc_dir (as lua/hook.lua does)
+waits before the loop reads it, and the CPU time the loop burns while
+nobody is playing, for:
+
+- sleep-poll: read_request then sleep(0.05), the former run_ipc_loop
+- backoff: wait_for_request polling with adaptive backoff (no inotify)
+- inotify: wait_for_request sleeping on inotify
+
+    python -m benchmarks.bench_ipc_wakeup [--requests 50] [--idle 2.0]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from src.config.settings import IpcConfig, LlmConfig, CharacterCard, ExtractConfig, Settings
+from src.ipc.file_backend import FileIpcBackend, IPC_IN_PREFIX, IPC_SUFFIX
+
+Request = Optional[Tuple[str, bytes]]
+
+
+def bench_settings(ipc_dir: Path) -> Settings:
+    return Settings(
+        extract=ExtractConfig(Path("rom.gba"), Path("out.json"), 0, 0),
+        llm=LlmConfig(model_path=Path("model.gguf")),
+        character=CharacterCard("Bench", 1, "Nowhere", [], []),
+        ipc=IpcConfig(ipc_dir=ipc_dir),
+    )
+
+
+def _backend(ipc_dir: Path, watch: bool) -> FileIpcBackend:
+    backend = FileIpcBackend(bench_settings(ipc_dir))
+    backend.init()
+    if not watch:
+        backend.close()
+    return backend
+
+
+def _sleep_poll(backend: FileIpcBackend) -> Callable[[float], Request]:
+    def wait(timeout: float) -> Request:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            req = backend.read_request()
+            if req:
+                return req
+            time.sleep(0.05)
+        return None
+    return wait
+
+
+def _send(ipc_dir: Path, req_id: str) -> None:
+    tmp = ipc_dir / f"{IPC_IN_PREFIX}{req_id}.tmp"
+    tmp.write_bytes(b"\xbb\xbc\xbd")
+    os.replace(tmp, ipc_dir / f"{IPC_IN_PREFIX}{req_id}{IPC_SUFFIX}")
+
+
+def measure(wait: Callable[[float], Request], ipc_dir: Path,
+            requests: int, idle: float) -> Tuple[List[float], float]:
+    sent = {}
+
+    def writer() -> None:
+        for i in range(requests):
+            time.sleep(random.uniform(0.02, 0.12))
+            sent[str(i)] = time.perf_counter()
+            _send(ipc_dir, str(i))
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    latencies = []
+    while len(latencies) < requests:
+        req = wait(1.0)
+        if req is not None:
+            latencies.append(time.perf_counter() - sent[req[0]])
+    thread.join()
+
+    cpu = time.process_time()
+    end = time.monotonic() + idle
+    while time.monotonic() < end:
+        wait(min(1.0, end - time.monotonic()))
+    return latencies, (time.process_time() - cpu) / idle
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--idle", type=float, default=2.0, help="Idle seconds for the CPU figure")
+    args = parser.parse_args(argv)
+
+    print(f"{'loop':<12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'idle CPU %':>11}")
+    for name in ("sleep-poll", "backoff", "inotify"):
+        with tempfile.TemporaryDirectory() as tmp:
+            ipc_dir = Path(tmp)
+            backend = _backend(ipc_dir, watch=name == "inotify")
+            if name == "inotify" and backend._watcher is None:
+                print(f"{name:<12} unavailable")
+                continue
+            wait = _sleep_poll(backend) if name == "sleep-poll" else backend.wait_for_request
+            latencies, cpu = measure(wait, ipc_dir, args.requests, args.idle)
+            backend.close()
+        ms = sorted(x * 1000 for x in latencies)
+        p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+        print(f"{name:<12} {statistics.median(ms):8.2f} {p99:8.2f} {ms[-1]:8.2f} {cpu * 100:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Parallel extraction scaling benchmark.
+
+Scans a full-size (16 MB) synthetic ROM, or a real ROM, end to end with
+1, 2, 4, ... worker processes and checks every run matches the
+single-process result.
+
+    python -m benchmarks.bench_parallel_extract [--rom PATH] [--jobs 1 2 4 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.bench_extract import synthetic_rom
+from src.codecs.gen3 import Gen3TextCodec
+from src.extractors.dialog import DialogExtractor
+from src.extractors.parallel import extract_parallel
+from src.loaders.mmap_loader import MmapRomLoader
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rom", type=Path, help="Scan a real ROM instead")
+    parser.add_argument("--size", type=int, default=16 << 20)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.rom
+        if path is None:
+            path = Path(tmp) / "synthetic.gba"
+            path.write_bytes(synthetic_rom(args.size))
+        size = path.stat().st_size
+        start, end = 0, size - 255
+        codec = Gen3TextCodec()
+
+        print(f"{size / 1e6:.1f} MB ROM, {os.cpu_count()} CPUs")
+        t0 = time.perf_counter()
+        with MmapRomLoader(str(path)) as loader:
+            expected = DialogExtractor(loader, codec, start, end).extract()
+        base = time.perf_counter() - t0
+        print(f"  sequential {base:7.2f} s  {len(expected)} strings")
+
+        for jobs in args.jobs:
+            t0 = time.perf_counter()
+            result = extract_parallel(str(path), codec, start, end, jobs)
+            secs = time.perf_counter() - t0
+            assert list(result.items()) == list(expected.items())
+            print(f"  jobs={jobs:<3}   {secs:7.2f} s  x{base / secs:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Prompt prefix reuse benchmark (needs llama_cpp and a GGUF model).
+
+Measures time to first token (a 1-token completion) for a few dialog
+lines, first evaluating every prompt from scratch, then with the static
+prefix primed once. Optionally times a restart that restores the prefix
+state from disk.
+
+    python -m benchmarks.bench_prefix_ttft --model path/to/model.gguf [--config config.toml]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.config.settings import CharacterCard, LlmConfig, load_settings
+from src.llm.llama_client import LlamaClient
+from src.llm.prompt_builder import PromptBuilder
+
+LINES = [
+    "Hello there! Welcome to the world of POKéMON!",
+    "I'm raising POKéMON too. When they get strong, they can protect me!",
+    "Technology is incredible! You can now store and recall items and POKéMON as data via PC!",
+    "Hey! You're not allowed in there!",
+    "My POKéMON is sleeping. Please be quiet.",
+    "The POKéMON LEAGUE is up ahead. Are you ready?",
+]
+
+
+def _ttft(client: LlamaClient, prompt: str) -> float:
+    t0 = time.perf_counter()
+    client.generate(prompt, max_tokens=1)
+    return time.perf_counter() - t0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, required=True)
+    parser.add_argument("--config", type=Path, help="Take card and few-shot block from here")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.config:
+        settings = load_settings(args.config)
+        card, few_shot = settings.character, settings.few_shot_examples
+    else:
+        card = CharacterCard("The Great Unknown", 27, "All over the world",
+                             ["blunt", "funny"], ["Spread rumors."])
+        few_shot = "Example:\nOriginal: I love my POKéMON!\nRewrite: I'm so into 'mons!\n"
+    builder = PromptBuilder(few_shot=few_shot)
+    prompts = [builder.build(card, line) for line in LINES] * args.rounds
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = LlmConfig(model_path=args.model, prefix_state_path=Path(tmp) / "prefix.bin")
+        client = LlamaClient(cfg)
+
+        cold = []
+        for prompt in prompts:
+            client.llm.reset()
+            cold.append(_ttft(client, prompt))
+
+        t0 = time.perf_counter()
+        client.prime(builder.prefix(card))
+        prime_secs = time.perf_counter() - t0
+        warm = [_ttft(client, prompt) for prompt in prompts]
+        del client
+
+        restarted = LlamaClient(cfg)
+        t0 = time.perf_counter()
+        restarted.prime(builder.prefix(card))
+        restore_secs = time.perf_counter() - t0
+
+    prefix_tokens = len(restarted.llm.tokenize(builder.prefix(card).encode("utf-8")))
+    print(f"{len(prompts)} prompts, prefix {prefix_tokens} tokens")
+    print(f"  full prompt eval  TTFT median {statistics.median(cold) * 1e3:8.1f} ms")
+    print(f"  primed prefix     TTFT median {statistics.median(warm) * 1e3:8.1f} ms"
+          f"  x{statistics.median(cold) / statistics.median(warm):.1f}")
+    print(f"  prime: evaluate {prime_secs * 1e3:.1f} ms, restore from disk {restore_secs * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Dialogue store benchmark.
+
+Compares loading the extractor's JSON map and resolving IPC payloads
+through it with opening the binary dialogue store and looking the same
+payloads up by raw bytes.
+
+    python -m benchmarks.bench_store [--lines 20000]
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.bench_codec import synthetic_bank
+from src.codecs.gen3 import Gen3TextCodec
+from src.store.dialogue_store import DialogueStore, DialogueStoreWriter
+from src.utils.io import save_json
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    codec = Gen3TextCodec()
+    bank = [raw[:-1] + b"\xff" for raw in synthetic_bank(args.lines)]
+    texts = codec.decode_many(bank)
+    # IPC payloads come without their terminator
+    payloads = [raw[:-1] for raw in bank]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "dialog.json"
+        store_path = Path(tmp) / "dialog.store"
+        save_json({raw.hex(): text for raw, text in zip(bank, texts)}, json_path)
+        offset = 0
+        with DialogueStoreWriter(store_path) as writer:
+            for raw, text in zip(bank, texts):
+                writer.add(offset, raw, text.encode("utf-8"))
+                offset += len(raw)
+
+        t0 = time.perf_counter()
+        with open(json_path, encoding="utf-8") as f:
+            dialog_map = json.load(f)
+        json_load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        json_hits = sum((p + b"\xff").hex() in dialog_map for p in payloads)
+        json_lookup = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        store = DialogueStore(store_path)
+        store_open = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        store_hits = sum(store.find(p) >= 0 for p in payloads)
+        store_lookup = time.perf_counter() - t0
+        store.close()
+
+        json_size = json_path.stat().st_size
+        store_size = store_path.stat().st_size
+
+    assert json_hits == store_hits
+    n = len(payloads)
+    print(f"{len(dialog_map)} lines, {store_hits} payload hits")
+    print(f"  json map  {json_size / 1e3:8.0f} kB  load {json_load * 1e3:8.2f} ms"
+          f"  lookup {json_lookup / n * 1e6:6.2f} us")
+    print(f"  store     {store_size / 1e3:8.0f} kB  open {store_open * 1e3:8.2f} ms"
+          f"  lookup {store_lookup / n * 1e6:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+LLM worker pool benchmark.
+
+Sends bursts of rewrite requests through an LlmWorkerPool of 1, 2 and 4
+workers and reports throughput and p50/p99 latency. Without --model the
+workers are simulated clients that sleep per token (like llama_cpp, they
+release the GIL while "evaluating"); with --model each worker holds its
+own llama context over the shared mmapped weights.
+
+    python -m benchmarks.bench_worker_pool [--workers 1 2 4] [--model path/to/model.gguf]
+"""
+import argparse
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+from src.config.settings import LlmConfig
+from src.llm.base import LlmClient
+from src.llm.worker_pool import LlmWorkerPool
+
+PROMPT = "Original: “Hello there! Welcome to the world of POKéMON!”\nRewrite: ”"
+
+
+class SimulatedClient(LlmClient):
+    def __init__(self, prompt_secs: float, token_secs: float) -> None:
+        self.prompt_secs = prompt_secs
+        self.token_secs = token_secs
+
+    def generate(self, prompt: str, max_tokens: int = 60, stop: Any = None,
+                 **kwargs: Any) -> str:
+        time.sleep(self.prompt_secs + self.token_secs * max_tokens)
+        return "word " * max_tokens
+
+
+def _run_burst(pool: LlmWorkerPool, requests: int, max_tokens: int) -> List[float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def one() -> None:
+        t0 = time.perf_counter()
+        pool.generate(PROMPT, max_tokens=max_tokens)
+        with lock:
+            latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=one) for _ in range(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per burst")
+    parser.add_argument("--max-tokens", type=int, default=40)
+    parser.add_argument("--model", type=Path, help="Use llama_cpp with this GGUF model")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Simulated time per token")
+    args = parser.parse_args(argv)
+
+    def factory() -> LlmClient:
+        if args.model:
+            from src.llm.llama_client import LlamaClient
+            return LlamaClient(LlmConfig(model_path=args.model))
+        return SimulatedClient(0.02, args.token_ms / 1e3)
+
+    print(f"{args.requests} requests per burst, {args.max_tokens} tokens each")
+    base_throughput = None
+    for workers in args.workers:
+        pool = LlmWorkerPool([factory() for _ in range(workers)])
+        t0 = time.perf_counter()
+        latencies = sorted(_run_burst(pool, args.requests, args.max_tokens))
+        secs = time.perf_counter() - t0
+        pool.close()
+        throughput = args.requests / secs
+        base_throughput = base_throughput or throughput
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"  {workers} worker(s): {throughput:7.2f} req/s  x{throughput / base_throughput:.1f}"
+              f"  p50 {statistics.median(latencies) * 1e3:8.1f} ms  p99 {p99 * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
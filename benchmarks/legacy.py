@@ -0,0 +1,152 @@
+"""
+Baseline implementations kept for benchmark and equivalence comparisons.
+
+These are verbatim copies of the code paths that have been replaced by
+faster versions in `src/`. Do not use them from application code.
+"""
+import logging
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from src.codecs.base import TextCodec
+from src.codecs.tables import GEN3_TABLE, REVERSE_TABLE
+from src.loaders.base import ByteSource
+
+
+def legacy_decode(data: bytes) -> str:
+    result, i = [], 0
+    while i < len(data):
+        b = data[i]
+        if b == 0xFF:
+            break
+        elif b == 0xFB:
+            result.append("\f")
+        elif b == 0xFE:
+            result.append("\n")
+        elif b == 0xFC and i + 1 < len(data):
+            code = data[i + 1]
+            if code == 0x10:
+                result.append("{PLAYER}")
+            elif code == 0x11:
+                result.append("{RIVAL}")
+            elif code == 0x0C:
+                result.append("→")
+            else:
+                result.append(f"[FC {code:02X}]")
+            i += 1
+        else:
+            result.append(GEN3_TABLE.get(b, f"[{b:02X}]"))
+        i += 1
+    return "".join(result)
+
+
+def legacy_encode(text: str, max_len: int = 255) -> bytes:
+    encoded = bytearray()
+    i = 0
+    while i < len(text):
+        # Handle placeholders first
+        if text.startswith("{PLAYER}", i):
+            encoded.extend([0xFC, 0x10])
+            i += len("{PLAYER}")
+            continue
+        if text.startswith("{RIVAL}", i):
+            encoded.extend([0xFC, 0x11])
+            i += len("{RIVAL}")
+            continue
+
+        c = text[i]
+        code: Union[int, List[int], None] = REVERSE_TABLE.get(c)
+        if isinstance(code, list):
+            # extend by each byte
+            encoded.extend(code)
+        elif isinstance(code, int):
+            encoded.append(code)
+        else:
+            # fallback for A–Z, a–z, or unknown
+            if "A" <= c <= "Z":
+                encoded.append(0xBB + ord(c) - 65)
+            elif "a" <= c <= "z":
+                encoded.append(0xD5 + ord(c) - 97)
+            else:
+                encoded.append(0x50)
+        i += 1
+        if len(encoded) >= max_len - 1:
+            break
+
+    encoded.append(0xFF)
+    return bytes(encoded)
+
+
+
+def legacy_extract(source: ByteSource, codec: TextCodec,
+                   start: int, end: int) -> dict[str, str]:
+    result: dict[str, str] = {}
+    offset = start
+    terminators = {0xFB, 0xFF}
+
+    while offset < end:
+        chunk = source.read(offset, 255)
+        try:
+            idx = next(i for i, b in enumerate(chunk) if b in terminators)
+        except StopIteration:
+            offset += 1
+            continue
+        segment = chunk[: idx + 1]
+        text = codec.decode(segment).strip()
+        if text:
+            result[segment.hex()] = text
+        offset += idx + 1
+
+    return result
+
+
+def legacy_cleanup_stale(ipc_dir: Path, ttl: int) -> None:
+    if ttl <= 0:
+        return
+    now = time.time()
+    for p in list(ipc_dir.iterdir()):
+        if not p.is_file():
+            continue
+        try:
+            mtime = p.stat().st_mtime
+        except OSError:
+            continue
+        if (now - mtime) > ttl:
+            try:
+                p.unlink()
+                logging.info("Removed stale IPC file: %s", p)
+            except Exception:
+                logging.error("Error: failed to remove stale file %s", p,
+                              exc_info=True)
+
+
+def legacy_read_request(ipc_dir: Path, ttl: int) -> Optional[Tuple[str, bytes]]:
+    """ FileIpcBackend.read_request before the scandir rewrite. """
+    legacy_cleanup_stale(ipc_dir, ttl)
+    candidates = [
+        p for p in ipc_dir.iterdir()
+        if p.is_file() and p.name.startswith("ipc_in_") and
+            p.name.endswith(".bin")
+    ]
+    if not candidates:
+        return None
+
+    candidates.sort(key=lambda p: p.stat().st_mtime)
+    for path in candidates:
+        req_id = path.name[len("ipc_in_"): -len(".bin")]
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+        except (FileNotFoundError, PermissionError, OSError) as exc:
+            logging.error("Error: could not read request %s: %s", path, exc)
+            continue
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            logging.info("Request file already remove %s", path)
+        except Exception:
+            logging.info("Failed to unlink request file %s", path,
+                         exc_info=True)
+        return req_id, payload
+    return None
@@ -1,19 +1,78 @@
 import logging
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Iterable, Iterator, List
 from src.config.settings import ExtractConfig
-from src.loaders.rom_loader import RomLoader
+from src.loaders.mmap_loader import MmapRomLoader
 from src.codecs.gen3 import Gen3TextCodec
-from src.extractors.dialog import DialogExtractor
-from src.utils.io import save_json
+from src.extractors.cache import ExtractionCache, rom_digest
+from src.extractors.dialog import DialogExtractor, Segment, join_paragraphs, segments_to_map
+from src.extractors.parallel import iter_segments_parallel
+from src.extractors.pointers import PointerTextExtractor
+from src.store.dialogue_store import DialogueStoreWriter
+from src.utils.io import save_json, save_jsonl
+
+def _feed_store(segments: Iterable[Segment], writer: DialogueStoreWriter) -> Iterator[Segment]:
+    """ Pass segments through, adding every whole dialog line to the store. """
+    pending: List[Segment] = []
+
+    def flush() -> None:
+        for offset, raw, text in join_paragraphs(pending):
+            if text:
+                writer.add(offset, raw, text.encode("utf-8"))
+        pending.clear()
+
+    for segment in segments:
+        yield segment
+        pending.append(segment)
+        if segment[1][-1] != 0xFB:
+            flush()
+    flush()
 
 def run_extraction(extract_cfg: ExtractConfig) -> None:
-    loader = RomLoader(str(extract_cfg.rom_path))
     codec = Gen3TextCodec()
-    extractor = DialogExtractor(loader, codec,
-                                extract_cfg.start_offset,
-                                extract_cfg.end_offset)
-    raw_map = extractor.extract()
+    rom_path = str(extract_cfg.rom_path)
+    start, end = extract_cfg.start_offset, extract_cfg.end_offset
     output_path = Path(extract_cfg.output_path) if isinstance(extract_cfg.output_path, str) else extract_cfg.output_path
-    save_json(raw_map, output_path)
-    logging.info(f"All dialogs saved to {extract_cfg.output_path}")
+    with ExitStack() as stack:
+        loader = stack.enter_context(MmapRomLoader(rom_path))
+        segments: Iterator[Segment]
+        if extract_cfg.mode == "pointers":
+            pointer_extractor = PointerTextExtractor(loader, codec, start, end)
+            index = pointer_extractor.build_index()
+            index_path = output_path.with_name(f"{output_path.stem}.pointers.json")
+            save_json({f"0x{offset:06X}": [f"0x{p:06X}" for p in pointers]
+                       for offset, pointers in index.items()}, index_path)
+            logging.info(f"{len(index)} pointed strings indexed in {index_path}")
+            segments = pointer_extractor.iter_segments(index)
+        else:
+            def scan_local(pos: int, stop: int) -> Iterator[Segment]:
+                return DialogExtractor(loader, codec, pos, stop).iter_segments()
 
+            def scan_parallel(pos: int, stop: int) -> Iterator[Segment]:
+                return iter_segments_parallel(rom_path, codec, pos, stop, extract_cfg.jobs)
+
+            parallel = extract_cfg.jobs > 1
+            if extract_cfg.cache:
+                cache_path = output_path.with_name(f"{output_path.stem}.cache.sqlite")
+                cache = ExtractionCache(cache_path, rom_digest(loader), codec.version)
+                stack.callback(cache.log_stats)
+                stack.callback(cache.close)
+                # gaps in a warm cache are short, not worth a process pool
+                scan = scan_parallel if parallel and cache.is_cold() else scan_local
+                segments = cache.iter_segments(start, end, scan)
+            else:
+                scan = scan_parallel if parallel else scan_local
+                segments = scan(start, end)
+
+        if extract_cfg.store_path is not None:
+            writer = stack.enter_context(DialogueStoreWriter(extract_cfg.store_path))
+            segments = _feed_store(segments, writer)
+
+        if extract_cfg.output_format == "jsonl":
+            count = save_jsonl(({"offset": offset, "raw": raw.hex(), "text": text}
+                                for offset, raw, text in segments if text), output_path)
+            logging.info(f"{count} dialog records streamed")
+        else:
+            save_json(segments_to_map(segments), output_path)
+    logging.info(f"All dialogs saved to {extract_cfg.output_path}")
@@ -1,33 +1,339 @@
-import time
+"""
+IPC service loop, as a staged asyncio pipeline:
+
+    read -> [generate queue] -> generate x llm.workers -> [write queue] -> write
+
+The reader waits on the backend on its own thread and sends what needs
+no model (pregen pack hits) straight to the writer. Generations run on
+a thread pool, so requests keep being read and responses written while
+the model is busy, and the model never waits on file I/O.
+
+The generate queue holds at most ipc.pipeline_depth requests: once it is
+full the reader stops reading and new requests wait in the backend. A
+request whose emulator deadline passes while queued is dropped before
+generation, and one whose rewrite fails is answered with the original
+line. On SIGINT (Ctrl-C) or SIGTERM reading stops, queued requests
+are dropped and the generations already running are finished and
+written. A second signal abandons that drain: the running generations
+are told to stop at their next piece, nothing more is written and `run`
+returns without waiting for them.
+"""
+import asyncio
 import logging
-from src.utils.format import format_dialogue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import ContextManager, List, NamedTuple, Optional
+from src.ipc.deadline import DeadlineStats, request_deadline
 from src.ipc.service import IpcService
-from src.llm.dialogue_generator import DialogueGenerator
-from src.codecs.gen3 import Gen3TextCodec
+from src.llm.prefetcher import Prefetcher
+from src.llm.rewriter import DialogueRewriter
 from src.config.settings import Settings
+from src.store.dialogue_store import DialogueStore, open_store
+
+# Longest single wait for a request; the reader just waits again
+REQUEST_WAIT = 1.0
+
+
+class _Request(NamedTuple):
+    req_id: str
+    original: bytes
+    deadline: float
+    number: int  # extraction store entry, -1 if unknown
+
+
+class _Response(NamedTuple):
+    req_id: str
+    data: bytes
+    deadline: float
+    number: int
+
+
+class QueueStats:
+    """ Depth of a pipeline queue, as seen by each item entering it. """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items = 0
+        self.depth_sum = 0
+        self.peak = 0
+
+    def record(self, depth: int) -> None:
+        self.items += 1
+        self.depth_sum += depth
+        self.peak = max(self.peak, depth)
+
+    def log_stats(self) -> None:
+        mean = self.depth_sum / self.items if self.items else 0.0
+        logging.info("%s queue: %d items, %.2f waiting ahead on average, %d at most",
+                     self.name, self.items, mean, self.peak)
+
+
+class IpcPipeline:
+    def __init__(
+        self,
+        settings: Settings,
+        service: IpcService,
+        rewriter: DialogueRewriter,
+        store: Optional[DialogueStore] = None,
+        pack: Optional[DialogueStore] = None,
+        prefetcher: Optional[Prefetcher] = None,
+    ) -> None:
+        if settings.ipc.pipeline_depth < 1:
+            raise ValueError(f"ipc.pipeline_depth must be at least 1, got {settings.ipc.pipeline_depth}")
+        self.settings = settings
+        self.service = service
+        self.rewriter = rewriter
+        self.store = store
+        self.pack = pack
+        self.prefetcher = prefetcher
+        self.workers = max(settings.llm.workers, 1)
+        self.deadlines = DeadlineStats()
+        self.generate_stats = QueueStats("Generate")
+        self.write_stats = QueueStats("Write")
+        self.expired = 0
+        self.dropped = 0
+        self.failed = 0
+        self.abandoned = 0
+        self._abandon = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._stopping = False
+
+    def stop(self) -> None:
+        """ From any thread: shut `run` down as SIGINT does. Calls after the first do nothing. """
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None and not self._stopping:
+            self._stopping = True
+            loop.call_soon_threadsafe(task.cancel)
 
-def run_ipc_loop(settings: Settings, generator: DialogueGenerator, codec: Gen3TextCodec) -> None:
+    def _on_signal(self, signum: int) -> None:
+        name = signal.Signals(signum).name
+        if self._stopping and self._task is not None:
+            logging.info("%s again, abandoning the running generations", name)
+            self._abandon.set()
+            self._task.cancel()
+            return
+        logging.info("IPC mode terminated by %s", name)
+        self.stop()
+
+    def _handle_signals(self, loop: asyncio.AbstractEventLoop, install: bool) -> None:
+        """
+        Route SIGINT and SIGTERM to `stop`, so only the main task is
+        cancelled: asyncio.run cancels every task on KeyboardInterrupt
+        before Python 3.11. Not possible off the main thread or on
+        Windows, where `stop` is the only clean way out.
+        """
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                if install:
+                    loop.add_signal_handler(signum, self._on_signal, signum)
+                else:
+                    loop.remove_signal_handler(signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                return
+
+    async def run(self) -> None:
+        """ Serve requests until stopped (or a stage fails). """
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._task = asyncio.current_task()
+        self._handle_signals(loop, install=True)
+        try:
+            await self._run()
+        finally:
+            self._handle_signals(loop, install=False)
+
+    async def _run(self) -> None:
+        requests: "asyncio.Queue[Optional[_Request]]" = asyncio.Queue(self.settings.ipc.pipeline_depth)
+        responses: "asyncio.Queue[Optional[_Response]]" = asyncio.Queue()
+        reads = ThreadPoolExecutor(1, thread_name_prefix="ipc-read")
+        writes = ThreadPoolExecutor(1, thread_name_prefix="ipc-write")
+        generations = ThreadPoolExecutor(self.workers, thread_name_prefix="ipc-generate")
+        try:
+            reader = asyncio.create_task(self._read(reads, requests, responses))
+            generators = [asyncio.create_task(self._generate(generations, requests, responses))
+                          for _ in range(self.workers)]
+            writer = asyncio.create_task(self._write(writes, responses))
+            tasks = [reader, *generators, writer]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            except asyncio.CancelledError:
+                try:
+                    await self._drain(reader, generators, writer, requests, responses)
+                except asyncio.CancelledError:
+                    if not self._abandon.is_set():
+                        raise
+                    await self._abandon_stages(tasks)
+                if not self._stopping:
+                    raise
+                return
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for task in done:
+                task.result()
+        finally:
+            # abandoned generations are not waited for: they stop on their own
+            for executor in (reads, writes, generations):
+                executor.shutdown(wait=not self._abandon.is_set(), cancel_futures=True)
+
+    async def _abandon_stages(self, tasks: List["asyncio.Task[None]"]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logging.warning("%d running generations abandoned, their responses are not sent",
+                        self.abandoned)
+
+    async def _drain(
+        self,
+        reader: "asyncio.Task[None]",
+        generators: List["asyncio.Task[None]"],
+        writer: "asyncio.Task[None]",
+        requests: "asyncio.Queue[Optional[_Request]]",
+        responses: "asyncio.Queue[Optional[_Response]]",
+    ) -> None:
+        """ Stop reading, drop queued requests, finish and write running generations. """
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        while not requests.empty():
+            if requests.get_nowait() is not None:
+                self.dropped += 1
+        if self.dropped:
+            logging.info("%d queued requests dropped at shutdown", self.dropped)
+        for _ in generators:
+            await requests.put(None)
+        await asyncio.gather(*generators)
+        await responses.put(None)
+        await writer
+
+    async def _read(
+        self,
+        reads: ThreadPoolExecutor,
+        requests: "asyncio.Queue[Optional[_Request]]",
+        responses: "asyncio.Queue[Optional[_Response]]",
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            req = await loop.run_in_executor(reads, self.service.wait_for_request, REQUEST_WAIT)
+            if req is None:
+                continue
+            req_id, original = req
+            deadline = request_deadline(req_id, self.settings.ipc.response_timeout)
+            number = self.store.find(original) if self.store is not None else -1
+            if self.store is not None and number >= 0:
+                offset = self.store.entry(number).offset
+                logging.info(f"[{req_id}] Known line at ROM 0x{offset:06X}")
+
+            pregenerated = self.pack.lookup(original) if self.pack is not None else None
+            if pregenerated is not None:
+                logging.info(f"[{req_id}] Served from pregen pack")
+                self.write_stats.record(responses.qsize())
+                await responses.put(_Response(req_id, pregenerated.value, deadline, number))
+                continue
+            self.generate_stats.record(requests.qsize())
+            # blocks while the queue is full: backpressure on the backend
+            await requests.put(_Request(req_id, original, deadline, number))
+
+    async def _generate(
+        self,
+        generations: ThreadPoolExecutor,
+        requests: "asyncio.Queue[Optional[_Request]]",
+        responses: "asyncio.Queue[Optional[_Response]]",
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request = await requests.get()
+            if request is None:
+                return
+            if time.monotonic() >= request.deadline:
+                self.expired += 1
+                logging.warning(f"[{request.req_id}] Emulator deadline passed while queued, dropped")
+                continue
+            try:
+                data = await loop.run_in_executor(generations, self._rewrite, request)
+            except asyncio.CancelledError:
+                if self._abandon.is_set():
+                    self.abandoned += 1
+                raise
+            except Exception:
+                # one failed line must not take the service down
+                self.failed += 1
+                logging.error(f"[{request.req_id}] Rewrite failed, original line sent back",
+                              exc_info=True)
+                data = self.rewriter.original(request.original)
+            self.write_stats.record(responses.qsize())
+            await responses.put(_Response(request.req_id, data, request.deadline, request.number))
+
+    def _rewrite(self, request: _Request) -> bytes:
+        # a cache hit needs no model: running prefetch work is left alone
+        cached = self.rewriter.lookup(request.original, request.req_id)
+        if cached is not None:
+            if self.prefetcher is not None:
+                self.prefetcher.served(request.original)
+            return cached
+        live: ContextManager[None] = \
+            self.prefetcher.live(request.original) if self.prefetcher is not None else nullcontext()
+        with live:
+            return self.rewriter.rewrite(
+                request.original, request.req_id,
+                request.deadline - self.settings.ipc.deadline_margin, check_cache=False,
+                cancel=self._abandon)
+
+    async def _write(
+        self,
+        writes: ThreadPoolExecutor,
+        responses: "asyncio.Queue[Optional[_Response]]",
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            response = await responses.get()
+            if response is None:
+                return
+            if self.deadlines.record(response.deadline):
+                await loop.run_in_executor(
+                    writes, self.service.write_response, response.req_id, response.data)
+            else:
+                logging.warning(f"[{response.req_id}] Emulator deadline missed, response dropped")
+            if self.prefetcher is not None and response.number >= 0:
+                self.prefetcher.schedule(response.number)
+
+    def log_stats(self) -> None:
+        self.deadlines.log_stats()
+        self.generate_stats.log_stats()
+        self.write_stats.log_stats()
+        logging.info("IPC pipeline: %d requests expired while queued, %d failed,"
+                     " %d dropped and %d abandoned at shutdown",
+                     self.expired, self.failed, self.dropped, self.abandoned)
+
+
+def run_ipc_loop(settings: Settings, rewriter: DialogueRewriter) -> None:
     logging.info("IPC Mode Enabled — Atomic IPC handshake")
     service = IpcService.from_settings(settings)
+    store = open_store(settings.ipc.store_path)
+    pack = open_store(settings.pregen.pack_path)
+    prefetcher: Optional[Prefetcher] = None
+    if settings.prefetch.enabled and store is not None and rewriter.cache is not None:
+        prefetcher = Prefetcher(settings.prefetch, rewriter, store, pack)
+    elif settings.prefetch.enabled:
+        logging.info("Prefetch needs both ipc.store_path and the rewrite cache, disabled")
+    pipeline = IpcPipeline(settings, service, rewriter, store, pack, prefetcher)
     try:
-        while True:
-            req = service.read_request()
-            if req:
-                req_id, original = req
-                decoded_original = codec.decode(original)
-                formatted_ori = decoded_original.replace("\n", " ").replace("\x0c", " ")
-                logging.info(f"[{req_id}] Received: {formatted_ori!r}")
-
-                rewrite = ""
-                while len(rewrite.strip()) < 5:
-                    rewrite = generator.generate(formatted_ori)
-
-                logging.info(f"[{req_id}] Rewritten: {rewrite!r}")
-                rewrite = format_dialogue(rewrite)
-                data = codec.encode(rewrite, max_len=255)
-                service.write_response(req_id, data)
-
-            time.sleep(0.05)
+        asyncio.run(pipeline.run())
     except KeyboardInterrupt:
+        # before the pipeline handles signals itself
         logging.info("IPC mode terminated by user.")
-
+    finally:
+        # abandoned generations may still be winding down: stop the
+        # background work first, then the backend, and only then report
+        if prefetcher is not None:
+            prefetcher.close()
+        service.close()
+        pipeline.log_stats()
+        if prefetcher is not None:
+            prefetcher.log_stats()
+        for opened in (store, pack):
+            if opened is not None:
+                opened.close()
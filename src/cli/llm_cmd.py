@@ -1,25 +1,55 @@
 # src/cli/llm_cmd.py
 import logging
+from typing import Optional
 from src.cli.parser import parse_args
 from src.cli.extract_cmd import run_extraction
 from src.cli.ipc_cmd import run_ipc_loop
+from src.cli.pregen_cmd import run_pregen
+from src.llm.background_client import BackgroundLoadedClient
+from src.llm.base import LlmClient
+from src.llm.http_client import HttpLlmClient
 from src.llm.llama_client import LlamaClient
 from src.llm.prompt_builder import PromptBuilder
 from src.llm.dialogue_generator import DialogueGenerator
+from src.llm.rewrite_cache import RewriteCache, rewrite_fingerprint
+from src.llm.rewriter import DialogueRewriter
+from src.llm.worker_pool import build_pool
 from src.codecs.gen3 import Gen3TextCodec
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO)
-    settings, ipc_mode = parse_args()
+    settings, ipc_mode, pregen_mode = parse_args()
     codec = Gen3TextCodec()
 
-    llm_client = LlamaClient(settings.llm)
+    def load_client() -> LlmClient:
+        if settings.llm.api_url:
+            # one client, its connection pool sized for the workers
+            http_client = HttpLlmClient(settings.llm)
+            return build_pool(lambda: http_client, settings.llm.workers)
+        return build_pool(lambda: LlamaClient(settings.llm), settings.llm.workers)
+
+    # in IPC mode the loop starts at once and the model loads behind it
+    llm_client = BackgroundLoadedClient(load_client) if ipc_mode else load_client()
     prompt_builder = PromptBuilder(few_shot=settings.few_shot_examples)
     generator = DialogueGenerator(llm_client, settings.character, prompt_builder)
 
-    if ipc_mode:
-        run_ipc_loop(settings, generator, codec)
+    if ipc_mode or pregen_mode:
+        cache: Optional[RewriteCache] = None
+        if settings.cache.enabled:
+            fingerprint = rewrite_fingerprint(settings.character, prompt_builder, settings.llm)
+            cache = RewriteCache(settings.cache, fingerprint)
+        rewriter = DialogueRewriter(generator, codec, cache, settings.llm.max_attempts)
+        generator.prime()
+        try:
+            if pregen_mode:
+                run_pregen(settings, rewriter)
+            else:
+                run_ipc_loop(settings, rewriter)
+        finally:
+            rewriter.log_stats()
+            if cache is not None:
+                cache.log_stats()
+                cache.close()
     else:
         print("Extract dialogues out of ROM:")
         run_extraction(settings.extract)
-
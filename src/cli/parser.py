@@ -9,8 +9,16 @@ def parse_args() -> Any:
     parser.add_argument("--config", type=Path, default=Path("config.toml"), help="Path to the config file")
     parser.add_argument("--rom", type=Path, help="Path to the ROM file")
     parser.add_argument("--out", type=Path, help="Path to the output file")
+    parser.add_argument("--format", choices=["json", "jsonl"], dest="output_format",
+                        help="Extraction output: JSON map or streamed JSON Lines")
     parser.add_argument("--model", type=Path, help="Path to the LLM model file")
     parser.add_argument("--ipc", action="store_true", help="Enable IPC mode with Lua")
+    parser.add_argument("--pregen", action="store_true",
+                        help="Rewrite the whole text bank ahead of time into the pregen pack")
+    parser.add_argument("--workers", type=int, help="Concurrent generations for --pregen")
+    parser.add_argument("--jobs", type=int, help="Worker processes for extraction")
+    parser.add_argument("--mode", choices=["scan", "pointers"],
+                        help="Extraction mode: byte scan or pointer-table discovery")
     args = parser.parse_args()
 
     settings = load_settings(args.config)
@@ -19,8 +27,16 @@ def parse_args() -> Any:
         settings.extract.rom_path = args.rom
     if args.out:
         settings.extract.output_path = args.out
+    if args.jobs:
+        settings.extract.jobs = args.jobs
+    if args.mode:
+        settings.extract.mode = args.mode
+    if args.output_format:
+        settings.extract.output_format = args.output_format
     if args.model:
         settings.llm.model_path = args.model
+    if args.workers:
+        settings.pregen.workers = args.workers
 
-    return settings, args.ipc
+    return settings, args.ipc, args.pregen
 
@@ -0,0 +1,122 @@
+"""
+Offline pre-generation of the whole text bank.
+
+Every known dialog line is rewritten ahead of time and the encoded
+responses are packed into a dialogue store file (key: the line as the
+Lua hook sends it, value: the response bytes), which the IPC loop
+answers from before falling back to live generation.
+
+Finished lines are appended to a JSONL checkpoint as they complete, so
+an interrupted run resumes where it stopped. The pack is rebuilt from
+the checkpoint at the end of every run. Lines without a usable rewrite
+are left out of both, so the next run retries them and the IPC loop
+generates them live meanwhile.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Deque, Iterator, Optional, Set, Tuple
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import Settings
+from src.extractors.dialog import DialogExtractor, join_paragraphs
+from src.llm.rewriter import DialogueRewriter
+from src.loaders.mmap_loader import MmapRomLoader
+from src.store.dialogue_store import DialogueStore, DialogueStoreWriter, store_key
+from src.utils.io import JsonlWriter, load_jsonl
+
+# (ROM offset, payload as sent by the Lua hook)
+Line = Tuple[int, bytes]
+
+
+def iter_lines(settings: Settings) -> Iterator[Line]:
+    """
+    Lines to rewrite: read from the extraction store when there is one,
+    otherwise scanned from the ROM.
+    """
+    store_path = settings.extract.store_path
+    if store_path is not None and store_path.is_file():
+        with DialogueStore(store_path) as store:
+            logging.info(f"Pre-generating the {len(store)} lines of {store_path}")
+            for entry in store:
+                yield entry.offset, entry.key
+        return
+
+    extract_cfg = settings.extract
+    logging.info(f"Pre-generating lines scanned from {extract_cfg.rom_path}")
+    with MmapRomLoader(str(extract_cfg.rom_path)) as loader:
+        extractor = DialogExtractor(loader, Gen3TextCodec(),
+                                    extract_cfg.start_offset, extract_cfg.end_offset)
+        seen: Set[bytes] = set()
+        for offset, raw, text in join_paragraphs(extractor.iter_segments()):
+            key = store_key(raw)
+            if text and key not in seen:
+                seen.add(key)
+                yield offset, key
+
+
+def _drop_partial_line(path: Path) -> None:
+    """ Cut a line left half-written by a crash so appends start clean. """
+    data = path.read_bytes()
+    if data and not data.endswith(b"\n"):
+        with open(path, "r+b") as f:
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def run_pregen(settings: Settings, rewriter: DialogueRewriter) -> None:
+    cfg = settings.pregen
+    pack_path = cfg.pack_path
+    checkpoint_path = cfg.checkpoint_path or pack_path.with_name(f"{pack_path.name}.checkpoint.jsonl")
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+
+    done: Set[bytes] = set()
+    if checkpoint_path.is_file():
+        _drop_partial_line(checkpoint_path)
+        done = {bytes.fromhex(row["payload"]) for row in load_jsonl(checkpoint_path)}
+        logging.info(f"Resuming: {len(done)} lines already in {checkpoint_path}")
+    todo = (line for line in iter_lines(settings) if line[1] not in done)
+
+    generated = 0
+    kept_original = 0
+    t0 = time.perf_counter()
+    with JsonlWriter(checkpoint_path, append=True) as checkpoint, \
+            ThreadPoolExecutor(max_workers=cfg.workers) as pool:
+        # a few lines ahead of the workers keeps them busy without
+        # queueing the whole bank
+        pending: Deque[Tuple[Line, "Future[Optional[bytes]]"]] = deque()
+
+        def submit(line: Line) -> None:
+            pending.append((line, pool.submit(rewriter.try_rewrite, line[1], f"0x{line[0]:06X}")))
+
+        for line in islice(todo, cfg.workers * 2):
+            submit(line)
+        while pending:
+            (offset, payload), future = pending.popleft()
+            response = future.result()
+            for line in islice(todo, 1):
+                submit(line)
+            if response is None:
+                kept_original += 1
+                continue
+            checkpoint.write({"offset": offset, "payload": payload.hex(),
+                              "response": response.hex()})
+            generated += 1
+            if generated % 100 == 0:
+                rate = generated / (time.perf_counter() - t0)
+                logging.info(f"{generated} lines pre-generated, {rate:.2f} lines/s")
+
+    secs = time.perf_counter() - t0
+    rate = generated / secs if secs > 0 else 0.0
+    logging.info(f"{generated} lines generated in {secs:.1f}s ({rate:.2f} lines/s)")
+    if kept_original:
+        logging.warning(f"{kept_original} lines had no usable rewrite and are left out"
+                        " of the pack, the next run retries them")
+
+    with DialogueStoreWriter(pack_path) as pack:
+        for row in load_jsonl(checkpoint_path):
+            pack.add(row["offset"], bytes.fromhex(row["payload"]),
+                     bytes.fromhex(row["response"]))
+    logging.info(f"{len(pack)} pre-generated responses packed in {pack_path}")
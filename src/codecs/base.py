@@ -1,10 +1,23 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, List
+from src.utils.buffer import BytesLike
 
 class TextCodec(ABC):
+    # Bump whenever decoded output changes; keys the extraction cache
+    version: str = "0"
+
     @abstractmethod
-    def decode(self, data: bytes) -> str:
+    def decode(self, data: BytesLike) -> str:
         ...
 
     @abstractmethod
     def encode(self, text: str, max_len: int = 255) -> bytes:
         ...
+
+    def decode_many(self, chunks: Iterable[BytesLike]) -> List[str]:
+        """ Decode several strings at once. Codecs may override with a batch path. """
+        return [self.decode(chunk) for chunk in chunks]
+
+    def encode_many(self, texts: Iterable[str], max_len: int = 255) -> List[bytes]:
+        """ Encode several strings at once. Codecs may override with a batch path. """
+        return [self.encode(text, max_len) for text in texts]
@@ -1,67 +1,191 @@
+import codecs
+import re
 from .base import TextCodec
-from src.codecs.tables import GEN3_TABLE, REVERSE_TABLE
-from typing import Union, List
+from src.codecs.tables import GEN3_TABLE, GEN3_FC_TABLE, REVERSE_TABLE
+from typing import Dict, Iterable, List, Tuple, Union
+from src.utils.buffer import BytesLike
+
+# Dense 256-slot decode table. Bytes that decode to exactly one character are
+# handled by the C charmap codec; every other byte (terminator, control codes,
+# unknown bytes, empty glyphs) is mapped to a private-use marker U+E0xx so the
+# decoded string stays aligned with the input and specials are easy to find.
+_MARKER_BASE = 0xE000
+_DECODE_TABLE: List[str] = [GEN3_TABLE.get(b, f"[{b:02X}]") for b in range(256)]
+_FC_DECODE_TABLE: List[str] = [
+    GEN3_FC_TABLE.get(b, f"[FC {b:02X}]") for b in range(256)
+]
+_SPECIAL_BYTES = {0xFC, 0xFF}
+
+
+def _build_charmap() -> str:
+    chars: List[str] = []
+    seen: set[str] = set()
+    for b, glyph in enumerate(_DECODE_TABLE):
+        if b in _SPECIAL_BYTES or len(glyph) != 1 or glyph in seen:
+            chars.append(chr(_MARKER_BASE + b))
+        else:
+            chars.append(glyph)
+            seen.add(glyph)
+    return "".join(chars)
+
+
+_CHARMAP = _build_charmap()
+_CHAR_TO_BYTE = {c: b for b, c in enumerate(_CHARMAP)}
+_MARKER_RE = re.compile(f"[{chr(_MARKER_BASE)}-{chr(_MARKER_BASE + 0xFF)}]")
+_TERM_MARKER = chr(_MARKER_BASE + 0xFF)
+_FC_MARKER = chr(_MARKER_BASE + 0xFC)
+# 1 for bytes that need more than a table lookup, terminator excluded
+_FLAGS = bytes(
+    int(b != 0xFF and ord(c) >= _MARKER_BASE) for b, c in enumerate(_CHARMAP)
+)
+
+
+# Encoding runs the C charmap codec over literal text and splices in the
+# multi-byte tokens ({PLAYER}, {RIVAL}, ...) found by one regex pass.
+_UNKNOWN_BYTE = 0x50
+
+
+def _code_bytes(code: Union[int, List[int]]) -> bytes:
+    return bytes(code if isinstance(code, list) else [code])
+
+
+_TOKENS: Dict[str, bytes] = {
+    token: _code_bytes(code) for token, code in REVERSE_TABLE.items()
+    if len(token) > 1 or isinstance(code, list)
+}
+# charmap_build uses U+FFFE for undefined slots and would map it to a real
+# byte, so route it through the token path as an unknown character.
+_TOKENS["\ufffe"] = bytes([_UNKNOWN_BYTE])
+# One alternation over every multi-character token, longest first
+_TOKEN_RE = re.compile("({})".format(
+    "|".join(re.escape(t) for t in sorted(_TOKENS, key=len, reverse=True))
+))
+
+
+def _build_encoding_table() -> List[str]:
+    table = ["\ufffe"] * 256  # undefined
+    for c, code in REVERSE_TABLE.items():
+        if len(c) == 1 and c not in _TOKENS and isinstance(code, int):
+            table[code] = c
+    return table
+
+
+_ENCODING_TABLE = _build_encoding_table()
+_ENCODING_MAP = codecs.charmap_build("".join(_ENCODING_TABLE))
+# encode_many joins its inputs with a noncharacter mapped to a byte no glyph
+# or token uses, then splits the encoded buffer on that byte.
+_BATCH_SEP = "\uffff"
+_BATCH_SEP_BYTE = next(
+    b for b in range(256)
+    if _ENCODING_TABLE[b] == "\ufffe" and b != _UNKNOWN_BYTE
+    and all(b not in code for code in _TOKENS.values())
+)
+_BATCH_ENCODING_MAP = codecs.charmap_build("".join(
+    _BATCH_SEP if b == _BATCH_SEP_BYTE else c for b, c in enumerate(_ENCODING_TABLE)
+))
+
+
+def _unknown_char_handler(exc: UnicodeError) -> Tuple[bytes, int]:
+    assert isinstance(exc, UnicodeEncodeError)
+    return bytes([_UNKNOWN_BYTE]) * (exc.end - exc.start), exc.end
+
+
+codecs.register_error("gen3-unknown", _unknown_char_handler)
+
+
+def _encode_body(text: str, batch: bool = False) -> bytes:
+    encoding_map = _BATCH_ENCODING_MAP if batch else _ENCODING_MAP
+    parts = _TOKEN_RE.split(text)
+    if len(parts) == 1:
+        return codecs.charmap_encode(text, "gen3-unknown", encoding_map)[0]
+    # split() alternates literal runs and captured tokens
+    return b"".join(
+        _TOKENS[part] if i % 2 else
+        codecs.charmap_encode(part, "gen3-unknown", encoding_map)[0]
+        for i, part in enumerate(parts)
+    )
+
+
+def _terminate(body: bytes, max_len: int) -> bytes:
+    """ Truncate to fit `max_len` with the 0xFF terminator, keeping 0xFC pairs whole. """
+    limit = max(max_len - 1, 1)
+    if len(body) > limit:
+        cut = limit
+        if body[cut - 1] == 0xFC:
+            cut -= 1
+        body = body[:cut]
+    return body + b"\xff"
+
+
+def _resolve_markers(s: str) -> str:
+    """ Expand the markers left by the charmap pass into their final text. """
+    m = _MARKER_RE.search(s)
+    if m is None:
+        return s
+    if m.group() == _TERM_MARKER:
+        return s[:m.start()]
+    parts: List[str] = []
+    pos = 0
+    while m is not None:
+        i = m.start()
+        parts.append(s[pos:i])
+        marker = m.group()
+        if marker == _TERM_MARKER:
+            return "".join(parts)
+        if marker == _FC_MARKER and i + 1 < len(s):
+            # 0xFC always swallows the next byte, even a terminator
+            parts.append(_FC_DECODE_TABLE[_CHAR_TO_BYTE[s[i + 1]]])
+            pos = i + 2
+        else:
+            parts.append(_DECODE_TABLE[ord(marker) - _MARKER_BASE])
+            pos = i + 1
+        m = _MARKER_RE.search(s, pos)
+    parts.append(s[pos:])
+    return "".join(parts)
+
 
 class Gen3TextCodec(TextCodec):
-    def decode(self, data: bytes) -> str:
-        result, i = [], 0
-        while i < len(data):
-            b = data[i]
-            if b == 0xFF:
-                break
-            elif b == 0xFB:
-                result.append("\f")
-            elif b == 0xFE:
-                result.append("\n")
-            elif b == 0xFC and i + 1 < len(data):
-                code = data[i + 1]
-                if code == 0x10:
-                    result.append("{PLAYER}")
-                elif code == 0x11:
-                    result.append("{RIVAL}")
-                elif code == 0x0C:
-                    result.append("→")
-                else:
-                    result.append(f"[FC {code:02X}]")
-                i += 1
+    version = "gen3-1"
+
+    def decode(self, data: BytesLike) -> str:
+        return self.decode_many([data])[0]
+
+    def decode_many(self, chunks: Iterable[BytesLike]) -> List[str]:
+        """
+        Decode a batch of strings through one charmap pass over the
+        concatenated buffer, then split the result back per chunk.
+        """
+        chunks = list(chunks)
+        buf = b"".join(chunks)
+        marked = codecs.charmap_decode(buf, "strict", _CHARMAP)[0]
+        flags = buf.translate(_FLAGS)
+        result: List[str] = []
+        pos = 0
+        for chunk in chunks:
+            end = pos + len(chunk)
+            term = buf.find(0xFF, pos, end)
+            stop = end if term == -1 else term
+            if flags.find(1, pos, stop) == -1:
+                # fast path: plain run of glyphs up to the terminator
+                result.append(marked[pos:stop])
             else:
-                result.append(GEN3_TABLE.get(b, f"[{b:02X}]"))
-            i += 1
-        return "".join(result)
+                result.append(_resolve_markers(marked[pos:end]))
+            pos = end
+        return result
 
     def encode(self, text: str, max_len: int = 255) -> bytes:
-        encoded = bytearray()
-        i = 0
-        while i < len(text):
-            # Handle placeholders first
-            if text.startswith("{PLAYER}", i):
-                encoded.extend([0xFC, 0x10])
-                i += len("{PLAYER}")
-                continue
-            if text.startswith("{RIVAL}", i):
-                encoded.extend([0xFC, 0x11])
-                i += len("{RIVAL}")
-                continue
-
-            c = text[i]
-            code: Union[int, List[int], None] = REVERSE_TABLE.get(c)
-            if isinstance(code, list):
-                # extend by each byte
-                encoded.extend(code)
-            elif isinstance(code, int):
-                encoded.append(code)
-            else:
-                # fallback for A–Z, a–z, or unknown
-                if "A" <= c <= "Z":
-                    encoded.append(0xBB + ord(c) - 65)
-                elif "a" <= c <= "z":
-                    encoded.append(0xD5 + ord(c) - 97)
-                else:
-                    encoded.append(0x50)
-            i += 1
-            if len(encoded) >= max_len - 1:
-                break
-
-        encoded.append(0xFF)
-        return bytes(encoded)
+        return _terminate(_encode_body(text), max_len)
 
+    def encode_many(self, texts: Iterable[str], max_len: int = 255) -> List[bytes]:
+        """
+        Encode a batch of strings with a single tokenize/charmap pass over
+        the joined text.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        if any(_BATCH_SEP in t for t in texts):
+            return [self.encode(t, max_len) for t in texts]
+        joined = _encode_body(_BATCH_SEP.join(texts), batch=True)
+        sep = bytes([_BATCH_SEP_BYTE])
+        return [_terminate(body, max_len) for body in joined.split(sep)]
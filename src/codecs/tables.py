@@ -14,6 +14,11 @@ for i in range(0xD5, 0xEF):
 for i in range(0xA1, 0xAB):
     GEN3_TABLE[i] = str(i - 0xA1)
 
+# Second byte of a 0xFC control code
+GEN3_FC_TABLE: Dict[int, str] = {
+    0x10: "{PLAYER}", 0x11: "{RIVAL}", 0x0C: "→"
+}
+
 REVERSE_TABLE: Dict[str, Union[int, List[int]]] = {v: k for k, v in GEN3_TABLE.items()}
 REVERSE_TABLE["\n"] = 0xFE
 REVERSE_TABLE["\f"] = 0xFB
@@ -2,16 +2,27 @@
 import os
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 import toml
 import json
 
+def _optional_path(value: Optional[str]) -> Optional[Path]:
+    return Path(value) if value else None
+
+def _optional_str(path: Optional[Path]) -> Optional[str]:
+    return str(path) if path is not None else None
+
 @dataclass
 class ExtractConfig:
     rom_path: Path
     output_path: Path
     start_offset: int
     end_offset: int
+    jobs: int = 1
+    mode: str = "scan"
+    cache: bool = True
+    output_format: str = "json"
+    store_path: Optional[Path] = None
 
 @dataclass
 class LlmConfig:
@@ -21,6 +32,15 @@ class LlmConfig:
     top_k: int = 50
     top_p: float = 0.92
     repeat_penalty: float = 1.1
+    prefix_cache: bool = True
+    prefix_state_path: Optional[Path] = None
+    workers: int = 1
+    grammar: bool = True
+    max_attempts: int = 3
+    api_url: Optional[str] = None
+    api_key: Optional[str] = None
+    api_model: Optional[str] = None
+    api_timeout: float = 60.0
 
 @dataclass
 class CharacterCard:
@@ -34,6 +54,35 @@ class CharacterCard:
 class IpcConfig:
     ipc_dir: Path
     ttl: int = 60
+    store_path: Optional[Path] = None
+    response_timeout: float = 15.0
+    deadline_margin: float = 1.0
+    backend: str = "file"
+    ring_path: Optional[Path] = None
+    ring_slots: int = 16
+    socket_path: Optional[Path] = None
+    socket_port: Optional[int] = None
+    pipeline_depth: int = 4
+
+@dataclass
+class CacheConfig:
+    enabled: bool = True
+    path: Optional[Path] = None
+    max_entries: int = 1024
+    ttl: float = 0.0
+    disk_max_entries: int = 0
+
+@dataclass
+class PregenConfig:
+    pack_path: Path = Path("data/dialog.pack")
+    workers: int = 1
+    checkpoint_path: Optional[Path] = None
+
+@dataclass
+class PrefetchConfig:
+    enabled: bool = True
+    depth: int = 2
+    max_pending: int = 64
 
 @dataclass
 class Settings:
@@ -42,16 +91,27 @@ class Settings:
     character: CharacterCard
     ipc: IpcConfig
     few_shot_examples: str = field(default_factory=str)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    pregen: PregenConfig = field(default_factory=PregenConfig)
+    prefetch: PrefetchConfig = field(default_factory=PrefetchConfig)
 
     @classmethod
     def from_toml(cls, path: Path) -> 'Settings':
         config = toml.load(path)
+        cache = config.get('cache', {})
+        pregen = config.get('pregen', {})
+        prefetch = config.get('prefetch', {})
         return cls(
             extract=ExtractConfig(
                 rom_path=Path(config['extract']['rom_path']),
                 output_path=Path(config['extract']['output_path']),
                 start_offset=config['extract']['start_offset'],
-                end_offset=config['extract']['end_offset']
+                end_offset=config['extract']['end_offset'],
+                jobs=config['extract'].get('jobs', 1),
+                mode=config['extract'].get('mode', "scan"),
+                cache=config['extract'].get('cache', True),
+                output_format=config['extract'].get('output_format', "json"),
+                store_path=_optional_path(config['extract'].get('store_path'))
             ),
             llm=LlmConfig(
                 model_path=Path(config['llm']['model_path']),
@@ -59,14 +119,49 @@ class Settings:
                 temperature=config['llm']['temperature'],
                 top_k=config['llm']['top_k'],
                 top_p=config['llm']['top_p'],
-                repeat_penalty=config['llm']['repeat_penalty']
+                repeat_penalty=config['llm']['repeat_penalty'],
+                prefix_cache=config['llm'].get('prefix_cache', True),
+                prefix_state_path=_optional_path(config['llm'].get('prefix_state_path')),
+                workers=config['llm'].get('workers', 1),
+                grammar=config['llm'].get('grammar', True),
+                max_attempts=config['llm'].get('max_attempts', 3),
+                api_url=config['llm'].get('api_url'),
+                api_key=config['llm'].get('api_key'),
+                api_model=config['llm'].get('api_model'),
+                api_timeout=config['llm'].get('api_timeout', 60.0)
             ),
             character=CharacterCard(**config['character']),
             ipc=IpcConfig(
                 ipc_dir=Path(config['ipc']['ipc_dir']),
-                ttl=config['ipc']['ttl']
+                ttl=config['ipc']['ttl'],
+                store_path=_optional_path(config['ipc'].get('store_path')),
+                response_timeout=config['ipc'].get('response_timeout', 15.0),
+                deadline_margin=config['ipc'].get('deadline_margin', 1.0),
+                backend=config['ipc'].get('backend', "file"),
+                ring_path=_optional_path(config['ipc'].get('ring_path')),
+                ring_slots=config['ipc'].get('ring_slots', 16),
+                socket_path=_optional_path(config['ipc'].get('socket_path')),
+                socket_port=config['ipc'].get('socket_port'),
+                pipeline_depth=config['ipc'].get('pipeline_depth', 4)
+            ),
+            few_shot_examples=config['prompt']['few_shot_examples'],
+            cache=CacheConfig(
+                enabled=cache.get('enabled', True),
+                path=_optional_path(cache.get('path')),
+                max_entries=cache.get('max_entries', 1024),
+                ttl=cache.get('ttl', 0.0),
+                disk_max_entries=cache.get('disk_max_entries', 0)
             ),
-            few_shot_examples=config['prompt']['few_shot_examples']
+            pregen=PregenConfig(
+                pack_path=Path(pregen.get('pack_path', "data/dialog.pack")),
+                workers=pregen.get('workers', 1),
+                checkpoint_path=_optional_path(pregen.get('checkpoint_path'))
+            ),
+            prefetch=PrefetchConfig(
+                enabled=prefetch.get('enabled', True),
+                depth=prefetch.get('depth', 2),
+                max_pending=prefetch.get('max_pending', 64)
+            )
         )
 
     @classmethod
@@ -77,6 +172,10 @@ class Settings:
             settings.extract.output_path = Path(os.environ['OUTPUT_PATH'])
         if 'MODEL_PATH' in os.environ:
             settings.llm.model_path = Path(os.environ['MODEL_PATH'])
+        if 'LLM_API_URL' in os.environ:
+            settings.llm.api_url = os.environ['LLM_API_URL']
+        if 'LLM_API_KEY' in os.environ:
+            settings.llm.api_key = os.environ['LLM_API_KEY']
         if 'IPC_DIR' in os.environ:
             settings.ipc.ipc_dir = Path(os.environ['IPC_DIR'])
         return settings
@@ -88,7 +187,12 @@ class Settings:
                     'rom_path': str(self.extract.rom_path),
                     'output_path': str(self.extract.output_path),
                     'start_offset': self.extract.start_offset,
-                    'end_offset': self.extract.end_offset
+                    'end_offset': self.extract.end_offset,
+                    'jobs': self.extract.jobs,
+                    'mode': self.extract.mode,
+                    'cache': self.extract.cache,
+                    'output_format': self.extract.output_format,
+                    'store_path': _optional_str(self.extract.store_path)
                 },
                 'llm': {
                     'model_path': str(self.llm.model_path),
@@ -96,7 +200,15 @@ class Settings:
                     'temperature': self.llm.temperature,
                     'top_k': self.llm.top_k,
                     'top_p': self.llm.top_p,
-                    'repeat_penalty': self.llm.repeat_penalty
+                    'repeat_penalty': self.llm.repeat_penalty,
+                    'prefix_cache': self.llm.prefix_cache,
+                    'prefix_state_path': _optional_str(self.llm.prefix_state_path),
+                    'workers': self.llm.workers,
+                    'grammar': self.llm.grammar,
+                    'max_attempts': self.llm.max_attempts,
+                    'api_url': self.llm.api_url,
+                    'api_model': self.llm.api_model,
+                    'api_timeout': self.llm.api_timeout
                 },
                 'character': {
                     'name': self.character.name,
@@ -107,9 +219,35 @@ class Settings:
                 },
                 'ipc': {
                     'ipc_dir': str(self.ipc.ipc_dir),
-                    'ttl': self.ipc.ttl
+                    'ttl': self.ipc.ttl,
+                    'store_path': _optional_str(self.ipc.store_path),
+                    'response_timeout': self.ipc.response_timeout,
+                    'deadline_margin': self.ipc.deadline_margin,
+                    'backend': self.ipc.backend,
+                    'ring_path': _optional_str(self.ipc.ring_path),
+                    'ring_slots': self.ipc.ring_slots,
+                    'socket_path': _optional_str(self.ipc.socket_path),
+                    'socket_port': self.ipc.socket_port,
+                    'pipeline_depth': self.ipc.pipeline_depth
+                },
+                'few_shot_examples': self.few_shot_examples,
+                'cache': {
+                    'enabled': self.cache.enabled,
+                    'path': _optional_str(self.cache.path),
+                    'max_entries': self.cache.max_entries,
+                    'ttl': self.cache.ttl,
+                    'disk_max_entries': self.cache.disk_max_entries
+                },
+                'pregen': {
+                    'pack_path': str(self.pregen.pack_path),
+                    'workers': self.pregen.workers,
+                    'checkpoint_path': _optional_str(self.pregen.checkpoint_path)
                 },
-                'few_shot_examples': self.few_shot_examples
+                'prefetch': {
+                    'enabled': self.prefetch.enabled,
+                    'depth': self.prefetch.depth,
+                    'max_pending': self.prefetch.max_pending
+                }
             }, f, indent=2)
 
 def load_settings(config_path: Path) -> Settings:
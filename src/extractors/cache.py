@@ -0,0 +1,151 @@
+"""
+Persistent extraction cache.
+
+Segments are stored in SQLite keyed by ROM SHA-1, codec version and the
+scan position they were reached from. A scan from any offset is a chain
+of such steps (position -> segment -> next position), and the chain only
+depends on the ROM bytes, so cached steps can answer any offset range.
+Ranges that were scanned before are replayed without touching the ROM;
+new ranges are scanned until they rejoin a cached chain. A step with an
+empty segment records a dead end: no segment starts before `offset`.
+"""
+import hashlib
+import logging
+import sqlite3
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+
+from src.extractors.dialog import Segment
+from src.loaders.base import ByteSource
+
+# Scan function: yields the segments of a full scan of [start, end)
+ScanFn = Callable[[int, int], Iterator[Segment]]
+
+_HASH_CHUNK = 1 << 20
+# Rows read or written per SQLite round trip
+PAGE_SIZE = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    rom_sha1 TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    raw BLOB NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (rom_sha1, codec, pos)
+)
+"""
+
+
+def rom_digest(source: ByteSource) -> str:
+    sha1 = hashlib.sha1()
+    size = source.size()
+    for offset in range(0, size, _HASH_CHUNK):
+        sha1.update(source.read(offset, min(_HASH_CHUNK, size - offset)))
+    return sha1.hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, path: Path, rom_sha1: str, codec_version: str) -> None:
+        self.path = path
+        self.rom_sha1 = rom_sha1
+        self.codec_version = codec_version
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(str(path))
+        self._db.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def is_cold(self) -> bool:
+        """ True when nothing is cached yet for this ROM and codec. """
+        row = self._db.execute(
+            "SELECT 1 FROM segments WHERE rom_sha1 = ? AND codec = ? LIMIT 1",
+            (self.rom_sha1, self.codec_version),
+        ).fetchone()
+        return row is None
+
+    def _page(self, pos: int) -> List[Tuple[int, int, bytes, str]]:
+        return self._db.execute(
+            "SELECT pos, offset, raw, text FROM segments"
+            " WHERE rom_sha1 = ? AND codec = ? AND pos >= ?"
+            " ORDER BY pos LIMIT ?",
+            (self.rom_sha1, self.codec_version, pos, PAGE_SIZE),
+        ).fetchall()
+
+    def _store(self, steps: List[Tuple[int, int, bytes, str]]) -> None:
+        if not steps:
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.rom_sha1, self.codec_version, pos, offset, raw, text)
+                 for pos, offset, raw, text in steps],
+            )
+
+    def iter_segments(self, start: int, end: int, scan: ScanFn) -> Iterator[Segment]:
+        """
+        Yield the segments of [start, end) like a full scan would, serving
+        cached steps and calling `scan` only for the gaps.
+
+        Scan positions only grow, so cached steps are merge-joined from
+        pages read in position order and new steps are written in batches:
+        memory stays bounded whatever the range size.
+        """
+        page: Deque[Tuple[int, int, bytes, str]] = deque()
+        exhausted = False
+
+        def lookup(at: int) -> Optional[Tuple[int, bytes, str]]:
+            nonlocal exhausted
+            while True:
+                while page and page[0][0] < at:
+                    page.popleft()
+                if page or exhausted:
+                    break
+                page.extend(self._page(at))
+                exhausted = not page
+            if page and page[0][0] == at:
+                return page[0][1:]
+            return None
+
+        new_steps: List[Tuple[int, int, bytes, str]] = []
+        pos = start
+        try:
+            while pos < end:
+                step = lookup(pos)
+                if step is not None:
+                    offset, raw, text = step
+                    if offset >= end:
+                        break
+                    if raw:
+                        self.hits += 1
+                        yield offset, raw, text
+                        pos = offset + len(raw)
+                        continue
+                # Scan from here until the chain rejoins a cached position
+                for offset, view, text in scan(pos, end):
+                    raw = bytes(view)
+                    new_steps.append((pos, offset, raw, text))
+                    if len(new_steps) >= PAGE_SIZE:
+                        self._store(new_steps)
+                        new_steps = []
+                    self.misses += 1
+                    yield offset, raw, text
+                    pos = offset + len(raw)
+                    if lookup(pos) is not None:
+                        break
+                else:
+                    # Remember the dead end: no segment starts in [pos, end)
+                    new_steps.append((pos, end, b"", ""))
+                    break
+        finally:
+            self._store(new_steps)
+
+    def log_stats(self) -> None:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        logging.info("Extraction cache %s: %d hits, %d misses (%.0f%% hit)",
+                     self.path, self.hits, self.misses, ratio * 100)
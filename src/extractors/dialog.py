@@ -1,5 +1,18 @@
+import re
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
 from src.loaders.base import ByteSource
 from src.codecs.base import TextCodec
+from src.utils.buffer import BytesLike
+
+# Longest segment the scanner looks at before giving up on a start offset
+MAX_SEGMENT_LEN = 255
+# Segments decoded per decode_many call while streaming
+DECODE_BATCH = 1024
+_TERMINATOR_RE = re.compile(b"[\xfb\xff]")
+
+# (offset, raw bytes incl. terminator, stripped text)
+Segment = Tuple[int, BytesLike, str]
 
 class DialogExtractor:
     def __init__(
@@ -14,23 +27,115 @@ class DialogExtractor:
         self.start = start
         self.end = end
 
+    def iter_raw_segments(self) -> Iterator[Tuple[int, BytesLike]]:
+        """
+        Yield (offset, segment) for every terminated segment starting in
+        [start, end), the segment including its 0xFB/0xFF terminator.
 
-    def extract(self) -> dict[str, str]:
-        result: dict[str, str] = {}
-        offset = self.start
-        terminators = {0xFB, 0xFF}
-
-        while offset < self.end:
-            chunk = self.source.read(offset, 255)
-            try:
-                idx = next(i for i, b in enumerate(chunk) if b in terminators)
-            except StopIteration:
-                offset += 1
+        The window is read once and terminators are located in a single
+        regex pass. A segment may run up to MAX_SEGMENT_LEN - 1 bytes past
+        `end`; when no terminator lies within MAX_SEGMENT_LEN bytes of the
+        current offset, the scan slides forward until one does.
+        """
+        limit = self.end - self.start
+        if limit <= 0:
+            return
+        size = min(limit + MAX_SEGMENT_LEN - 1, self.source.size() - self.start)
+        window = self.source.read(self.start, size)
+        pos = 0
+        for match in _TERMINATOR_RE.finditer(window):
+            term = match.start()
+            if term - pos >= MAX_SEGMENT_LEN:
+                pos = term - MAX_SEGMENT_LEN + 1
+            if pos >= limit:
+                break
+            yield self.start + pos, window[pos: term + 1]
+            pos = term + 1
+
+    def split_range(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Split [start, end) into at most `count` contiguous shards.
+
+        Every inner boundary sits right after a terminator, where a full scan
+        would start a new segment anyway, so extracting each shard on its own
+        and merging the results in order gives exactly the full-scan output.
+        """
+        if count <= 1 or self.end - self.start <= MAX_SEGMENT_LEN:
+            return [(self.start, self.end)]
+        window = self.source.read(self.start, self.end - self.start)
+        step = -(-len(window) // count)
+        bounds = [0]
+        for nominal in range(step, len(window), step):
+            if nominal <= bounds[-1]:
                 continue
-            segment = chunk[: idx + 1]
-            text = self.codec.decode(segment).strip()
-            if text:
-                result[segment.hex()] = text
-            offset += idx + 1
+            match = _TERMINATOR_RE.search(window, nominal)
+            if match is None:
+                break
+            bounds.append(match.start() + 1)
+        if bounds[-1] >= len(window):
+            bounds.pop()
+        bounds.append(len(window))
+        offsets = [self.start + b for b in bounds]
+        return list(zip(offsets, offsets[1:]))
+
+    def iter_segments(self) -> Iterator[Segment]:
+        """
+        Yield (offset, raw, text) for every segment, empty ones included,
+        decoding in batches of DECODE_BATCH.
+        """
+        return decode_batched(self.codec, self.iter_raw_segments())
+
+    def extract(self) -> dict[str, str]:
+        return segments_to_map(self.iter_segments())
+
+
+def decode_batched(
+    codec: TextCodec,
+    raw_segments: Iterable[Tuple[int, BytesLike]],
+    batch_size: int = DECODE_BATCH,
+) -> Iterator[Segment]:
+    """ Decode (offset, raw) pairs into (offset, raw, text), `batch_size` per decode_many call. """
+    raw_segments = iter(raw_segments)
+    while True:
+        batch = list(islice(raw_segments, batch_size))
+        if not batch:
+            return
+        texts = codec.decode_many(raw for _, raw in batch)
+        for (offset, raw), text in zip(batch, texts):
+            yield offset, raw, text.strip()
+
+
+def segments_to_map(segments: Iterable[Segment]) -> dict[str, str]:
+    """ Build the legacy {raw hex: text} map, skipping empty strings. """
+    result: dict[str, str] = {}
+    for _, raw, text in segments:
+        if text:
+            result[raw.hex()] = text
+    return result
+
+
+def join_paragraphs(segments: Iterable[Segment]) -> Iterator[Segment]:
+    """
+    Merge runs of contiguous 0xFB-terminated segments into whole
+    0xFF-terminated lines, the way the game fills the dialog buffer.
+    Paragraph texts are joined with the form feed 0xFB decodes to.
+    """
+    pending: List[Segment] = []
+    for segment in segments:
+        offset, raw, _ = segment
+        if pending and pending[-1][0] + len(pending[-1][1]) != offset:
+            yield _merge(pending)
+            pending = []
+        pending.append(segment)
+        if raw[-1] != 0xFB:
+            yield _merge(pending)
+            pending = []
+    if pending:
+        yield _merge(pending)
+
 
-        return result
+def _merge(segments: List[Segment]) -> Segment:
+    if len(segments) == 1:
+        return segments[0]
+    return (segments[0][0], b"".join(raw for _, raw, _ in segments),
+            "\f".join(text for _, _, text in segments))
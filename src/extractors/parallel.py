@@ -0,0 +1,73 @@
+"""
+Sharded dialog extraction over a process pool.
+
+The range is cut into terminator-aligned shards (see
+DialogExtractor.split_range). Each worker maps the ROM once with
+MmapRomLoader, so all workers share the same page cache, and the
+per-shard records are merged back in shard order.
+"""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Iterator, List, Optional, Tuple
+
+from src.codecs.base import TextCodec
+from src.extractors.dialog import DialogExtractor, Segment, segments_to_map
+from src.loaders.mmap_loader import MmapRomLoader
+
+# Shards per worker; more shards than workers evens out dense text areas
+SHARDS_PER_JOB = 4
+
+_worker_loader: Optional[MmapRomLoader] = None
+_worker_codec: Optional[TextCodec] = None
+
+
+def _init_worker(rom_path: str, codec: TextCodec) -> None:
+    global _worker_loader, _worker_codec
+    _worker_loader = MmapRomLoader(rom_path)
+    _worker_codec = codec
+
+
+def _extract_shard(bounds: Tuple[int, int]) -> List[Tuple[int, bytes, str]]:
+    assert _worker_loader is not None and _worker_codec is not None
+    start, end = bounds
+    extractor = DialogExtractor(_worker_loader, _worker_codec, start, end)
+    # memoryviews of the map cannot cross the process boundary
+    return [(offset, bytes(raw), text) for offset, raw, text in extractor.iter_segments()]
+
+
+def iter_segments_parallel(
+    rom_path: str,
+    codec: TextCodec,
+    start: int,
+    end: int,
+    jobs: int,
+) -> Iterator[Segment]:
+    """ Same records as DialogExtractor.iter_segments, shards run in parallel. """
+    with MmapRomLoader(rom_path) as loader:
+        shards = DialogExtractor(loader, codec, start, end).split_range(
+            jobs * SHARDS_PER_JOB)
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(rom_path, codec)) as pool:
+        # Results are consumed in submission order, which keeps the merge
+        # deterministic; only a few shards are in flight to bound memory.
+        pending: Deque["Future[List[Tuple[int, bytes, str]]]"] = deque()
+        queue = iter(shards)
+        for shard in islice(queue, jobs * 2):
+            pending.append(pool.submit(_extract_shard, shard))
+        while pending:
+            segments = pending.popleft().result()
+            for shard in islice(queue, 1):
+                pending.append(pool.submit(_extract_shard, shard))
+            yield from segments
+
+
+def extract_parallel(
+    rom_path: str,
+    codec: TextCodec,
+    start: int,
+    end: int,
+    jobs: int,
+) -> dict[str, str]:
+    return segments_to_map(iter_segments_parallel(rom_path, codec, start, end, jobs))
@@ -0,0 +1,76 @@
+import numpy as np
+from typing import Iterator, Optional, Tuple
+from src.loaders.base import ByteSource
+from src.codecs.base import TextCodec
+from src.extractors.dialog import Segment, decode_batched, segments_to_map
+from src.utils.buffer import BytesLike
+
+GBA_ROM_BASE = 0x08000000
+# Longest string followed from a pointer before it is treated as bogus
+MAX_STRING_LEN = 1024
+
+class PointerTextExtractor:
+    """
+    Find text through the pointers that reference it.
+
+    The whole ROM is viewed as little-endian uint32 words and every aligned
+    word pointing into [start, end) is a candidate. Targets that do not look
+    like a string start (previous byte is not 0xFF) are dropped, and only
+    the remaining strings are decoded, up to their 0xFF terminator.
+    """
+
+    def __init__(
+        self,
+        source: ByteSource,
+        codec: TextCodec,
+        start: int,
+        end: int,
+        base_address: int = GBA_ROM_BASE,
+    ):
+        self.source = source
+        self.codec = codec
+        self.start = start
+        self.end = end
+        self.base_address = base_address
+
+    def build_index(self) -> dict[int, list[int]]:
+        """ Map each string offset to the ROM offsets of the pointers to it. """
+        size = self.source.size()
+        words = self.source.read_u32_array(0, size // 4)
+        lo = self.base_address + self.start
+        hi = self.base_address + min(self.end, size)
+        hits = np.flatnonzero((words >= lo) & (words < hi))
+        targets = words[hits].astype(np.int64) - self.base_address
+
+        rom = np.frombuffer(self.source.read(0, size), dtype=np.uint8)
+        prev = rom[np.maximum(targets - 1, 0)]
+        keep = (targets == self.start) | (prev == 0xFF)
+        hits, targets = hits[keep], targets[keep]
+
+        order = np.argsort(targets, kind="stable")
+        index: dict[int, list[int]] = {}
+        for target, word in zip(targets[order].tolist(), hits[order].tolist()):
+            index.setdefault(target, []).append(word * 4)
+        return index
+
+    def iter_strings(self, index: dict[int, list[int]]) -> Iterator[Tuple[int, BytesLike]]:
+        """ Yield (offset, raw string incl. 0xFF) for every indexed target. """
+        size = self.source.size()
+        region_end = min(self.end + MAX_STRING_LEN, size)
+        region = self.source.read(self.start, region_end - self.start)
+        terms = np.flatnonzero(np.frombuffer(region, dtype=np.uint8) == 0xFF)
+        offsets = np.array(sorted(index), dtype=np.int64) - self.start
+        ends = np.searchsorted(terms, offsets)
+        for offset, i in zip(offsets.tolist(), ends.tolist()):
+            if i == len(terms) or terms[i] - offset >= MAX_STRING_LEN:
+                continue
+            yield self.start + offset, region[offset: int(terms[i]) + 1]
+
+    def iter_segments(self, index: dict[int, list[int]]) -> Iterator[Segment]:
+        """ Yield (offset, raw, text) records in ROM order, decoded in batches. """
+        return decode_batched(self.codec, self.iter_strings(index))
+
+    def extract(self, index: Optional[dict[int, list[int]]] = None) -> dict[str, str]:
+        if index is None:
+            index = self.build_index()
+        return segments_to_map(self.iter_segments(index))
@@ -1,6 +1,11 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, Tuple, List
 
+# Polling delays of the default wait_for_request, doubled while idle
+POLL_MIN_DELAY = 0.002
+POLL_MAX_DELAY = 0.05
+
 """
 IPC backend interface.
 
@@ -9,6 +14,13 @@ A backend implements basic operations the service will call.
 class IpcBackend(ABC):
     """Abstract interface for IPC Backend"""
 
+    # bounds of the default wait_for_request backoff; cheap polls can start lower
+    poll_min_delay = POLL_MIN_DELAY
+    poll_max_delay = POLL_MAX_DELAY
+
+    def __init__(self) -> None:
+        self._poll_delay = self.poll_min_delay
+
     @abstractmethod
     def init(self) -> None:
         """ Prepare the backend """
@@ -24,6 +36,28 @@ class IpcBackend(ABC):
         """
         raise NotImplementedError
 
+    def wait_for_request(self, timeout: float) -> Optional[Tuple[str, bytes]]:
+        """ Block until a request is read, at most `timeout` seconds.
+
+        Returns:
+            Tuple (req_id, payload) or None on timeout
+
+        The default implementation polls `read_request`, backing off from
+        `poll_min_delay` to `poll_max_delay` while nothing arrives, and back
+        to `poll_min_delay` once a request does (dialog comes in bursts).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            req = self.read_request()
+            remaining = deadline - time.monotonic()
+            if req is not None:
+                self._poll_delay = self.poll_min_delay
+                return req
+            if remaining <= 0:
+                return None
+            time.sleep(min(self._poll_delay, remaining))
+            self._poll_delay = min(self._poll_delay * 2, self.poll_max_delay)
+
     @abstractmethod
     def write_response(self, req_id: str, data: bytes) -> None:
         """ Atomically write a response for the provided request id, """
@@ -34,3 +68,6 @@ class IpcBackend(ABC):
         """ Return list of request ids for which response files exist. """
         raise NotImplementedError
 
+    def close(self) -> None:
+        """ Release what `init` acquired. The default does nothing. """
+
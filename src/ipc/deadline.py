@@ -0,0 +1,43 @@
+"""
+Response deadlines of IPC requests.
+
+lua/hook.lua waits RESPONSE_TIMEOUT seconds for a response, then shows
+the original text and never reads the response. Its request ids start
+with the os.time() second the request was written, which dates the
+request better than its arrival here; ids without it are dated on
+arrival.
+"""
+import logging
+import time
+
+
+def request_deadline(req_id: str, timeout: float) -> float:
+    """ time.monotonic() past which the emulator stops waiting for `req_id`. """
+    now = time.monotonic()
+    deadline = now + timeout
+    stamp, sep, _ = req_id.partition("_")
+    if sep and stamp.isdigit():
+        deadline = min(deadline, now + int(stamp) + timeout - time.time())
+    return deadline
+
+
+class DeadlineStats:
+    """ Responses written in time vs dropped because the emulator gave up. """
+
+    def __init__(self) -> None:
+        self.met = 0
+        self.missed = 0
+
+    def record(self, deadline: float) -> bool:
+        """ Count a finished response; True if it is still worth writing. """
+        if time.monotonic() < deadline:
+            self.met += 1
+            return True
+        self.missed += 1
+        return False
+
+    def log_stats(self) -> None:
+        total = self.met + self.missed
+        ratio = self.met / total if total else 0.0
+        logging.info("Deadlines: %d met, %d missed (%.0f%% in time)",
+                     self.met, self.missed, ratio * 100)
@@ -4,8 +4,9 @@ import logging
 import os
 import time
 import uuid
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
 from .base import IpcBackend
+from .inotify import DirWatcher, open_watcher
 from src.config.settings import Settings
 
 # should maybe externalize that in settings
@@ -13,20 +14,107 @@ IPC_IN_PREFIX = "ipc_in_"
 IPC_OUT_PREFIX = "ipc_out_"
 IPC_SUFFIX = ".bin"
 
+# Seconds between two stale file sweeps of ipc_dir
+CLEANUP_INTERVAL = 5.0
+
+def _is_request(name: str) -> bool:
+    return name.startswith(IPC_IN_PREFIX) and name.endswith(IPC_SUFFIX)
+
+def _request_id(name: str) -> str:
+    return name[len(IPC_IN_PREFIX):-len(IPC_SUFFIX)]
+
 class FileIpcBackend(IpcBackend):
-    """ A file-backed IPC backend. """
+    """
+    A file-backed IPC backend.
+
+    Pending requests are tracked in memory (id -> mtime). They are found
+    by a single `os.scandir` pass that only stats request files, or, when
+    inotify is available, from its events without scanning at all. Stale
+    files are swept every CLEANUP_INTERVAL seconds, in the same pass.
+    """
     def __init__(self, settings: Settings) -> None:
+        super().__init__()
         self.settings = settings.ipc
+        self._watcher: Optional[DirWatcher] = None
+        self._known: Dict[str, float] = {}
+        self._scan_needed = True
+        self._next_cleanup = 0.0
 
     def init(self) -> None:
-        """ Create directory and clean stale files. """
+        """ Create directory, watch for requests and clean stale files. """
         self.settings.ipc_dir.mkdir(parents=True, exist_ok=True)
         try:
             self.settings.ipc_dir.chmod(0o700)
         except PermissionError:
             logging.info("Unable to chmod ipc_dir %s", self.settings.ipc_dir,
                          exc_info=True)
-        self._cleanup_stale()
+        # watch first: nothing renamed in during the scan is missed
+        if self._watcher is None:
+            self._watcher = open_watcher(self.settings.ipc_dir)
+        self._scan(cleanup=True)
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        self._scan_needed = True
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.settings.ttl > 0 and now - mtime > self.settings.ttl
+
+    def _remove_stale(self, path: str) -> None:
+        try:
+            os.unlink(path)
+            logging.info("Removed stale IPC file: %s", path)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logging.error("Error: failed to remove stale file %s", path, exc_info=True)
+
+    def _scan(self, cleanup: bool) -> None:
+        """
+        Rebuild the known requests in one scandir pass. Only request files
+        are stat'ed, unless `cleanup` also sweeps every stale file.
+        """
+        now = time.time()
+        known: Dict[str, float] = {}
+        with os.scandir(self.settings.ipc_dir) as entries:
+            for entry in entries:
+                request = _is_request(entry.name)
+                if not (request or cleanup):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if cleanup and self._expired(mtime, now):
+                    self._remove_stale(entry.path)
+                elif request:
+                    known[_request_id(entry.name)] = mtime
+        self._known = known
+        self._scan_needed = self._watcher is None
+        if cleanup:
+            self._next_cleanup = time.monotonic() + CLEANUP_INTERVAL
+
+    def _drain(self, timeout: float) -> None:
+        """ Record the requests announced by inotify, waiting up to `timeout`. """
+        assert self._watcher is not None
+        names = self._watcher.wait(timeout)
+        if names is None:
+            return
+        if not names:
+            # the event queue overflowed
+            self._scan_needed = True
+        for name in names:
+            if not _is_request(name):
+                continue
+            try:
+                mtime = os.stat(self.settings.ipc_dir / name).st_mtime
+            except FileNotFoundError:
+                continue  # already consumed
+            self._known[_request_id(name)] = mtime
 
     def read_request(self) -> Optional[Tuple[str, bytes]]:
         """
@@ -34,23 +122,29 @@ class FileIpcBackend(IpcBackend):
 
         Read the file, then attempt to remove it so the request is consumed.
         """
-        self._cleanup_stale()
-        candidates = [
-            p for p in self.settings.ipc_dir.iterdir()
-            if p.is_file() and p.name.startswith(IPC_IN_PREFIX) and
-                p.name.endswith(IPC_SUFFIX)
-        ]
-        if not candidates:
-            return None
-
-        candidates.sort(key=lambda p: p.stat().st_mtime)
-        for path in candidates:
-            req_id = path.name[len(IPC_IN_PREFIX): -len(IPC_SUFFIX)]
+        if self._watcher is not None:
+            self._drain(0)
+        if time.monotonic() >= self._next_cleanup:
+            self._scan(cleanup=True)
+        elif self._scan_needed:
+            self._scan(cleanup=False)
+
+        now = time.time()
+        while self._known:
+            req_id = min(self._known, key=self._known.__getitem__)
+            mtime = self._known.pop(req_id)
+            path = self.settings.ipc_dir / f"{IPC_IN_PREFIX}{req_id}{IPC_SUFFIX}"
+            if self._expired(mtime, now):
+                self._remove_stale(str(path))
+                continue
             try:
                 with open(path, "rb") as f:
                     payload = f.read()
-            except (FileNotFoundError, PermissionError, OSError) as exc:
+            except FileNotFoundError:
+                continue
+            except (PermissionError, OSError) as exc:
                 logging.error("Error: could not read request %s: %s", path, exc)
+                self._scan_needed = True
                 continue
             # remove requested file after readed
             try:
@@ -63,6 +157,21 @@ class FileIpcBackend(IpcBackend):
             return req_id, payload
         return None
 
+    def wait_for_request(self, timeout: float) -> Optional[Tuple[str, bytes]]:
+        """
+        Sleep on inotify until a request file is renamed (or written) into
+        ipc_dir, as lua/hook.lua does; poll where inotify is unavailable.
+        """
+        if self._watcher is None:
+            return super().wait_for_request(timeout)
+        deadline = time.monotonic() + timeout
+        while True:
+            req = self.read_request()
+            remaining = deadline - time.monotonic()
+            if req is not None or remaining <= 0:
+                return req
+            self._drain(remaining)
+
     def write_response(self, req_id: str, data: bytes) -> None:
         tmp_name = f"{IPC_OUT_PREFIX}{req_id}.tmp.{uuid.uuid4().hex}"
         tmp_path = self.settings.ipc_dir / tmp_name
@@ -92,6 +201,8 @@ class FileIpcBackend(IpcBackend):
             # CHMOD final file to 0o600
             try:
                 final_path.chmod(0o600)
+            except FileNotFoundError:
+                pass  # already read and removed by the emulator
             except PermissionError:
                 logging.error("Error: cannot chmod response file %s", final_path, exc_info=True)
         finally:
@@ -109,38 +220,15 @@ class FileIpcBackend(IpcBackend):
 
     def list_pending(self) -> List[str]:
         """ Return list of req_ids which have response file present """
-        self._cleanup_stale()
         ids: List[str] = []
-        for p in self.settings.ipc_dir.iterdir():
-            if not p.is_file():
-                continue
-            if p.name.startswith(IPC_OUT_PREFIX) and p.name.endswith(IPC_SUFFIX):
-                req_id = p.name[len(IPC_OUT_PREFIX):-len(IPC_SUFFIX)]
-                ids.append(req_id)
-            return ids
+        with os.scandir(self.settings.ipc_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(IPC_OUT_PREFIX) and name.endswith(IPC_SUFFIX) \
+                        and entry.is_file():
+                    ids.append(name[len(IPC_OUT_PREFIX):-len(IPC_SUFFIX)])
         return ids
 
-    def _cleanup_stale(self) -> None:
-        """ Remove files older than TTL (TTL > 0) """
-        if self.settings.ttl <= 0:
-            return
-        now = time.time()
-        for p in list(self.settings.ipc_dir.iterdir()):
-            if not p.is_file():
-                continue
-            try:
-                mtime = p.stat().st_mtime
-            except OSError:
-                # Should log error ?
-                continue
-            if (now - mtime) > self.settings.ttl:
-                try:
-                    p.unlink()
-                    logging.info("Removed stale IPC file: %s", p)
-                except Exception:
-                    logging.error("Error: failed to remove stale file %s", p,
-                                  exc_info=True)
-
     @staticmethod
     def gen_req_id() -> str:
         req_id = uuid.uuid4().hex
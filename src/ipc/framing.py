@@ -0,0 +1,38 @@
+"""
+Framing of the socket IPC protocol.
+
+Every message, either way, is one frame:
+
+    u8 id_len, u8 flags, u16 payload_len (little-endian)
+    req_id   id_len bytes, UTF-8
+    payload  payload_len bytes
+
+The emulator sends requests (flags 0) with ids of its choosing, unique
+across connections and led by "<epoch seconds>_" like the file
+backend's, so the request deadline is known. The response to a request
+comes back on the same connection with the same id and FLAG_RESPONSE
+set. Responses are pushed as soon as they are ready, not necessarily in
+request order.
+"""
+from struct import Struct
+from typing import Tuple
+
+FLAG_RESPONSE = 0x01
+
+HEADER = Struct("<BBH")
+MAX_ID_LEN = 0xFF
+MAX_PAYLOAD_LEN = 0xFFFF
+
+
+def encode_frame(req_id: str, flags: int, payload: bytes) -> bytes:
+    raw_id = req_id.encode("utf-8")
+    if len(raw_id) > MAX_ID_LEN:
+        raise ValueError(f"Request id too long: {len(raw_id)} bytes")
+    if len(payload) > MAX_PAYLOAD_LEN:
+        raise ValueError(f"Payload too long: {len(payload)} bytes")
+    return HEADER.pack(len(raw_id), flags, len(payload)) + raw_id + payload
+
+
+def decode_body(id_len: int, body: bytes) -> Tuple[str, bytes]:
+    """ Split the bytes following a header into (req_id, payload). """
+    return body[:id_len].decode("utf-8"), body[id_len:]
@@ -0,0 +1,86 @@
+"""
+Minimal Linux inotify binding (ctypes, no dependency).
+
+Only what the file IPC backend needs: watch one directory and block
+until a file is moved or written into it, with a timeout.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+from pathlib import Path
+from typing import List, Optional
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+_EVENT = struct.Struct("iIII")
+
+
+class DirWatcher:
+    """ inotify watch on `path` for files moved (or written) into it. """
+
+    def __init__(self, path: Path, mask: int = IN_MOVED_TO | IN_CLOSE_WRITE) -> None:
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, os.strerror(errno), str(path))
+        self.fd = fd
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def wait(self, timeout: Optional[float]) -> Optional[List[str]]:
+        """
+        Block until events arrive, at most `timeout` seconds. Returns the
+        names they concern (drained at once), or None on timeout. An
+        empty list means the kernel queue overflowed and names were lost.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        names: List[str] = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, pos)
+                pos += _EVENT.size
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                name = data[pos:pos + length].rstrip(b"\0")
+                pos += length
+                if name:
+                    names.append(os.fsdecode(name))
+        return [] if overflow else names
+
+
+def open_watcher(path: Path) -> Optional[DirWatcher]:
+    """ A DirWatcher on `path`, or None where inotify is unavailable. """
+    try:
+        return DirWatcher(path)
+    except (OSError, AttributeError):
+        logging.info("inotify unavailable for %s, polling instead", path, exc_info=True)
+        return None
@@ -0,0 +1,143 @@
+"""
+Shared-memory ring buffer layout of the ring IPC backend.
+
+One preallocated file, mmapped by both sides, replaces the request and
+response files:
+
+    header (64 bytes)
+        magic b"FRRB", u16 version, u16 slots (a power of two),
+        u32 req_head   requests published (emulator)
+        u32 req_tail   requests consumed (Python)
+        u32 resp_head  responses published (Python)
+        u32 resp_tail  responses consumed (emulator)
+    request ring:  `slots` slots of SLOT_SIZE bytes
+    response ring: `slots` slots of SLOT_SIZE bytes
+
+Message n of a ring lives in slot n % slots as u32 seq, u32 id, u16
+length, then up to 255 payload bytes. The producer writes id, length
+and payload, then sets seq to n + 1 last: a reader waiting for message
+n polls that seq, so no file is created per message. Counters and
+sequence numbers are little-endian u32 and wrap around. A producer never
+runs more than `slots` messages ahead of the consumer's tail.
+
+Every field is a single aligned store, and readers check seq again after
+copying a slot, so a slot caught mid-write is read on the next poll.
+"""
+import mmap
+import os
+from pathlib import Path
+from struct import Struct
+from typing import Optional, Tuple
+
+MAGIC = b"FRRB"
+VERSION = 1
+MAX_PAYLOAD = 255
+HEADER_SIZE = 64
+SLOT_SIZE = 272
+MASK = 0xFFFFFFFF
+
+REQUESTS = 0
+RESPONSES = 1
+
+# Header counter offsets
+REQ_HEAD = 8
+REQ_TAIL = 12
+RESP_HEAD = 16
+RESP_TAIL = 20
+
+_HEADER = Struct("<4sHH")
+_U32 = Struct("<I")
+_SLOT = Struct("<IIH")
+
+
+def ring_file_size(slots: int) -> int:
+    return HEADER_SIZE + 2 * slots * SLOT_SIZE
+
+
+class RingFile:
+    """ A mapped ring file; `open` for the emulator side, `create` for the server. """
+
+    def __init__(self, path: Path, fd: int) -> None:
+        self.path = path
+        self._fd = fd
+        self._map = mmap.mmap(fd, 0)
+        magic, version, slots = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} IPC ring")
+        if slots == 0 or slots & (slots - 1) or len(self._map) < ring_file_size(slots):
+            self.close()
+            raise ValueError(f"{path} has an invalid ring geometry")
+        self.slots: int = slots
+
+    @classmethod
+    def open(cls, path: Path) -> "RingFile":
+        return cls(path, os.open(path, os.O_RDWR))
+
+    @classmethod
+    def create(cls, path: Path, slots: int) -> "RingFile":
+        """
+        Map the ring at `path`, keeping its state if it already has this
+        geometry (the emulator may be attached), else starting a new one.
+        """
+        # a power of two keeps n % slots continuous when counters wrap
+        if not 0 < slots <= 0x8000 or slots & (slots - 1):
+            raise ValueError(f"Ring slot count must be a power of two, got {slots}")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            size = os.fstat(fd).st_size
+            if header != _HEADER.pack(MAGIC, VERSION, slots) or size != ring_file_size(slots):
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, ring_file_size(slots))
+                os.pwrite(fd, _HEADER.pack(MAGIC, VERSION, slots), 0)
+        except BaseException:
+            os.close(fd)
+            raise
+        return cls(path, fd)
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def get(self, counter: int) -> int:
+        value: int = _U32.unpack_from(self._map, counter)[0]
+        return value
+
+    def set(self, counter: int, value: int) -> None:
+        _U32.pack_into(self._map, counter, value & MASK)
+
+    def pending(self, head: int, tail: int) -> int:
+        """ Messages published on a ring and not consumed yet. """
+        return (self.get(head) - self.get(tail)) & MASK
+
+    def _slot(self, ring: int, n: int) -> int:
+        return HEADER_SIZE + (ring * self.slots + n % self.slots) * SLOT_SIZE
+
+    def publish(self, ring: int, n: int, msg_id: int, payload: bytes) -> None:
+        """ Write message `n`; the caller checked the consumer is `slots` behind at most. """
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError(f"IPC payload of {len(payload)} bytes, max is {MAX_PAYLOAD}")
+        pos = self._slot(ring, n)
+        start = pos + _SLOT.size
+        self._map[start:start + len(payload)] = payload
+        _U32.pack_into(self._map, pos + 4, msg_id & MASK)
+        self._map[pos + 8:pos + 10] = len(payload).to_bytes(2, "little")
+        # published by this last store
+        _U32.pack_into(self._map, pos, (n + 1) & MASK)
+
+    def fetch(self, ring: int, n: int) -> Optional[Tuple[int, bytes]]:
+        """ Message `n` as (id, payload), or None until it is published. """
+        pos = self._slot(ring, n)
+        seq = (n + 1) & MASK
+        if _U32.unpack_from(self._map, pos)[0] != seq:
+            return None
+        _, msg_id, length = _SLOT.unpack_from(self._map, pos)
+        start = pos + _SLOT.size
+        payload = bytes(self._map[start:start + min(length, MAX_PAYLOAD)])
+        if _U32.unpack_from(self._map, pos)[0] != seq:
+            return None
+        return msg_id, payload
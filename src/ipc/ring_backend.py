@@ -0,0 +1,74 @@
+# src/ipc/ring_backend.py
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+from .base import IpcBackend
+from .ring import (
+    MASK, REQ_TAIL, REQUESTS, RESP_HEAD, RESP_TAIL, RESPONSES, RingFile,
+)
+from src.config.settings import Settings
+
+RING_FILE_NAME = "ipc_ring.bin"
+
+class RingIpcBackend(IpcBackend):
+    """
+    Shared-memory IPC backend: requests and responses go through the
+    fixed-slot rings of one mmapped file (see src/ipc/ring.py) instead of
+    a file each. Request ids are the u32 ids the emulator side assigns.
+    """
+    # a poll is a 4-byte read
+    poll_min_delay = 0.0001
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__()
+        self.settings = settings.ipc
+        self.path: Path = settings.ipc.ring_path or settings.ipc.ipc_dir / RING_FILE_NAME
+        self._ring: Optional[RingFile] = None
+
+    def init(self) -> None:
+        """ Create (or attach to) the ring file. """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._ring is None:
+            self._ring = RingFile.create(self.path, self.settings.ring_slots)
+
+    def close(self) -> None:
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    def _require(self) -> RingFile:
+        if self._ring is None:
+            raise RuntimeError("RingIpcBackend used before init()")
+        return self._ring
+
+    def read_request(self) -> Optional[Tuple[str, bytes]]:
+        ring = self._require()
+        n = ring.get(REQ_TAIL)
+        msg = ring.fetch(REQUESTS, n)
+        if msg is None:
+            return None
+        ring.set(REQ_TAIL, n + 1)
+        msg_id, payload = msg
+        return str(msg_id), payload
+
+    def write_response(self, req_id: str, data: bytes) -> None:
+        """ Publish the response; dropped if the emulator left the ring full. """
+        ring = self._require()
+        if ring.pending(RESP_HEAD, RESP_TAIL) >= ring.slots:
+            logging.error("Error: response ring full, response %s dropped", req_id)
+            return
+        n = ring.get(RESP_HEAD)
+        ring.publish(RESPONSES, n, int(req_id), data)
+        ring.set(RESP_HEAD, n + 1)
+
+    def list_pending(self) -> List[str]:
+        """ Return req_ids of responses the emulator has not read yet """
+        ring = self._require()
+        tail = ring.get(RESP_TAIL)
+        ids: List[str] = []
+        for i in range(ring.pending(RESP_HEAD, RESP_TAIL)):
+            msg = ring.fetch(RESPONSES, (tail + i) & MASK)
+            if msg is not None:
+                ids.append(str(msg[0]))
+        return ids
@@ -0,0 +1,66 @@
+"""
+Emulator side of the ring IPC backend, in Python.
+
+The reference for emulator-side implementations of src/ipc/ring.py, and
+what tests and benchmarks use in place of the emulator.
+"""
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.ipc.ring import (
+    MASK, REQ_HEAD, REQ_TAIL, REQUESTS, RESP_HEAD, RESP_TAIL, RESPONSES, RingFile,
+)
+
+
+class RingIpcClient:
+    def __init__(self, path: Path) -> None:
+        self._ring = RingFile.open(path)
+        # responses left over from a previous session are not ours
+        self._ring.set(RESP_TAIL, self._ring.get(RESP_HEAD))
+
+    def close(self) -> None:
+        self._ring.close()
+
+    def __enter__(self) -> "RingIpcClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def send(self, payload: bytes) -> int:
+        """ Publish a request and return its id; raises BufferError when the ring is full. """
+        ring = self._ring
+        if ring.pending(REQ_HEAD, REQ_TAIL) >= ring.slots:
+            raise BufferError("IPC request ring full")
+        n = ring.get(REQ_HEAD)
+        msg_id = (n + 1) & MASK
+        ring.publish(REQUESTS, n, msg_id, payload)
+        ring.set(REQ_HEAD, n + 1)
+        return msg_id
+
+    def poll(self, msg_id: int) -> Optional[bytes]:
+        """
+        The response to request `msg_id` if it has arrived. Responses to
+        other (older, timed out) requests met on the way are discarded.
+        """
+        ring = self._ring
+        while ring.pending(RESP_HEAD, RESP_TAIL):
+            n = ring.get(RESP_TAIL)
+            msg = ring.fetch(RESPONSES, n)
+            if msg is None:
+                return None
+            ring.set(RESP_TAIL, n + 1)
+            if msg[0] == msg_id:
+                return msg[1]
+        return None
+
+    def request(self, payload: bytes, timeout: float, poll_delay: float = 0.0001) -> Optional[bytes]:
+        """ Send `payload` and wait for its response, None after `timeout` seconds. """
+        msg_id = self.send(payload)
+        deadline = time.monotonic() + timeout
+        while True:
+            response = self.poll(msg_id)
+            if response is not None or time.monotonic() >= deadline:
+                return response
+            time.sleep(poll_delay)
@@ -13,6 +13,8 @@ from typing import Optional, Tuple, List
 from src.config.settings import Settings
 from .base import IpcBackend
 from .file_backend import FileIpcBackend
+from .ring_backend import RingIpcBackend
+from .socket_backend import SocketIpcBackend
 
 class IpcService:
     """High-level wrapper over an IpcBackend instance."""
@@ -23,25 +25,39 @@ class IpcService:
     @classmethod
     def from_settings(cls, settings: Settings) -> "IpcService":
         """
-        Create a FileIpcBackend from a settings-like object that has `ipc_dir`
-        path.
+        Create the backend named by `ipc.backend` ("file", "ring" or
+        "socket") from a settings-like object that has an `ipc_dir` path.
         Caller may provide any object with attribute `ipc_dir` (Path | str)
         """
         if settings.ipc.ipc_dir is None:
             raise ValueError("settings must have `ipc_dir` path attribute")
-        backend = FileIpcBackend(settings)
+        backend: IpcBackend
+        if settings.ipc.backend == "file":
+            backend = FileIpcBackend(settings)
+        elif settings.ipc.backend == "ring":
+            backend = RingIpcBackend(settings)
+        elif settings.ipc.backend == "socket":
+            backend = SocketIpcBackend(settings)
+        else:
+            raise ValueError(f"Unknown IPC backend: {settings.ipc.backend}")
         backend.init()
         return cls(backend)
 
     def read_request(self) -> Optional[Tuple[str, bytes]]:
         return self._backend.read_request()
 
+    def wait_for_request(self, timeout: float) -> Optional[Tuple[str, bytes]]:
+        return self._backend.wait_for_request(timeout)
+
     def write_response(self, req_id: str, data: bytes) -> None:
         self._backend.write_response(req_id, data)
 
     def list_pending(self) -> List[str]:
         return self._backend.list_pending()
 
+    def close(self) -> None:
+        self._backend.close()
+
     def gen_req_id(self) -> str:
         # Concrete backend provides generator; use it if available, else fallback
         if hasattr(self._backend, "gen_req_id"):
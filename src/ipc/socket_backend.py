@@ -0,0 +1,170 @@
+# src/ipc/socket_backend.py
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from .base import IpcBackend
+from .framing import FLAG_RESPONSE, HEADER, decode_body, encode_frame
+from src.config.settings import Settings
+
+SOCKET_FILE_NAME = "ipc.sock"
+# how long init waits for the server to listen
+START_TIMEOUT = 5.0
+
+Address = Union[Path, Tuple[str, int]]
+
+class SocketIpcBackend(IpcBackend):
+    """
+    Socket IPC backend: an asyncio server, on its own thread, speaking the
+    framed protocol of src/ipc/framing.py on a Unix socket (`socket_path`,
+    default ipc.sock in ipc_dir) or on 127.0.0.1:`socket_port`.
+
+    Any number of clients may connect. Their requests are queued for
+    read_request/wait_for_request in arrival order, and each response is
+    pushed to the connection its request came from as soon as it is
+    written: nothing is polled on either side.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__()
+        self.settings = settings.ipc
+        self.path: Optional[Path] = None
+        if settings.ipc.socket_port is None:
+            self.path = settings.ipc.socket_path or settings.ipc.ipc_dir / SOCKET_FILE_NAME
+        # the bound (host, port) once listening on TCP
+        self.address: Address = self.path or ("127.0.0.1", settings.ipc.socket_port or 0)
+        self._requests: "queue.Queue[Tuple[str, bytes]]" = queue.Queue()
+        # loop thread only: the connection each unanswered request came from
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def init(self) -> None:
+        """ Start the server thread and listen. """
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ipc-socket", daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._listen(), self._loop).result(START_TIMEOUT)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _listen(self) -> None:
+        path = self.path
+        if path is None:
+            self._server = await asyncio.start_server(
+                self._serve, "127.0.0.1", self.settings.socket_port)
+            host, port = self._server.sockets[0].getsockname()[:2]
+            self.address = (host, port)
+            logging.info("IPC socket listening on %s:%d", host, port)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # a socket left behind by a crashed session refuses the bind
+        if path.is_socket():
+            path.unlink()
+        self._server = await asyncio.start_unix_server(self._serve, path)
+        os.chmod(path, 0o600)
+        logging.info("IPC socket listening on %s", path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Read the requests of one connection until it closes. """
+        self._connections.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                id_len, flags, payload_len = HEADER.unpack(header)
+                body = await reader.readexactly(id_len + payload_len)
+                req_id, payload = decode_body(id_len, body)
+                if flags & FLAG_RESPONSE:
+                    logging.warning("IPC client sent a response frame for %s, ignored", req_id)
+                    continue
+                if req_id in self._writers:
+                    logging.warning("IPC request id %s reused before its response", req_id)
+                self._writers[req_id] = writer
+                self._requests.put((req_id, payload))
+        except asyncio.IncompleteReadError:
+            pass
+        except (ConnectionError, UnicodeDecodeError) as e:
+            logging.warning("IPC connection dropped: %s", e)
+        finally:
+            self._connections.discard(writer)
+            for req_id in [r for r, w in self._writers.items() if w is writer]:
+                del self._writers[req_id]
+            writer.close()
+
+    def _require(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            raise RuntimeError("SocketIpcBackend used before init()")
+        return self._loop
+
+    def read_request(self) -> Optional[Tuple[str, bytes]]:
+        self._require()
+        try:
+            return self._requests.get_nowait()
+        except queue.Empty:
+            return None
+
+    def wait_for_request(self, timeout: float) -> Optional[Tuple[str, bytes]]:
+        """ Block on the request queue, which the server thread fills. """
+        self._require()
+        try:
+            return self._requests.get(timeout=max(timeout, 0.0))
+        except queue.Empty:
+            return None
+
+    def write_response(self, req_id: str, data: bytes) -> None:
+        """ Push the response to the connection that sent `req_id`. """
+        frame = encode_frame(req_id, FLAG_RESPONSE, data)
+        self._require().call_soon_threadsafe(self._push, req_id, frame)
+
+    def _push(self, req_id: str, frame: bytes) -> None:
+        writer = self._writers.pop(req_id, None)
+        if writer is None or writer.is_closing():
+            logging.info("IPC client of %s disconnected, response dropped", req_id)
+            return
+        writer.write(frame)
+
+    def list_pending(self) -> List[str]:
+        """ Responses are pushed as they are written; none wait to be collected. """
+        return []
+
+    def close(self) -> None:
+        """ Stop listening, drop the connections and join the server thread. """
+        loop = self._loop
+        if loop is None:
+            return
+        if loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(START_TIMEOUT)
+            except Exception:
+                logging.warning("IPC socket server did not shut down cleanly", exc_info=True)
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+        loop.close()
+        self._loop = self._thread = None
+        if self.path is not None and self.path.is_socket():
+            self.path.unlink()
+
+    async def _shutdown(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+        for writer in list(self._connections):
+            writer.close()
+        tasks: List["asyncio.Task[Any]"] = [
+            t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if server is not None:
+            await server.wait_closed()
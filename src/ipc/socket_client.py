@@ -0,0 +1,77 @@
+"""
+Emulator side of the socket IPC backend, in Python.
+
+The reference for emulator-side implementations of src/ipc/framing.py,
+and what tests and benchmarks use in place of the emulator.
+"""
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from src.ipc.framing import FLAG_RESPONSE, HEADER, decode_body, encode_frame
+
+
+class SocketIpcClient:
+    def __init__(self, address: Union[Path, Tuple[str, int]], timeout: Optional[float] = None) -> None:
+        if isinstance(address, tuple):
+            self._sock = socket.create_connection(address, timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(str(address))
+        self._next_id = 0
+        # ids must not collide with those of other connections
+        self._tag = os.urandom(4).hex()
+        # responses received while waiting for another one
+        self._early: Dict[str, bytes] = {}
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> "SocketIpcClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def send(self, payload: bytes, req_id: Optional[str] = None) -> str:
+        """ Send a request and return its id (a fresh one unless `req_id` is given). """
+        if req_id is None:
+            self._next_id += 1
+            req_id = f"{int(time.time())}_{self._tag}_{self._next_id}"
+        self._sock.sendall(encode_frame(req_id, 0, payload))
+        return req_id
+
+    def _read_exactly(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("IPC server closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def receive(self) -> Tuple[str, bytes]:
+        """ Block for the next response frame, as (req_id, payload). """
+        while True:
+            id_len, flags, payload_len = HEADER.unpack(self._read_exactly(HEADER.size))
+            req_id, payload = decode_body(id_len, self._read_exactly(id_len + payload_len))
+            if flags & FLAG_RESPONSE:
+                return req_id, payload
+
+    def wait(self, req_id: str) -> bytes:
+        """ Block for the response to `req_id`, keeping the others met on the way. """
+        if req_id in self._early:
+            return self._early.pop(req_id)
+        while True:
+            got_id, payload = self.receive()
+            if got_id == req_id:
+                return payload
+            self._early[got_id] = payload
+
+    def request(self, payload: bytes) -> bytes:
+        """ Send `payload` and wait for its response. """
+        return self.wait(self.send(payload))
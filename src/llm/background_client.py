@@ -0,0 +1,107 @@
+"""
+LlmClient whose model loads on a background thread.
+
+Loading a multi-GB GGUF (mmapped and mlocked) takes long enough for the
+emulator to time out on the first lines of a session. Wrapping the
+client construction here lets the IPC loop start right away: the model
+loads and evaluates the prompt prefix as a warm-up in the background,
+`ready()` tells when it is done, and generations wait for it.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from src.llm.base import LlmClient
+
+
+class BackgroundLoadedClient(LlmClient):
+    def __init__(self, factory: Callable[[], LlmClient]) -> None:
+        self._factory = factory
+        self._client: Optional[LlmClient] = None
+        self._error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.load_secs = 0.0
+        self.warmup_secs = 0.0
+
+    def start(self, prefix: str = "") -> None:
+        """ Start loading, then warm up on `prefix`; later calls do nothing. """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._load, args=(prefix,), name="llm-load", daemon=True)
+            self._thread.start()
+
+    def _load(self, prefix: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            client = self._factory()
+            self.load_secs = time.perf_counter() - t0
+            logging.info("Model loaded in %.1fs", self.load_secs)
+            t1 = time.perf_counter()
+            client.prime(prefix)
+            self.warmup_secs = time.perf_counter() - t1
+            self._client = client
+            logging.info("Model ready after %.1fs (warm-up %.1fs)",
+                         time.perf_counter() - t0, self.warmup_secs)
+        except BaseException as exc:
+            self._error = exc
+            logging.error("Model failed to load", exc_info=True)
+        finally:
+            self._done.set()
+
+    def ready(self) -> bool:
+        return self._done.is_set() and self._client is not None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """ Block until the model is ready, at most `timeout` seconds. """
+        self.start()
+        self._done.wait(timeout)
+        if self._error is not None:
+            raise RuntimeError("Model failed to load") from self._error
+        return self.ready()
+
+    def _wait_until(self, deadline: Optional[float]) -> Optional[LlmClient]:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        if not self.wait(timeout):
+            logging.info("Model still loading at the deadline, nothing generated")
+            return None
+        return self._client
+
+    def prime(self, prefix: str) -> None:
+        """
+        Before loading starts, `prefix` becomes its warm-up prompt (and
+        loading starts); once the model is ready, it is primed right away.
+        """
+        if self._thread is None:
+            self.start(prefix)
+        elif self.ready():
+            assert self._client is not None
+            self._client.prime(prefix)
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> str:
+        client = self._wait_until(kwargs.get("deadline"))
+        if client is None:
+            return ""
+        return client.generate(prompt, max_tokens, stop, **kwargs)
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        client = self._wait_until(kwargs.get("deadline"))
+        if client is None:
+            return
+        yield from client.stream(prompt, max_tokens, stop, **kwargs)
@@ -1,5 +1,15 @@
 from abc import abstractmethod
-from typing import Any
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Iterator
+
+class Priority(IntEnum):
+    """ Scheduling class of a generation; lower values are served first. """
+    LIVE = 0  # the emulator is blocked waiting on it
+    BACKGROUND = 1  # prefetch and other speculative work
+
+# Priority of the generations started from the current thread or task
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.LIVE)
 
 class LlmClient():
     """Protocol for any LLM client implementation."""
@@ -21,3 +31,35 @@ class LlmClient():
         :return: Generated text (stripped of whitespace).
         """
         ...
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 60,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Yield the completion piece by piece as it is generated. Closing the
+        iterator early stops the generation. The default implementation
+        yields the whole `generate` result at once.
+
+        Clients that support it take a `deadline` keyword, a
+        time.monotonic() value past which they stop generating and end
+        the completion with what they have.
+        """
+        yield self.generate(prompt, max_tokens, stop, **kwargs)
+
+    def prime(self, prefix: str) -> None:
+        """
+        Hint that most prompts will start with `prefix`, so clients able to
+        reuse evaluated context can process it once up front.
+        The default implementation does nothing.
+        """
+
+    def ready(self) -> bool:
+        """
+        Whether a generation can start now rather than wait for the model,
+        e.g. while it loads. The default implementation is always ready.
+        """
+        return True
@@ -1,7 +1,34 @@
+from typing import Any, Callable, Dict, Iterable, Optional
 from src.llm.base import LlmClient
 from src.config.settings import CharacterCard
 from src.llm.prompt_builder import PromptBuilder
 
+# Tells whether a rewrite, as generated so far, still fits its destination
+FitsFn = Callable[[str], bool]
+
+def _clean(raw: str) -> str:
+    return raw.strip().strip("“”")
+
+def take_until_overflow(pieces: Iterable[str], fits: FitsFn) -> str:
+    """
+    Join streamed pieces, stopping right after the first one that makes
+    the text overflow. That piece is kept, so truncating the result gives
+    what the full completion would have given; every later token is never
+    generated.
+    """
+    text = ""
+    iterator = iter(pieces)
+    try:
+        for piece in iterator:
+            text += piece
+            if not fits(_clean(text)):
+                break
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    return text
+
 class DialogueGenerator:
     def __init__(
         self,
@@ -13,8 +40,28 @@ class DialogueGenerator:
         self.character = character
         self.builder = prompt_builder
 
-    def generate(self, original_line: str) -> str:
-        prompt = self.builder.build(self.character, original_line)
-        raw = self.llm.generate(prompt)
-        return raw.strip().strip("“”")
+    def prime(self) -> None:
+        """ Let the client evaluate the prompt prefix shared by every line. """
+        self.llm.prime(self.builder.prefix(self.character))
 
+    def ready(self) -> bool:
+        return self.llm.ready()
+
+    def generate(
+        self,
+        original_line: str,
+        fits: Optional[FitsFn] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """
+        Rewrite `original_line`. With `fits`, the completion is streamed and
+        stopped as soon as the rewrite no longer fits. A `deadline` is passed
+        on to the client, which stops generating once it passes.
+        """
+        prompt = self.builder.build(self.character, original_line)
+        kwargs: Dict[str, Any] = {} if deadline is None else {"deadline": deadline}
+        if fits is None:
+            raw = self.llm.generate(prompt, **kwargs)
+        else:
+            raw = take_until_overflow(self.llm.stream(prompt, **kwargs), fits)
+        return _clean(raw)
@@ -0,0 +1,65 @@
+"""
+GBNF grammar for rewrites the Gen3 codec can encode.
+
+Derived from REVERSE_TABLE, so it follows the codec: generation can only
+emit printable glyphs of the table and the {PLAYER}/{RIVAL} placeholders
+(line and box breaks are laid out later by format_dialogue), must produce
+at least `min_len` non-space glyphs, and ends with the closing quote the
+prompt opened, after at most `max_len` glyphs.
+"""
+from typing import List
+from src.codecs.tables import REVERSE_TABLE
+
+# Closes the quote opened by the prompt; not a Gen3 glyph
+CLOSING_QUOTE = "”"
+
+
+def allowed_glyphs() -> List[str]:
+    """ Single characters the model may emit: printable, single-byte glyphs. """
+    return sorted(
+        c for c, code in REVERSE_TABLE.items()
+        if len(c) == 1 and isinstance(code, int) and c.isprintable()
+    )
+
+
+def placeholders() -> List[str]:
+    return sorted(t for t, code in REVERSE_TABLE.items() if len(t) > 1 and isinstance(code, list))
+
+
+def _char_class(chars: List[str]) -> str:
+    return "[" + "".join(f"\\u{ord(c):04X}" for c in chars) + "]"
+
+
+def _literal(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_gbnf(min_len: int, max_len: int) -> str:
+    """
+    Grammar accepting `min_len` to `max_len` glyphs, at least `min_len` of
+    them non-space, followed by the closing quote.
+
+    Bounded repetition is spelled out as a chain of optional rules, which
+    every llama.cpp grammar parser supports.
+    """
+    if not 0 < min_len <= max_len:
+        raise ValueError(f"Invalid rewrite length bounds: {min_len}..{max_len}")
+    glyphs = allowed_glyphs()
+    solid = [c for c in glyphs if not c.isspace()]
+    spaces = [c for c in glyphs if c.isspace()]
+    tokens = " | ".join(_literal(t) for t in placeholders())
+    # a lead can carry a space, so the tail is what is left of `max_len`
+    extra = max_len - 2 * min_len
+    body = ["lead"] * min_len + (["tail0"] if extra > 0 else [])
+    rules = [
+        f"root ::= {' '.join(body)} {_literal(CLOSING_QUOTE)}",
+        f"solid ::= {_char_class(solid)}" + (f" | {tokens}" if tokens else ""),
+        f"space ::= {_char_class(spaces)}",
+        "lead ::= space? solid",
+        "glyph ::= solid | space",
+    ]
+    for i in range(extra - 1):
+        rules.append(f"tail{i} ::= (glyph tail{i + 1})?")
+    if extra > 0:
+        rules.append(f"tail{extra - 1} ::= glyph?")
+    return "\n".join(rules) + "\n"
@@ -0,0 +1,219 @@
+"""
+LlmClient for OpenAI-compatible `/v1/completions` servers.
+
+Offloads inference to another machine running e.g. llama.cpp server or
+vLLM. Requests go over a small pool of persistent keep-alive
+connections, one per concurrent request (`llm.workers`), so a session
+pays the TCP/TLS setup once per connection rather than once per line.
+Completions are streamed as server-sent events.
+
+Sampling parameters and the Gen3 grammar use llama.cpp server names
+(`top_k`, `repeat_penalty`, `grammar`); servers that do not know a field
+are expected to ignore it.
+"""
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.config.settings import LlmConfig
+from src.llm.base import LlmClient
+from src.llm.grammar import build_gbnf
+from src.llm.rewriter import DIALOG_BUFFER_LEN, MIN_REWRITE_LEN
+
+# A reused connection the server closed while idle fails on first use
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class HttpLlmClient(LlmClient):
+    def __init__(self, cfg: LlmConfig) -> None:
+        if not cfg.api_url:
+            raise ValueError("HttpLlmClient needs llm.api_url")
+        url = urlsplit(cfg.api_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Unsupported LLM API url: {cfg.api_url}")
+        self.cfg = cfg
+        self._https = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port
+        self._path = url.path.rstrip("/") + "/completions"
+        self._headers = {"Content-Type": "application/json"}
+        if cfg.api_key:
+            self._headers["Authorization"] = f"Bearer {cfg.api_key}"
+        self._grammar = build_gbnf(MIN_REWRITE_LEN, DIALOG_BUFFER_LEN) if cfg.grammar else None
+        self._slots = threading.BoundedSemaphore(max(cfg.workers, 1))
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self.connections_opened = 0
+        self.requests = 0
+
+    def close(self) -> None:
+        """ Close the idle connections. """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        if self._https:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=timeout)
+
+    def _body(self, prompt: str, max_tokens: int, stop: Any, stream: bool,
+              kwargs: Dict[str, Any]) -> bytes:
+        body: Dict[str, Any] = {
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "stop": stop or ["\n"],
+            "temperature": self.cfg.temperature,
+            "top_k": self.cfg.top_k,
+            "top_p": self.cfg.top_p,
+            "repeat_penalty": self.cfg.repeat_penalty,
+            "stream": stream,
+        }
+        if self.cfg.api_model:
+            body["model"] = self.cfg.api_model
+        if self._grammar is not None:
+            body["grammar"] = self._grammar
+        body.update(kwargs)
+        return json.dumps(body).encode("utf-8")
+
+    def _post(self, body: bytes, timeout: float) -> Tuple[http.client.HTTPConnection,
+                                                          http.client.HTTPResponse]:
+        """ Send `body` on a pooled connection; the caller owns one slot. """
+        while True:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(timeout), False
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request("POST", self._path, body, self._headers)
+                resp = conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            self.requests += 1
+            if resp.status != 200:
+                detail = resp.read()[:200].decode("utf-8", "replace")
+                self._release(conn, resp)
+                raise RuntimeError(f"LLM server returned {resp.status}: {detail}")
+            return conn, resp
+
+    def _release(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        """ Pool `conn` again if its response was read to the end, else close it. """
+        if resp.isclosed() and not resp.will_close:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def _timeout(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self.cfg.api_timeout
+        return min(self.cfg.api_timeout, deadline - time.monotonic())
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> str:
+        """ Complete `prompt` in one response, streamed with a `deadline`. """
+        if kwargs.get("deadline") is not None:
+            return "".join(self.stream(prompt, max_tokens, stop, **kwargs)).strip()
+        kwargs.pop("deadline", None)
+        body = self._body(prompt, max_tokens, stop, False, kwargs)
+        with self._slots:
+            conn, resp = self._post(body, self._timeout(None))
+            try:
+                payload = json.loads(resp.read())
+            finally:
+                self._release(conn, resp)
+        choices = payload.get("choices")
+        if not isinstance(choices, list) or len(choices) == 0:
+            raise RuntimeError("LLM returned no choices")
+        text = choices[0].get("text")
+        if not isinstance(text, str):
+            raise RuntimeError("LLM choice text is not a string")
+        return text.strip()
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Stream the completion as the server sends it. Closing this iterator
+        or reaching `deadline` (a time.monotonic() value) drops the
+        connection, which makes the server stop generating. With a
+        deadline, a request that fails or gets no response in time
+        yields nothing instead of raising.
+        """
+        deadline: Optional[float] = kwargs.pop("deadline", None)
+        body = self._body(prompt, max_tokens, stop, True, kwargs)
+        if deadline is None:
+            self._slots.acquire()
+        elif not self._slots.acquire(timeout=max(self._timeout(deadline), 0.0)):
+            logging.info("No LLM connection free before the deadline, nothing generated")
+            return
+        try:
+            timeout = self._timeout(deadline)
+            if timeout <= 0:
+                return
+            try:
+                conn, resp = self._post(body, timeout)
+            except TimeoutError:
+                if deadline is None:
+                    raise
+                logging.info("No LLM response before the deadline, nothing generated")
+                return
+            except (OSError, http.client.HTTPException, RuntimeError):
+                # `_post` closed the connection; with a deadline the caller
+                # falls back rather than fails
+                if deadline is None:
+                    raise
+                logging.warning("LLM request failed, nothing generated", exc_info=True)
+                return
+            try:
+                for line in resp:
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        resp.read()
+                        break
+                    choices = json.loads(data).get("choices")
+                    if not isinstance(choices, list) or len(choices) == 0:
+                        raise RuntimeError("LLM returned no choices")
+                    text = choices[0].get("text")
+                    if not isinstance(text, str):
+                        raise RuntimeError("LLM choice text is not a string")
+                    if text:
+                        yield text
+                    if deadline is not None and time.monotonic() >= deadline:
+                        logging.info("Generation stopped at its deadline")
+                        break
+            except TimeoutError:
+                # the socket timeout never outlasts the deadline
+                if deadline is None:
+                    raise
+                logging.info("Generation stopped at its deadline")
+            finally:
+                self._release(conn, resp)
+        finally:
+            self._slots.release()
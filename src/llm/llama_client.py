@@ -1,12 +1,20 @@
-from typing import Any
-from llama_cpp import Llama, CreateCompletionResponse
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from llama_cpp import Llama, LlamaGrammar, LlamaState, CreateCompletionResponse
 from src.llm.base import LlmClient
+from src.llm.grammar import build_gbnf
+from src.llm.rewriter import DIALOG_BUFFER_LEN, MIN_REWRITE_LEN
 from src.config.settings import LlmConfig
 
 class LlamaClient(LlmClient):
     """LlmClient implementation for llama_cpp."""
 
     def __init__(self, cfg: LlmConfig):
+        self.cfg = cfg
         self.llm = Llama(
             model_path=str(cfg.model_path),
             n_ctx=cfg.n_ctx,
@@ -17,6 +25,108 @@ class LlamaClient(LlmClient):
             use_mmap=True,
             use_mlock=True,
         )
+        # one llama context runs one completion at a time
+        self._lock = threading.Lock()
+        self._prefix = ""
+        self._prefix_tokens: List[int] = []
+        self._prefix_state: Optional[LlamaState] = None
+        # completions are constrained to lines the Gen3 codec can encode
+        self._grammar: Optional[LlamaGrammar] = None
+        if cfg.grammar:
+            self._grammar = LlamaGrammar.from_string(
+                build_gbnf(MIN_REWRITE_LEN, DIALOG_BUFFER_LEN), verbose=False)
+
+    def _sampling_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """ Default the grammar of a call to the codec one, fresh for this completion. """
+        if self._grammar is None or "grammar" in kwargs:
+            return kwargs
+        self._grammar.reset()
+        return {**kwargs, "grammar": self._grammar}
+
+    def _state_key(self, prefix: str) -> str:
+        blob = f"{self.cfg.model_path}\0{self.cfg.n_ctx}\0{prefix}"
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+    def _load_prefix_state(self, key: str) -> Optional[LlamaState]:
+        """
+        Read a state saved by `_save_prefix_state`. The file is plain
+        arrays (no pickle), so a tampered one cannot run code.
+        """
+        path = self.cfg.prefix_state_path
+        if path is None or not path.is_file():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved["key"]) != key:
+                    logging.info("Prefix state %s is for another prompt or model", path)
+                    return None
+                n_tokens, state_size, seed = (int(n) for n in saved["sizes"])
+                return LlamaState(
+                    input_ids=saved["input_ids"],
+                    scores=saved["scores"],
+                    n_tokens=n_tokens,
+                    llama_state=saved["llama_state"].tobytes(),
+                    llama_state_size=state_size,
+                    seed=seed,
+                )
+        except Exception:
+            logging.info("Unreadable prefix state %s, re-evaluating", path, exc_info=True)
+            return None
+
+    def _save_prefix_state(self, key: str, state: LlamaState) -> None:
+        path = self.cfg.prefix_state_path
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                key=np.array(key),
+                sizes=np.array([state.n_tokens, state.llama_state_size, state.seed], dtype=np.int64),
+                input_ids=state.input_ids,
+                scores=state.scores,
+                llama_state=np.frombuffer(state.llama_state, dtype=np.uint8),
+            )
+        tmp_path.replace(path)
+
+    def prime(self, prefix: str) -> None:
+        """
+        Evaluate `prefix` once and snapshot the context, so prompts that
+        start with it only evaluate their own suffix. The snapshot is read
+        from / written to `prefix_state_path` when configured.
+        """
+        if not self.cfg.prefix_cache or not prefix:
+            return
+        key = self._state_key(prefix)
+        with self._lock:
+            tokens = self.llm.tokenize(prefix.encode("utf-8"))
+            state = self._load_prefix_state(key)
+            if state is not None:
+                self.llm.load_state(state)
+                logging.info("Prompt prefix state restored (%d tokens)", len(tokens))
+            else:
+                self.llm.reset()
+                self.llm.eval(tokens)
+                state = self.llm.save_state()
+                self._save_prefix_state(key, state)
+                logging.info("Prompt prefix evaluated (%d tokens)", len(tokens))
+            self._prefix = prefix
+            self._prefix_tokens = tokens
+            self._prefix_state = state
+
+    def _restore_prefix(self, prompt: str) -> None:
+        """
+        Put the primed prefix back in the context before a prompt that
+        starts with it. llama_cpp then keeps the longest common token
+        prefix and only evaluates the rest.
+        """
+        if self._prefix_state is None or not prompt.startswith(self._prefix):
+            return
+        n = len(self._prefix_tokens)
+        if self.llm.n_tokens >= n and list(self.llm.input_ids[:n]) == self._prefix_tokens:
+            return  # still in the context since the last call
+        self.llm.load_state(self._prefix_state)
 
     def generate(
         self,
@@ -26,15 +136,21 @@ class LlamaClient(LlmClient):
         **kwargs: Any,
     ) -> str:
         """
-        Call the underlying Llama model and return its output.
+        Call the underlying Llama model and return its output. With a
+        `deadline`, the completion is streamed so it can stop in time.
         """
-        raw: Any = \
-            self.llm(
-                prompt,
-                max_tokens=max_tokens,
-                stop=stop or ["\n"],
-                **kwargs
-            )
+        if kwargs.get("deadline") is not None:
+            return "".join(self.stream(prompt, max_tokens, stop, **kwargs)).strip()
+        kwargs.pop("deadline", None)
+        with self._lock:
+            self._restore_prefix(prompt)
+            raw: Any = \
+                self.llm(
+                    prompt,
+                    max_tokens=max_tokens,
+                    stop=stop or ["\n"],
+                    **self._sampling_kwargs(kwargs)
+                )
 
         # Normalize to a single response dict
         resp: CreateCompletionResponse
@@ -55,3 +171,50 @@ class LlamaClient(LlmClient):
             raise RuntimeError("LLM choice text is not a string")
         return text.strip()
 
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Stream the completion of the underlying Llama model. Closing this
+        iterator closes the llama_cpp stream, which stops sampling, and so
+        does reaching `deadline` (a time.monotonic() value), including
+        while waiting for the context.
+        """
+        deadline: Optional[float] = kwargs.pop("deadline", None)
+        if deadline is None:
+            acquired = self._lock.acquire()
+        else:
+            acquired = self._lock.acquire(timeout=max(deadline - time.monotonic(), 0.0))
+        if not acquired:
+            logging.info("LLM context busy until the deadline, nothing generated")
+            return
+        try:
+            self._restore_prefix(prompt)
+            chunks: Any = self.llm(
+                prompt,
+                max_tokens=max_tokens,
+                stop=stop or ["\n"],
+                stream=True,
+                **self._sampling_kwargs(kwargs)
+            )
+            try:
+                for chunk in chunks:
+                    choices = chunk.get("choices")
+                    if not isinstance(choices, list) or len(choices) == 0:
+                        raise RuntimeError("LLM returned no choices")
+                    text = choices[0].get("text")
+                    if not isinstance(text, str):
+                        raise RuntimeError("LLM choice text is not a string")
+                    if text:
+                        yield text
+                    if deadline is not None and time.monotonic() >= deadline:
+                        logging.info("Generation stopped at its deadline")
+                        break
+            finally:
+                chunks.close()
+        finally:
+            self._lock.release()
@@ -0,0 +1,136 @@
+"""
+Speculative prefetch of the next dialog lines.
+
+Dialog mostly plays in ROM order: once a request is matched to an entry
+of the extraction store, the lines stored right after it are likely to
+be asked next. The prefetcher rewrites them on a background thread while
+the IPC loop waits, and puts the results in the rewrite cache, so the
+live request that follows is a cache hit.
+
+Live requests always win: while one is being served the prefetcher does
+not start new work, and a prefetch generation already running is
+cancelled at its next streamed piece.
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Iterator, Optional
+
+from src.config.settings import PrefetchConfig
+from src.llm.base import Priority, request_priority
+from src.llm.rewriter import DialogueRewriter, GenerationCancelled
+from src.store.dialogue_store import DialogueStore
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        cfg: PrefetchConfig,
+        rewriter: DialogueRewriter,
+        store: DialogueStore,
+        pack: Optional[DialogueStore] = None,
+    ) -> None:
+        if rewriter.cache is None:
+            raise ValueError("Prefetching needs the rewrite cache")
+        self.depth = cfg.depth
+        self.max_pending = cfg.max_pending
+        self.rewriter = rewriter
+        self.cache = rewriter.cache
+        self.store = store
+        self.pack = pack
+        self.prefetched = 0
+        self.hits = 0
+        self.cancelled = 0
+        self._queue: Deque[bytes] = deque()
+        # payloads prefetched and not yet asked for, oldest first
+        self._ready: "OrderedDict[bytes, None]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._live = threading.Event()
+        # live requests being served; the IPC loop may run several at once
+        self._live_count = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._live.set()
+            self._cond.notify_all()
+        self._thread.join()
+
+    @contextmanager
+    def live(self, payload: bytes) -> Iterator[None]:
+        """ Serve a live request for `payload`: prefetch work yields until it is done. """
+        with self._cond:
+            self._take(payload)
+            self._live_count += 1
+            self._live.set()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._live_count -= 1
+                if self._live_count == 0:
+                    self._live.clear()
+                    self._cond.notify_all()
+
+    def served(self, payload: bytes) -> None:
+        """ Count a live request answered without the model (a cache hit). """
+        with self._cond:
+            self._take(payload)
+
+    def _take(self, payload: bytes) -> None:
+        if payload in self._ready:
+            del self._ready[payload]
+            self.hits += 1
+
+    def schedule(self, number: int) -> None:
+        """ Queue the `depth` store entries following entry `number`. """
+        end = min(number + 1 + self.depth, len(self.store))
+        keys = [self.store.entry(i).key for i in range(number + 1, end)]
+        with self._cond:
+            # the player moved on: older guesses are worth less than these
+            self._queue.clear()
+            for key in keys:
+                if self.pack is not None and self.pack.find(key) >= 0:
+                    continue
+                if key in self._ready or self.cache.contains(key):
+                    continue
+                self._queue.append(key)
+            self._cond.notify_all()
+
+    def _next(self) -> Optional[bytes]:
+        with self._cond:
+            while not self._closed and (not self._queue or self._live.is_set()):
+                self._cond.wait()
+            if self._closed:
+                return None
+            return self._queue.popleft()
+
+    def _run(self) -> None:
+        # a worker pool serves live requests before these generations
+        request_priority.set(Priority.BACKGROUND)
+        while True:
+            payload = self._next()
+            if payload is None:
+                return
+            try:
+                self.rewriter.generate(payload, "prefetch", cancel=self._live)
+            except GenerationCancelled:
+                self.cancelled += 1
+                continue
+            except Exception:
+                logging.error("Prefetch rewrite failed", exc_info=True)
+                continue
+            with self._cond:
+                self.prefetched += 1
+                self._ready[payload] = None
+                while len(self._ready) > self.max_pending:
+                    self._ready.popitem(last=False)
+
+    def log_stats(self) -> None:
+        ratio = self.hits / self.prefetched if self.prefetched else 0.0
+        logging.info("Prefetch: %d lines prefetched, %d used (%.0f%% hit), %d cancelled",
+                     self.prefetched, self.hits, ratio * 100, self.cancelled)
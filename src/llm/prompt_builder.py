@@ -4,7 +4,8 @@ class PromptBuilder:
     def __init__(self, few_shot: str):
         self.few_shot = few_shot
 
-    def build(self, card: CharacterCard, original: str) -> str:
+    def prefix(self, card: CharacterCard) -> str:
+        """ Static part of every prompt: instructions, character card and few-shot block. """
         return (
             f"As an assistant, you receive an original dialogue line from Pokemon FireRed (US) game.\n"
             f"- You have to rewrite the dialogue as a new original dialogue.\n"
@@ -12,6 +13,11 @@ class PromptBuilder:
             f"- You are the following character.\nCharacter: {card.name} ({card.age} y.o.), at {card.location}. "
             f"Traits: {', '.join(card.traits)}. Goal: {card.motivation}.\n\n"
             f"{self.few_shot}\nNow rewrite the line below with the same tone:\n"
-            f"Original: “{original}”\nRewrite: ”"
         )
 
+    def suffix(self, original: str) -> str:
+        """ Per-line part of the prompt, appended to the prefix. """
+        return f"Original: “{original}”\nRewrite: ”"
+
+    def build(self, card: CharacterCard, original: str) -> str:
+        return self.prefix(card) + self.suffix(original)
@@ -0,0 +1,161 @@
+"""
+Two-tier cache of finished rewrites.
+
+Maps a raw Gen3 request payload to the encoded response bytes written
+back to the emulator. A bounded in-memory LRU answers repeated lines
+of a session; an optional SQLite file keeps them across restarts.
+
+Entries are scoped by a fingerprint of everything that shapes a rewrite
+(character card, prompt template, model and sampling parameters), so
+changing any of them starts from a fresh set of entries instead of
+serving stale ones.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from src.config.settings import CacheConfig, CharacterCard, LlmConfig
+from src.llm.prompt_builder import PromptBuilder
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rewrites (
+    fingerprint TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    response BLOB NOT NULL,
+    gen_secs REAL NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (fingerprint, payload)
+)
+"""
+
+
+def rewrite_fingerprint(card: CharacterCard, builder: PromptBuilder, llm: LlmConfig) -> str:
+    """ Hash of the card, prompt template and sampling params behind a rewrite. """
+    blob = json.dumps({
+        "card": asdict(card),
+        # the template with a placeholder line covers the card and few-shot text
+        "prompt": builder.build(card, "\0"),
+        "model": f"{llm.api_url}/{llm.api_model}" if llm.api_url else Path(llm.model_path).name,
+        "sampling": [llm.temperature, llm.top_k, llm.top_p, llm.repeat_penalty, llm.grammar],
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class RewriteCache:
+    """
+    In-memory LRU in front of an optional SQLite tier.
+
+    Every entry remembers how long its generation took, so a hit can
+    report the latency it saved. Safe to share between threads.
+    """
+
+    def __init__(self, cfg: CacheConfig, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.max_entries = cfg.max_entries
+        self.ttl = cfg.ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_secs = 0.0
+        self._lru: "OrderedDict[bytes, Tuple[bytes, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if cfg.path is not None:
+            cfg.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(cfg.path), check_same_thread=False)
+            self._db.execute(_SCHEMA)
+            self._prune(cfg.disk_max_entries)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _prune(self, max_rows: int) -> None:
+        """ Drop expired rows, then the oldest ones beyond `max_rows` (0: no cap). """
+        assert self._db is not None
+        with self._db:
+            if self.ttl > 0:
+                self._db.execute(
+                    "DELETE FROM rewrites WHERE fingerprint = ? AND created < ?",
+                    (self.fingerprint, time.time() - self.ttl))
+            if max_rows > 0:
+                self._db.execute(
+                    "DELETE FROM rewrites WHERE fingerprint = ? AND payload NOT IN"
+                    " (SELECT payload FROM rewrites WHERE fingerprint = ?"
+                    "  ORDER BY created DESC LIMIT ?)",
+                    (self.fingerprint, self.fingerprint, max_rows))
+
+    def _remember(self, payload: bytes, entry: Tuple[bytes, float, float]) -> None:
+        self._lru[payload] = entry
+        self._lru.move_to_end(payload)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def contains(self, payload: bytes) -> bool:
+        """ Whether `payload` has a live entry; unlike `get`, not counted in the stats. """
+        with self._lock:
+            entry = self._lru.get(payload)
+            if entry is not None:
+                return not self._expired(entry[2])
+            if self._db is None:
+                return False
+            row = self._db.execute(
+                "SELECT created FROM rewrites WHERE fingerprint = ? AND payload = ?",
+                (self.fingerprint, payload)).fetchone()
+            return row is not None and not self._expired(row[0])
+
+    def get(self, payload: bytes) -> Optional[bytes]:
+        """ Cached response for `payload`, or None. """
+        with self._lock:
+            entry = self._lru.get(payload)
+            if entry is not None and self._expired(entry[2]):
+                del self._lru[payload]
+                entry = None
+            if entry is not None:
+                self._lru.move_to_end(payload)
+                self.memory_hits += 1
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, gen_secs, created FROM rewrites"
+                    " WHERE fingerprint = ? AND payload = ?",
+                    (self.fingerprint, payload)).fetchone()
+                if row is not None and not self._expired(row[2]):
+                    entry = (row[0], row[1], row[2])
+                    self._remember(payload, entry)
+                    self.disk_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self.saved_secs += entry[1]
+            return entry[0]
+
+    def put(self, payload: bytes, response: bytes, gen_secs: float) -> None:
+        """ Store `response` for `payload`, `gen_secs` being what producing it took. """
+        entry = (response, gen_secs, time.time())
+        with self._lock:
+            self._remember(payload, entry)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO rewrites VALUES (?, ?, ?, ?, ?)",
+                        (self.fingerprint, payload) + entry)
+
+    def log_stats(self) -> None:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        ratio = hits / total if total else 0.0
+        logging.info("Rewrite cache: %d hits (%d memory, %d disk), %d misses"
+                     " (%.0f%% hit), %.1fs of generation saved",
+                     hits, self.memory_hits, self.disk_hits, self.misses,
+                     ratio * 100, self.saved_secs)
@@ -0,0 +1,172 @@
+import logging
+import sys
+import threading
+import time
+from typing import Optional
+from src.codecs.base import TextCodec
+from src.llm.dialogue_generator import DialogueGenerator
+from src.llm.rewrite_cache import RewriteCache
+from src.utils.format import format_dialogue
+
+# Shorter rewrites are treated as failed generations and retried
+MIN_REWRITE_LEN = 5
+# Generations tried per line before falling back to the original text
+MAX_ATTEMPTS = 3
+# Size of the dialog buffer lua/hook.lua writes the response into
+DIALOG_BUFFER_LEN = 255
+
+class GenerationCancelled(Exception):
+    """ Raised by `rewrite` when its `cancel` event is set mid-generation. """
+
+class DialogueRewriter:
+    """
+    Turn a raw Gen3 dialog payload into the encoded bytes written back:
+    decode, generate, format, encode. With a cache, known payloads are
+    answered with their stored response and skip every step.
+
+    Generation is streamed and stopped once the formatted, encoded rewrite
+    would overflow the dialog buffer, since encode truncates it anyway.
+    A line is generated at most `max_attempts` times; if every rewrite is
+    too short, the original line is sent back unchanged.
+
+    A `deadline` (a time.monotonic() value) cuts generation short: the
+    rewrite streamed so far is used if it is long enough, the original
+    line otherwise. Cut rewrites are not cached. While the model is still
+    loading, `rewrite` passes cache misses through unchanged.
+    """
+
+    def __init__(
+        self,
+        generator: DialogueGenerator,
+        codec: TextCodec,
+        cache: Optional[RewriteCache] = None,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        self.generator = generator
+        self.codec = codec
+        self.cache = cache
+        self.max_attempts = max_attempts
+        self.early_stops = 0
+        self.lines = 0
+        self.generations = 0
+        self.fallbacks = 0
+        self.deadline_cuts = 0
+        self.passed_through = 0
+
+    def fits(self, text: str) -> bool:
+        """ True while `text`, laid out and encoded, fits the dialog buffer. """
+        encoded = self.codec.encode(format_dialogue(text), max_len=sys.maxsize)
+        return len(encoded) <= DIALOG_BUFFER_LEN
+
+    def rewrite(self, payload: bytes, tag: str = "", deadline: Optional[float] = None,
+                check_cache: bool = True,
+                cancel: Optional[threading.Event] = None) -> bytes:
+        """
+        Encoded response for `payload`, from the cache when it has one
+        (unless `check_cache` is False: the caller looked it up already).
+        Setting `cancel` aborts a generation as in `generate`.
+        """
+        data = self.try_rewrite(payload, tag, deadline, check_cache, cancel)
+        return data if data is not None else self.original(payload)
+
+    def try_rewrite(self, payload: bytes, tag: str = "", deadline: Optional[float] = None,
+                    check_cache: bool = True,
+                    cancel: Optional[threading.Event] = None) -> Optional[bytes]:
+        """ Like `rewrite`, but None where the original line would be sent back. """
+        if check_cache:
+            cached = self.lookup(payload, tag)
+            if cached is not None:
+                return cached
+        if not self.generator.ready():
+            self.passed_through += 1
+            logging.info(f"[{tag}] Model not ready, original line passed through")
+            return None
+        return self._generate(payload, tag, cancel, deadline)
+
+    def lookup(self, payload: bytes, tag: str = "") -> Optional[bytes]:
+        """ The cached response for `payload`, if there is one. """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(payload)
+        if cached is not None:
+            logging.info(f"[{tag}] Served from rewrite cache")
+        return cached
+
+    @staticmethod
+    def original(payload: bytes) -> bytes:
+        """ The response sending `payload` back unchanged. """
+        return payload[:DIALOG_BUFFER_LEN - 1] + b"\xff"
+
+    def generate(
+        self,
+        payload: bytes,
+        tag: str = "",
+        cancel: Optional[threading.Event] = None,
+        deadline: Optional[float] = None,
+    ) -> bytes:
+        """
+        Generate a fresh response for `payload` and cache it. Setting
+        `cancel` aborts the generation at its next streamed piece with
+        GenerationCancelled; nothing is cached then.
+        """
+        data = self._generate(payload, tag, cancel, deadline)
+        return data if data is not None else self.original(payload)
+
+    def _generate(
+        self,
+        payload: bytes,
+        tag: str,
+        cancel: Optional[threading.Event],
+        deadline: Optional[float],
+    ) -> Optional[bytes]:
+        """ `generate`, returning None when no rewrite was usable. """
+        def expired() -> bool:
+            return deadline is not None and time.monotonic() >= deadline
+
+        def fits(text: str) -> bool:
+            if cancel is not None and cancel.is_set():
+                raise GenerationCancelled(tag)
+            return not expired() and self.fits(text)
+
+        t0 = time.perf_counter()
+        decoded_original = self.codec.decode(payload)
+        formatted_ori = decoded_original.replace("\n", " ").replace("\x0c", " ")
+        logging.info(f"[{tag}] Received: {formatted_ori!r}")
+
+        rewrite = ""
+        attempts = 0
+        while len(rewrite.strip()) < MIN_REWRITE_LEN and attempts < self.max_attempts:
+            if expired():
+                break
+            rewrite = self.generator.generate(formatted_ori, fits=fits, deadline=deadline)
+            attempts += 1
+        cut = expired()
+        self.lines += 1
+        self.generations += attempts
+        if cut:
+            self.deadline_cuts += 1
+            logging.warning(f"[{tag}] Deadline reached after {attempts} attempts")
+        if len(rewrite.strip()) < MIN_REWRITE_LEN:
+            self.fallbacks += 1
+            logging.warning(f"[{tag}] No usable rewrite after {attempts} attempts,"
+                            " keeping the original line")
+            return None
+        if not self.fits(rewrite):
+            self.early_stops += 1
+            logging.info(f"[{tag}] Generation stopped at the dialog buffer size")
+
+        logging.info(f"[{tag}] Rewritten: {rewrite!r}")
+        data = self.codec.encode(format_dialogue(rewrite), max_len=DIALOG_BUFFER_LEN)
+        if self.cache is not None and not cut:
+            self.cache.put(payload, data, time.perf_counter() - t0)
+        return data
+
+    def log_stats(self) -> None:
+        per_line = self.generations / self.lines if self.lines else 0.0
+        logging.info("Rewriter: %d lines generated, %.2f generations per line,"
+                     " %d kept original, %d stopped at the buffer size,"
+                     " %d cut by their deadline, %d passed through while loading",
+                     self.lines, per_line, self.fallbacks, self.early_stops,
+                     self.deadline_cuts, self.passed_through)
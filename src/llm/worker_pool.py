@@ -0,0 +1,202 @@
+"""
+Pool of LLM workers behind a single LlmClient.
+
+Each worker is a thread driving its own client, e.g. a LlamaClient with
+its own llama context; the model weights are mmapped, so the contexts
+share them through the page cache and only the KV caches are per
+worker. llama_cpp releases the GIL while evaluating, so the workers run
+in parallel.
+
+Jobs are served by priority (see `Priority` and `request_priority`), in
+arrival order within a priority. Background jobs never take the last
+idle worker of a multi-worker pool, so a live request always finds one
+free as soon as it arrives. A call with a `deadline` keyword waits for a
+worker at most until then, and its job is dropped if it is still queued
+by that time.
+"""
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.llm.base import LlmClient, Priority, request_priority
+
+# A job runs on the client of the worker that picked it up
+Job = Callable[[LlmClient], None]
+
+_END = object()
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+class LlmWorkerPool(LlmClient):
+    def __init__(self, clients: Sequence[LlmClient]) -> None:
+        if not clients:
+            raise ValueError("LlmWorkerPool needs at least one client")
+        self.clients = list(clients)
+        self._heap: List[Tuple[int, int, Optional[float], Job]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._idle = len(self.clients)
+        self._closed = False
+        self.expired = 0
+        self._threads = [
+            threading.Thread(target=self._work, args=(client,), name=f"llm-worker-{i}",
+                             daemon=True)
+            for i, client in enumerate(self.clients)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def close(self) -> None:
+        """ Stop the workers once the jobs already queued are done. """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _can_start(self) -> bool:
+        if not self._heap:
+            return False
+        priority = self._heap[0][0]
+        return priority == Priority.LIVE or self._idle > 1 or len(self.clients) == 1
+
+    def _work(self, client: LlmClient) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    while not self._can_start():
+                        if self._closed and not self._heap:
+                            return
+                        self._cond.wait()
+                    _, _, deadline, job = heapq.heappop(self._heap)
+                    if deadline is None or time.monotonic() < deadline:
+                        break
+                    self.expired += 1
+                    logging.info("Deadline passed while queued, LLM job dropped")
+                self._idle -= 1
+            try:
+                job(client)
+            except Exception:
+                logging.error("LLM worker job failed", exc_info=True)
+            finally:
+                with self._cond:
+                    self._idle += 1
+                    self._cond.notify_all()
+
+    def submit(self, job: Job, priority: Optional[Priority] = None,
+               deadline: Optional[float] = None) -> None:
+        """
+        Queue `job`, at the calling context's priority by default. It is
+        dropped if no worker picks it up before `deadline`.
+        """
+        if priority is None:
+            priority = request_priority.get()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("LlmWorkerPool is closed")
+            heapq.heappush(self._heap, (int(priority), next(self._seq), deadline, job))
+            self._cond.notify_all()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> str:
+        future: "Future[str]" = Future()
+
+        def job(client: LlmClient) -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(client.generate(prompt, max_tokens, stop, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        deadline: Optional[float] = kwargs.get("deadline")
+        self.submit(job, deadline=deadline)
+        try:
+            return future.result(_remaining(deadline))
+        except FutureTimeout:
+            future.cancel()
+            logging.info("No LLM result before the deadline, nothing generated")
+            return ""
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 127,
+        stop: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Stream from whichever worker picks the job up. Closing the returned
+        iterator, or reaching `deadline`, stops that worker's generation at
+        its next piece.
+        """
+        pieces: "queue.Queue[Union[str, object, BaseException]]" = queue.Queue()
+        cancel = threading.Event()
+
+        def job(client: LlmClient) -> None:
+            try:
+                stream = client.stream(prompt, max_tokens, stop, **kwargs)
+                try:
+                    for piece in stream:
+                        if cancel.is_set():
+                            break
+                        pieces.put(piece)
+                finally:
+                    close = getattr(stream, "close", None)
+                    if close is not None:
+                        close()
+                pieces.put(_END)
+            except BaseException as exc:
+                pieces.put(exc)
+
+        deadline: Optional[float] = kwargs.get("deadline")
+        self.submit(job, deadline=deadline)
+        try:
+            while True:
+                try:
+                    item = pieces.get(timeout=_remaining(deadline))
+                except queue.Empty:
+                    logging.info("Generation stopped at its deadline")
+                    return
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                assert isinstance(item, str)
+                yield item
+        finally:
+            cancel.set()
+
+    def prime(self, prefix: str) -> None:
+        """
+        Prime every worker's client. The first one goes alone, so a
+        persisted prefix state it writes is reused by the others.
+        """
+        first, *rest = self.clients
+        first.prime(prefix)
+        if rest:
+            with ThreadPoolExecutor(max_workers=len(rest)) as pool:
+                list(pool.map(lambda client: client.prime(prefix), rest))
+
+
+def build_pool(factory: Callable[[], LlmClient], workers: int) -> LlmClient:
+    """ A single client for one worker, otherwise a pool of `workers` clients. """
+    if workers <= 1:
+        return factory()
+    return LlmWorkerPool([factory() for _ in range(workers)])
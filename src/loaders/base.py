@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
+import numpy as np
+from numpy.typing import NDArray
+from src.utils.buffer import BytesLike
 
 class ByteSource(ABC):
     @abstractmethod
-    def read(self, offset: int, size: int) -> bytes:
+    def read(self, offset: int, size: int) -> BytesLike:
         ...
 
     @abstractmethod
@@ -24,3 +27,36 @@ class ByteSource(ABC):
     @abstractmethod
     def read_pointer(self, offset: int, base_address: int = 0x08000000) -> int:
         ...
+
+    def _read_array(self, offset: int, count: int, width: int, stride: int,
+                    little_endian: bool) -> NDArray[np.generic]:
+        """
+        Read `count` unsigned integers of `width` bytes, `stride` bytes
+        apart, with one `read` of the covering range. The result is a
+        native-endian copy, so it never pins the source buffer.
+        """
+        if count < 0 or stride < width:
+            raise ValueError(f"Invalid array read: count={count}, stride={stride}")
+        dtype = np.dtype(f"{'<' if little_endian else '>'}u{width}")
+        if count == 0:
+            return np.empty(0, dtype=dtype.newbyteorder("="))
+        buf = self.read(offset, (count - 1) * stride + width)
+        view: NDArray[np.generic] = np.ndarray((count,), dtype=dtype, buffer=buf,
+                                               strides=(stride,))
+        return view.astype(dtype.newbyteorder("="))
+
+    def read_u16_array(self, offset: int, count: int, *, stride: int = 2,
+                       little_endian: bool = True) -> NDArray[np.uint16]:
+        """ `count` u16 values starting at `offset`, one every `stride` bytes. """
+        return self._read_array(offset, count, 2, stride, little_endian).view(np.uint16)
+
+    def read_u32_array(self, offset: int, count: int, *, stride: int = 4,
+                       little_endian: bool = True) -> NDArray[np.uint32]:
+        """ `count` u32 values starting at `offset`, one every `stride` bytes. """
+        return self._read_array(offset, count, 4, stride, little_endian).view(np.uint32)
+
+    def read_pointers(self, offset: int, count: int, *, stride: int = 4,
+                      base_address: int = 0x08000000) -> NDArray[np.int64]:
+        """ Bulk `read_pointer`: ROM offsets of `count` pointers, `stride` bytes apart. """
+        words = self.read_u32_array(offset, count, stride=stride)
+        return words.astype(np.int64) - base_address
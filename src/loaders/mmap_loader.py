@@ -0,0 +1,71 @@
+import logging
+import mmap
+import os
+from struct import Struct
+from types import TracebackType
+from typing import Optional, Type
+from src.loaders.base import ByteSource
+
+_U16 = {True: Struct('<H'), False: Struct('>H')}
+_U32 = {True: Struct('<I'), False: Struct('>I')}
+
+class MmapRomLoader(ByteSource):
+    """
+    ByteSource backed by a read-only mmap of the ROM.
+
+    `read` returns memoryview slices of the map, so nothing is copied and
+    every process mapping the same ROM shares the OS page cache. Views
+    handed out by `read` keep the map alive; drop them before `close`.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"ROM file not found: {path}")
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def __enter__(self) -> "MmapRomLoader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            logging.info("ROM map still referenced by a view, closing deferred")
+
+    def size(self) -> int:
+        return len(self._map)
+
+    def _check(self, offset: int, size: int) -> None:
+        if offset < 0 or offset + size > len(self._map):
+            raise IndexError(f"Attempted out-of-bounds read at offset {offset}")
+
+    def read(self, offset: int, size: int) -> memoryview:
+        self._check(offset, size)
+        return self._view[offset: offset + size]
+
+    def read_u8(self, offset: int) -> int:
+        self._check(offset, 1)
+        return self._map[offset]
+
+    def read_u16(self, offset: int, *, little_endian: bool = True) -> int:
+        self._check(offset, 2)
+        return int(_U16[little_endian].unpack_from(self._map, offset)[0])
+
+    def read_u32(self, offset: int, *, little_endian: bool = True) -> int:
+        self._check(offset, 4)
+        return int(_U32[little_endian].unpack_from(self._map, offset)[0])
+
+    def read_pointer(self, offset: int, base_address: int = 0x08000000) -> int:
+        ptr = self.read_u32(offset, little_endian=True)
+        return ptr - base_address
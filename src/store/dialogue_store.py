@@ -0,0 +1,215 @@
+"""
+Memory-mapped binary dialogue store.
+
+Maps raw Gen3 bytes to the ROM offset they were found at and a value
+(the decoded text for the extractor, an encoded rewrite for other
+writers). Opening a store only maps the file and reads its header; a
+lookup hashes the key and probes a fixed-size index, so answering an IPC
+payload costs the same whatever the size of the text bank.
+
+Layout (little-endian):
+
+    header   magic "FRDS", version u16, reserved u16,
+             count u32, slots u32, blob offset u32
+    entries  count x (crc32 u32, rom offset u32,
+                      key pos u32, key len u32, value pos u32, value len u32)
+             sorted by ROM offset
+    index    slots x u32, entry number + 1 or 0 for an empty slot,
+             open addressing with linear probing
+    blob     keys and values, positions relative to the blob offset
+
+Keys are stored without their trailing terminator, the way the Lua hook
+reads the dialog buffer.
+"""
+import logging
+import mmap
+import os
+import zlib
+from pathlib import Path
+from struct import Struct
+from types import TracebackType
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Type
+from src.utils.buffer import BytesLike
+
+STORE_MAGIC = b"FRDS"
+STORE_VERSION = 1
+
+_HEADER = Struct("<4sHHIII")
+_ENTRY = Struct("<IIIIII")
+_SLOT = Struct("<I")
+_TERMINATORS = (0xFB, 0xFF)
+
+
+class StoreEntry(NamedTuple):
+    offset: int
+    key: bytes
+    value: bytes
+
+
+def store_key(raw: BytesLike) -> bytes:
+    """ Normalize raw Gen3 bytes to a store key: one trailing terminator dropped. """
+    key = bytes(raw)
+    if key and key[-1] in _TERMINATORS:
+        key = key[:-1]
+    return key
+
+
+def _slot_count(count: int) -> int:
+    # power of two, at most half full
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+class DialogueStoreWriter:
+    """
+    Collect entries and write the store file on close.
+
+    The first entry added for a key wins. The file is written to a temp
+    name and renamed, so readers never see a partial store; leaving the
+    `with` block on an exception writes nothing.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: List[Tuple[int, bytes, bytes]] = []
+        self._keys: set[bytes] = set()
+
+    def __enter__(self) -> "DialogueStoreWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, offset: int, raw: BytesLike, value: bytes) -> bool:
+        """ Add an entry; returns False when the key is already stored. """
+        key = store_key(raw)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self._entries.append((offset, key, value))
+        return True
+
+    def close(self) -> None:
+        entries = sorted(self._entries, key=lambda e: e[0])
+        slots = _slot_count(len(entries))
+        index = [0] * slots
+        table = bytearray()
+        blob = bytearray()
+        for number, (offset, key, value) in enumerate(entries):
+            crc = zlib.crc32(key)
+            slot = crc & (slots - 1)
+            while index[slot]:
+                slot = (slot + 1) & (slots - 1)
+            index[slot] = number + 1
+            table += _ENTRY.pack(crc, offset, len(blob), len(key),
+                                 len(blob) + len(key), len(value))
+            blob += key
+            blob += value
+        blob_offset = _HEADER.size + len(table) + slots * _SLOT.size
+
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(STORE_MAGIC, STORE_VERSION, 0,
+                                 len(entries), slots, blob_offset))
+            f.write(table)
+            f.write(b"".join(_SLOT.pack(n) for n in index))
+            f.write(blob)
+        os.replace(tmp_path, self.path)
+        logging.info("%d entries written to store %s", len(entries), self.path)
+
+
+class DialogueStore:
+    """ Read-only mmap view of a store file written by DialogueStoreWriter. """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, slots, blob_offset = _HEADER.unpack_from(self._map)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            self._map.close()
+            raise ValueError(f"Not a version {STORE_VERSION} dialogue store: {path}")
+        self._count = int(count)
+        self._mask = slots - 1
+        self._index_offset = _HEADER.size + count * _ENTRY.size
+        self._blob_offset = blob_offset
+
+    def __enter__(self) -> "DialogueStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[StoreEntry]:
+        for number in range(self._count):
+            yield self.entry(number)
+
+    def entry(self, number: int) -> StoreEntry:
+        """ Entry `number` in ROM offset order. """
+        if not 0 <= number < self._count:
+            raise IndexError(f"Store entry {number} out of range")
+        _, offset, key_pos, key_len, value_pos, value_len = _ENTRY.unpack_from(
+            self._map, _HEADER.size + number * _ENTRY.size)
+        blob = self._blob_offset
+        return StoreEntry(
+            offset,
+            self._map[blob + key_pos: blob + key_pos + key_len],
+            self._map[blob + value_pos: blob + value_pos + value_len],
+        )
+
+    def find(self, raw: BytesLike) -> int:
+        """ Entry number stored for `raw`, or -1. """
+        key = store_key(raw)
+        crc = zlib.crc32(key)
+        slot = crc & self._mask
+        blob = self._blob_offset
+        while True:
+            number = _SLOT.unpack_from(self._map, self._index_offset + slot * _SLOT.size)[0]
+            if not number:
+                return -1
+            stored_crc, _, key_pos, key_len, _, _ = _ENTRY.unpack_from(
+                self._map, _HEADER.size + (number - 1) * _ENTRY.size)
+            if (stored_crc == crc and key_len == len(key)
+                    and self._map[blob + key_pos: blob + key_pos + key_len] == key):
+                return int(number - 1)
+            slot = (slot + 1) & self._mask
+
+    def lookup(self, raw: BytesLike) -> Optional[StoreEntry]:
+        """ Entry stored for the raw Gen3 bytes `raw`, terminated or not. """
+        number = self.find(raw)
+        return None if number < 0 else self.entry(number)
+
+
+def open_store(path: Optional[Path]) -> Optional[DialogueStore]:
+    """ Open the store at `path` when configured and present, else None. """
+    if path is None:
+        return None
+    if not path.is_file():
+        logging.info("Dialogue store %s not found, skipped", path)
+        return None
+    store = DialogueStore(path)
+    logging.info("Dialogue store %s: %d lines", path, len(store))
+    return store
+
@@ -0,0 +1,5 @@
+from typing import Union
+
+# Byte containers accepted end to end by loaders, extractors and codecs.
+# A memoryview lets callers hand over slices of an mmap without copying.
+BytesLike = Union[bytes, bytearray, memoryview]
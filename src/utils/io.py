@@ -1,9 +1,72 @@
+import gzip
 import json
 from pathlib import Path
-from typing import Any
+from types import TracebackType
+from typing import IO, Any, Iterable, Iterator, Optional, Type
 
 def save_json(data: dict[str, Any], path: Path) -> None:
     path.write_text(
         json.dumps(data, ensure_ascii=False, indent=2),
         encoding="utf-8"
     )
+
+class JsonlWriter:
+    """
+    Write one JSON object per line as records arrive.
+
+    Paths ending in `.gz` are gzip-compressed on the fly. With `append`,
+    rows go after the existing ones and each line is flushed as written,
+    so the file can serve as a checkpoint.
+    """
+
+    def __init__(self, path: Path, append: bool = False) -> None:
+        self.path = path
+        self.count = 0
+        self.append = append
+        self._file: IO[str]
+        if path.suffix == ".gz":
+            self._file = gzip.open(path, "at" if append else "wt", encoding="utf-8")
+        else:
+            self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def write(self, row: dict[str, Any]) -> None:
+        self._file.write(json.dumps(row, ensure_ascii=False))
+        self._file.write("\n")
+        if self.append:
+            self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+def load_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Read back rows from a JSON Lines file. A truncated last line, as left
+    by an interrupted writer, is skipped.
+    """
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith("\n"):
+                    raise
+
+def save_jsonl(rows: Iterable[dict[str, Any]], path: Path) -> int:
+    """ Stream `rows` to a JSON Lines file and return how many were written. """
+    with JsonlWriter(path) as writer:
+        for row in rows:
+            writer.write(row)
+    return writer.count
@@ -1,8 +1,126 @@
 import os
+import re
 import sys
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Union
+
+import pytest
 
 # Prepend project root to sys.path so tests can import `src` directly.
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+from src.codecs.gen3 import Gen3TextCodec  # noqa: E402
+from src.config.settings import CharacterCard  # noqa: E402
+from src.llm.base import LlmClient  # noqa: E402
+from src.llm.dialogue_generator import DialogueGenerator  # noqa: E402
+from src.llm.prompt_builder import PromptBuilder  # noqa: E402
+from src.llm.rewriter import MAX_ATTEMPTS, DialogueRewriter  # noqa: E402
+
+# a fixed answer, answers used in turn (the last one forever), or one
+# computed from (prompt, call number starting at 1)
+Answers = Union[str, Sequence[str], Callable[[str, int], str]]
+
+
+class FakeClient(LlmClient):
+    """
+    Stand-in for a model. Streams its answer word by word (" word"
+    pieces), after `gate` opens and `delay` seconds before each piece,
+    and records what it was asked.
+    """
+
+    def __init__(
+        self,
+        answers: Answers = "Fresh rewrite",
+        delay: float = 0.0,
+        gate: Optional[threading.Event] = None,
+        fail_after: Optional[int] = None,
+        prompts: Optional[List[str]] = None,
+    ) -> None:
+        self.answers = answers
+        self.delay = delay
+        self.gate = gate
+        self.fail_after = fail_after
+        # may be shared by the clients of a pool, to see the call order
+        self.prompts = prompts if prompts is not None else []
+        self.kwargs: List[dict] = []
+        self.primed: List[str] = []
+        self.calls = 0
+        self.produced = 0
+        self.active = 0
+        self.peak = 0
+        self.closed = False
+        self.started = threading.Event()
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str, call: int) -> str:
+        if callable(self.answers):
+            return self.answers(prompt, call)
+        if isinstance(self.answers, str):
+            return self.answers
+        return self.answers[min(call, len(self.answers)) - 1]
+
+    def generate(self, prompt, max_tokens=60, stop=None, **kwargs):
+        return "".join(self.stream(prompt, max_tokens, stop, **kwargs))
+
+    def stream(self, prompt, max_tokens=60, stop=None, **kwargs):
+        with self._lock:
+            if self.fail_after is not None and self.calls >= self.fail_after:
+                raise RuntimeError("model crashed")
+            self.calls += 1
+            call = self.calls
+            self.prompts.append(prompt)
+            self.kwargs.append(kwargs)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.started.set()
+        try:
+            if self.gate is not None:
+                assert self.gate.wait(5)
+            for piece in re.findall(r"\s*\S+", self._answer(prompt, call)):
+                if self.delay:
+                    time.sleep(self.delay)
+                with self._lock:
+                    self.produced += 1
+                yield piece
+        finally:
+            with self._lock:
+                self.active -= 1
+            self.closed = True
+
+    def prime(self, prefix):
+        self.primed.append(prefix)
+
+
+@pytest.fixture
+def card():
+    return CharacterCard("Tester", 30, "Pallet Town", ["blunt"], ["Test things"])
+
+
+@pytest.fixture
+def make_client():
+    return FakeClient
+
+
+@pytest.fixture
+def make_rewriter(card):
+    """ DialogueRewriter factory over a client, with an empty few-shot prompt by default. """
+    def make(client, cache=None, max_attempts=MAX_ATTEMPTS, builder=None):
+        generator = DialogueGenerator(client, card, builder or PromptBuilder(few_shot=""))
+        return DialogueRewriter(generator, Gen3TextCodec(), cache, max_attempts)
+    return make
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def wait_for():
+    """ Poll `condition` until it holds, failing after `timeout` seconds. """
+    return _wait_for
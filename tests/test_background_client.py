@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import CacheConfig
+from src.llm.background_client import BackgroundLoadedClient
+from src.llm.rewrite_cache import RewriteCache
+
+PAYLOAD = b"\xbb\xbc\xbd\xbe\xbf\xc0"
+
+
+@pytest.fixture
+def slow_factory(make_client):
+    def slow_factory(gate, made):
+        def factory():
+            assert gate.wait(5)
+            made.append(make_client())
+            return made[-1]
+        return factory
+    return slow_factory
+
+
+def test_requests_pass_through_while_loading(slow_factory, make_rewriter, card):
+    gate, made = threading.Event(), []
+    client = BackgroundLoadedClient(slow_factory(gate, made))
+    cache = RewriteCache(CacheConfig(), "fp")
+    cache.put(b"\xbb\xbb\xbb", b"cached\xff", 1.0)
+    rewriter = make_rewriter(client, cache)
+    generator = rewriter.generator
+
+    generator.prime()
+    assert not client.ready()
+    assert rewriter.rewrite(b"\xbb\xbb\xbb") == b"cached\xff"
+    assert rewriter.rewrite(PAYLOAD) == PAYLOAD + b"\xff"
+    assert rewriter.passed_through == 1
+    assert client.generate("prompt", deadline=time.monotonic() + 0.01) == ""
+
+    gate.set()
+    assert client.wait(5)
+    assert made[0].primed == [generator.builder.prefix(card)]
+    assert rewriter.rewrite(PAYLOAD) == Gen3TextCodec().encode("Fresh rewrite")
+
+
+def test_generation_waits_for_the_model(slow_factory):
+    gate, made = threading.Event(), []
+    client = BackgroundLoadedClient(slow_factory(gate, made))
+    threading.Timer(0.05, gate.set).start()
+    # nothing primed it: the first call starts loading without a warm-up
+    assert "".join(client.stream("prompt")) == "Fresh rewrite"
+    assert made[0].primed == [""]
+    assert client.load_secs > 0
+
+
+def test_load_failure():
+    def factory():
+        raise OSError("no such model")
+    client = BackgroundLoadedClient(factory)
+    client.start()
+    with pytest.raises(RuntimeError):
+        client.wait(5)
+    assert not client.ready()
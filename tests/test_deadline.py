@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import CacheConfig
+from src.ipc.deadline import DeadlineStats, request_deadline
+from src.llm.rewrite_cache import RewriteCache
+
+PAYLOAD = b"\xbb\xbc\xbd\xbe\xbf\xc0"
+# numbered words, streamed one by one
+WORDS = " ".join(f"word{i}" for i in range(100))
+
+
+def test_request_deadline():
+    now = time.monotonic()
+    assert request_deadline("0123abcd", 15.0) == pytest.approx(now + 15.0, abs=0.1)
+    # hook.lua ids carry the second they were written
+    stamp = int(time.time()) - 10
+    assert request_deadline(f"{stamp}_4242", 15.0) == pytest.approx(now + 5.0, abs=1.1)
+    # a clock ahead of ours never extends the timeout
+    assert request_deadline(f"{stamp + 100}_1", 15.0) <= time.monotonic() + 15.0
+
+
+def test_deadline_stats():
+    stats = DeadlineStats()
+    assert stats.record(time.monotonic() + 5)
+    assert not stats.record(time.monotonic() - 1)
+    assert (stats.met, stats.missed) == (1, 1)
+
+
+def test_deadline_cuts_the_stream(make_client, make_rewriter):
+    client = make_client(WORDS, delay=0.01)
+    cache = RewriteCache(CacheConfig(), "fp")
+    rewriter = make_rewriter(client, cache)
+    deadline = time.monotonic() + 0.2
+    data = rewriter.rewrite(PAYLOAD, deadline=deadline)
+    assert time.monotonic() < deadline + 0.1
+    assert client.calls == 1 and [kw.get("deadline") for kw in client.kwargs] == [deadline]
+    # the words streamed so far make the response
+    text = Gen3TextCodec().decode(data).replace("\n", " ").replace("\f", " ")
+    assert text.startswith("word0 word1") and "word99" not in text
+    assert rewriter.deadline_cuts == 1
+    assert not cache.contains(PAYLOAD)
+
+
+def test_expired_deadline_keeps_the_original(make_client, make_rewriter):
+    client = make_client(WORDS)
+    rewriter = make_rewriter(client)
+    assert rewriter.rewrite(PAYLOAD, deadline=time.monotonic() - 1) == PAYLOAD + b"\xff"
+    assert client.calls == 0
+    assert (rewriter.fallbacks, rewriter.deadline_cuts) == (1, 1)
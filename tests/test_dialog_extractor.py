@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from benchmarks.legacy import legacy_extract
+from src.codecs.gen3 import Gen3TextCodec
+from src.extractors.dialog import DialogExtractor
+from src.extractors.parallel import extract_parallel
+from src.loaders.rom_loader import RomLoader
+
+
+@pytest.fixture
+def rom_path(tmp_path):
+    rng = random.Random(99)
+    data = bytearray()
+    for _ in range(300):
+        if rng.random() < 0.1:
+            # long terminator-free run forces the scanner to slide
+            data += bytes(rng.randrange(0xFB) for _ in range(rng.randint(200, 700)))
+        data += bytes(rng.choice(range(0xBB, 0xEF)) for _ in range(rng.randint(0, 60)))
+        data.append(rng.choice([0xFB, 0xFF]))
+    data += bytes(300)
+    path = tmp_path / "rom.gba"
+    path.write_bytes(bytes(data))
+    return path
+
+
+@pytest.mark.parametrize("start, end", [(0, 5000), (17, 9000), (1234, 1300), (50, 50)])
+def test_extract_matches_legacy(rom_path, start, end):
+    loader = RomLoader(str(rom_path))
+    codec = Gen3TextCodec()
+    expected = legacy_extract(loader, codec, start, end)
+    result = DialogExtractor(loader, codec, start, end).extract()
+    assert list(result.items()) == list(expected.items())
+
+
+def test_iter_raw_segments_offsets(rom_path):
+    loader = RomLoader(str(rom_path))
+    extractor = DialogExtractor(loader, Gen3TextCodec(), 0, 5000)
+    for offset, segment in extractor.iter_raw_segments():
+        assert loader.read(offset, len(segment)) == segment
+        assert segment[-1] in (0xFB, 0xFF)
+        assert len(segment) <= 255
+
+
+@pytest.mark.parametrize("count", [1, 2, 7, 50])
+def test_split_range_shards_match_full_scan(rom_path, count):
+    loader = RomLoader(str(rom_path))
+    codec = Gen3TextCodec()
+    extractor = DialogExtractor(loader, codec, 17, 9000)
+    shards = extractor.split_range(count)
+    assert shards[0][0] == 17 and shards[-1][1] == 9000
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+    merged = {}
+    for start, end in shards:
+        merged.update(DialogExtractor(loader, codec, start, end).extract())
+    assert list(merged.items()) == list(extractor.extract().items())
+
+
+def test_extract_parallel_matches_sequential(rom_path):
+    codec = Gen3TextCodec()
+    expected = DialogExtractor(RomLoader(str(rom_path)), codec, 0, 9000).extract()
+    result = extract_parallel(str(rom_path), codec, 0, 9000, jobs=2)
+    assert list(result.items()) == list(expected.items())
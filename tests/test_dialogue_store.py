@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from src.cli.extract_cmd import run_extraction
+from src.config.settings import ExtractConfig
+from src.extractors.dialog import join_paragraphs
+from src.store.dialogue_store import DialogueStore, DialogueStoreWriter, store_key
+
+
+@pytest.fixture
+def lines():
+    rng = random.Random(11)
+    result = {}
+    offset = 0
+    while len(result) < 500:
+        raw = bytes(rng.choice(range(0xBB, 0xEF)) for _ in range(rng.randint(1, 40))) + b"\xff"
+        result.setdefault(raw, offset)
+        offset += len(raw)
+    return result
+
+
+def test_lookup_roundtrip(lines, tmp_path):
+    path = tmp_path / "dialog.store"
+    with DialogueStoreWriter(path) as writer:
+        for raw, offset in lines.items():
+            assert writer.add(offset, raw, raw.hex().encode())
+        assert not writer.add(99, next(iter(lines)), b"dup")
+
+    with DialogueStore(path) as store:
+        assert len(store) == len(lines)
+        offsets = [entry.offset for entry in store]
+        assert offsets == sorted(offsets)
+        for raw, offset in lines.items():
+            entry = store.lookup(raw)
+            assert entry is not None
+            assert entry.offset == offset
+            assert entry.key == store_key(raw)
+            assert entry.value == raw.hex().encode()
+            # IPC payloads arrive without their terminator
+            assert store.lookup(raw[:-1]) == entry
+        assert store.lookup(b"\x01\x02\x03") is None
+        assert store.find(b"") == -1
+
+
+def test_empty_store_and_bad_file(tmp_path):
+    path = tmp_path / "empty.store"
+    DialogueStoreWriter(path).close()
+    with DialogueStore(path) as store:
+        assert len(store) == 0
+        assert store.lookup(b"\xbb\xff") is None
+
+    bogus = tmp_path / "bogus.store"
+    bogus.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        DialogueStore(bogus)
+
+
+def test_writer_discards_on_error(tmp_path):
+    path = tmp_path / "dialog.store"
+    with pytest.raises(RuntimeError):
+        with DialogueStoreWriter(path) as writer:
+            writer.add(0, b"\xbb\xff", b"A")
+            raise RuntimeError("extraction failed")
+    assert not path.exists()
+
+
+def test_join_paragraphs():
+    segments = [
+        (0, b"\xbb\xfb", "A"),
+        (2, b"\xbc\xfb", "B"),
+        (4, b"\xbd\xff", "C"),
+        (10, b"\xbe\xfb", "D"),
+        (20, b"\xbf\xff", "E"),
+    ]
+    assert list(join_paragraphs(segments)) == [
+        (0, b"\xbb\xfb\xbc\xfb\xbd\xff", "A\fB\fC"),
+        (10, b"\xbe\xfb", "D"),
+        (20, b"\xbf\xff", "E"),
+    ]
+
+
+def test_extraction_writes_store(tmp_path):
+    rom = bytes(15) + b"\xff\xbb\xbc\xfb\xbd\xff" + b"\xc2\xc3\xff" + bytes(300)
+    rom_path = tmp_path / "rom.gba"
+    rom_path.write_bytes(rom)
+    store_path = tmp_path / "dialog.store"
+    run_extraction(ExtractConfig(rom_path, tmp_path / "dialog.json", 0, 30,
+                                 cache=False, store_path=store_path))
+
+    with DialogueStore(store_path) as store:
+        assert len(store) == 2
+        entry = store.lookup(b"\xbb\xbc\xfb\xbd")
+        assert entry is not None and entry.offset == 16
+        assert entry.value.decode("utf-8") == "AB\fC"
+        assert store.lookup(b"\xc2\xc3").offset == 21
@@ -0,0 +1,42 @@
+import gzip
+import json
+import random
+
+import pytest
+
+from src.cli.extract_cmd import run_extraction
+from src.config.settings import ExtractConfig
+
+
+@pytest.fixture
+def rom_path(tmp_path):
+    rng = random.Random(5)
+    data = bytearray()
+    for _ in range(200):
+        data += bytes(rng.choice(range(0xBB, 0xEF)) for _ in range(rng.randint(0, 40)))
+        data.append(rng.choice([0xFB, 0xFF]))
+    data += bytes(300)
+    path = tmp_path / "rom.gba"
+    path.write_bytes(bytes(data))
+    return path
+
+
+@pytest.mark.parametrize("cache", [False, True])
+@pytest.mark.parametrize("name", ["dialog.jsonl", "dialog.jsonl.gz"])
+def test_jsonl_output_matches_json_map(rom_path, tmp_path, cache, name):
+    json_cfg = ExtractConfig(rom_path, tmp_path / "dialog.json", 10, 4000, cache=cache)
+    run_extraction(json_cfg)
+    expected = json.loads((tmp_path / "dialog.json").read_text(encoding="utf-8"))
+
+    out = tmp_path / name
+    jsonl_cfg = ExtractConfig(rom_path, out, 10, 4000, cache=cache,
+                              output_format="jsonl")
+    run_extraction(jsonl_cfg)
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(out, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    assert records and all(r["offset"] >= 10 for r in records)
+    offsets = [r["offset"] for r in records]
+    assert offsets == sorted(offsets)
+    assert {r["raw"]: r["text"] for r in records} == expected
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.extractors.cache import ExtractionCache, rom_digest
+from src.extractors.dialog import DialogExtractor, segments_to_map
+from src.loaders.rom_loader import RomLoader
+
+
+@pytest.fixture
+def loader(tmp_path):
+    rng = random.Random(7)
+    data = bytearray()
+    for _ in range(400):
+        if rng.random() < 0.1:
+            data += bytes(rng.randrange(0xFB) for _ in range(rng.randint(200, 600)))
+        data += bytes(rng.choice(range(0xBB, 0xEF)) for _ in range(rng.randint(0, 60)))
+        data.append(rng.choice([0xFB, 0xFF]))
+    data += bytes(300)
+    path = tmp_path / "rom.gba"
+    path.write_bytes(bytes(data))
+    return RomLoader(str(path))
+
+
+def _scan(loader, codec, calls):
+    def scan(pos, end):
+        calls.append(pos)
+        return DialogExtractor(loader, codec, pos, end).iter_segments()
+    return scan
+
+
+def _expected(loader, codec, start, end):
+    return list(DialogExtractor(loader, codec, start, end).extract().items())
+
+
+def test_cache_replays_and_extends(loader, tmp_path):
+    codec = Gen3TextCodec()
+    path = tmp_path / "cache.sqlite"
+    sha1 = rom_digest(loader)
+
+    calls = []
+    cache = ExtractionCache(path, sha1, codec.version)
+    assert cache.is_cold()
+    result = segments_to_map(cache.iter_segments(100, 8000, _scan(loader, codec, calls)))
+    cache.close()
+    assert list(result.items()) == _expected(loader, codec, 100, 8000)
+    assert calls == [100] and cache.hits == 0 and cache.misses > 0
+
+    # unchanged inputs: answered without scanning
+    calls = []
+    cache = ExtractionCache(path, sha1, codec.version)
+    result = segments_to_map(cache.iter_segments(100, 8000, _scan(loader, codec, calls)))
+    assert list(result.items()) == _expected(loader, codec, 100, 8000)
+    assert calls == [] and cache.misses == 0
+
+    # wider range: only the new parts are scanned
+    hits_before = cache.hits
+    for start, end in [(37, 8000), (100, 12000), (50, 12500)]:
+        result = segments_to_map(cache.iter_segments(start, end, _scan(loader, codec, calls)))
+        assert list(result.items()) == _expected(loader, codec, start, end)
+    assert cache.hits > 2 * hits_before
+    cache.close()
+
+
+def test_cache_keyed_by_rom_and_codec(loader, tmp_path):
+    codec = Gen3TextCodec()
+    path = tmp_path / "cache.sqlite"
+    cache = ExtractionCache(path, rom_digest(loader), codec.version)
+    list(cache.iter_segments(0, 2000, _scan(loader, codec, [])))
+    cache.close()
+
+    assert not ExtractionCache(path, rom_digest(loader), codec.version).is_cold()
+    assert ExtractionCache(path, "0" * 40, codec.version).is_cold()
+    assert ExtractionCache(path, rom_digest(loader), "other-codec").is_cold()
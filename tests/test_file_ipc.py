@@ -166,3 +166,68 @@ def test_write_response_permissions(config_path, tmp_path):
     perm = stat.S_IMODE(out.stat().st_mode)
     assert perm == 0o600, f"expected 0o600, got {oct(perm)}"
 
+
+
+@pytest.mark.parametrize("watch", [True, False])
+def test_wait_for_request(config_path, tmp_path, watch):
+    settings = load_settings(config_path);
+    ipc_dir = tmp_path / "ipc_wait"
+    ipc_dir.mkdir()
+    settings.ipc.ipc_dir = Path(ipc_dir)
+    backend = FileIpcBackend(settings)
+    backend.init()
+    if not watch:
+        backend.close()  # falls back to polling
+    elif backend._watcher is None:
+        pytest.skip("inotify unavailable")
+
+    start = time.monotonic()
+    assert backend.wait_for_request(0.1) is None
+    assert time.monotonic() - start >= 0.1
+
+    # our own responses do not count as requests
+    backend.write_response("other", b"out")
+    timer = threading.Timer(0.1, atomic_write_request, (ipc_dir, "late", b"payload"))
+    timer.start()
+    assert backend.wait_for_request(5.0) == ("late", b"payload")
+    timer.join()
+    # a request already there is returned at once
+    atomic_write_request(ipc_dir, "early", b"x")
+    assert backend.wait_for_request(0.0) == ("early", b"x")
+    backend.close()
+
+
+def test_list_pending_lists_every_response(config_path, tmp_path):
+    settings = load_settings(config_path);
+    settings.ipc.ipc_dir = tmp_path / "ipc_pending"
+    backend = FileIpcBackend(settings)
+    backend.init()
+    (settings.ipc.ipc_dir / "unrelated.txt").write_bytes(b"x")
+    for req_id in ("a", "b", "c"):
+        backend.write_response(req_id, b"out")
+    assert sorted(backend.list_pending()) == ["a", "b", "c"]
+    backend.close()
+
+
+def test_stale_cleanup_runs_on_its_timer(config_path, tmp_path):
+    settings = load_settings(config_path);
+    ipc_dir = tmp_path / "ipc_timer"
+    settings.ipc.ipc_dir = ipc_dir
+    backend = FileIpcBackend(settings)
+    backend.init()
+    old_time = time.time() - 3600
+    orphan = ipc_dir / f"{IPC_OUT_PREFIX}orphan{IPC_SUFFIX}"
+    orphan.write_bytes(b"x")
+    os.utime(orphan, (old_time, old_time))
+    atomic_write_request(ipc_dir, "stale", b"x")
+    os.utime(ipc_dir / f"{IPC_IN_PREFIX}stale{IPC_SUFFIX}", (old_time, old_time))
+    atomic_write_request(ipc_dir, "fresh", b"y")
+
+    # a stale request is never served, other files wait for the sweep
+    assert backend.read_request() == ("fresh", b"y")
+    assert backend.read_request() is None
+    assert orphan.exists()
+    backend._next_cleanup = 0.0
+    assert backend.read_request() is None
+    assert not any(ipc_dir.iterdir())
+    backend.close()
@@ -1,4 +1,7 @@
+import random
+
 import pytest
+from benchmarks.legacy import legacy_decode, legacy_encode
 from src.codecs.gen3 import Gen3TextCodec
 
 @pytest.mark.parametrize("plaintext", [
@@ -21,3 +24,59 @@ def test_encode_decode_roundtrip(plaintext):
     # Compare lowercase for case-insensitive match (tables map A-Z ↔ a-z)
     assert plaintext.lower() == normalized.lower()
 
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\xff",
+    b"\xbb\xd5\xff\xbc",            # stops at the terminator
+    b"\xbb\xfc",                     # 0xFC as last byte
+    b"\xfc\xff\xbb\xff",             # 0xFC swallows a terminator
+    b"\xfc\xfc\xbb",
+    b"\xfc\x10\x00\xfc\x11\xfc\x0c\xfc\x42",
+    b"\x01\xfa\xbb\xfe\xfb\x0c\xff",  # unknown byte, empty glyph, controls
+])
+def test_decode_matches_legacy(data):
+    codec = Gen3TextCodec()
+    assert codec.decode(data) == legacy_decode(data)
+
+
+def test_decode_many_matches_decode():
+    rng = random.Random(1234)
+    chunks = [bytes(rng.randrange(256) for _ in range(rng.randint(0, 40)))
+              for _ in range(500)]
+    codec = Gen3TextCodec()
+    expected = [legacy_decode(c) for c in chunks]
+    assert [codec.decode(c) for c in chunks] == expected
+    assert codec.decode_many(chunks) == expected
+    assert codec.decode_many([]) == []
+
+
+def _random_text(rng: random.Random) -> str:
+    alphabet = "abcXYZ019 .,!?'\"-…é♂♀\n\f\t{}ÄŸ￾"
+    words = [rng.choice(["{PLAYER}", "{RIVAL}", "{PLAY", "}"])
+             if rng.random() < 0.1 else
+             "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+             for _ in range(rng.randint(0, 12))]
+    return "".join(words)
+
+
+def test_encode_matches_legacy():
+    rng = random.Random(4321)
+    texts = [_random_text(rng) for _ in range(500)]
+    codec = Gen3TextCodec()
+    expected = [legacy_encode(t) for t in texts]
+    assert [codec.encode(t) for t in texts] == expected
+    assert codec.encode_many(texts) == expected
+    assert codec.encode_many([]) == []
+
+
+@pytest.mark.parametrize("max_len", [2, 3, 10, 255])
+def test_encode_truncation_never_overflows(max_len):
+    codec = Gen3TextCodec()
+    for text in ["a" * 300, "{PLAYER}" * 200, "a" + "{RIVAL}" * 200]:
+        encoded = codec.encode(text, max_len=max_len)
+        assert len(encoded) <= max_len
+        assert encoded.endswith(b"\xff")
+        # a control code is never cut in half
+        assert not encoded[:-1].endswith(b"\xfc")
+    assert codec.encode("a" * 300, max_len=max_len) == legacy_encode("a" * 300, max_len)
@@ -0,0 +1,48 @@
+import re
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.llm.grammar import CLOSING_QUOTE, allowed_glyphs, build_gbnf, placeholders
+
+
+def _rules(gbnf):
+    return dict(line.split(" ::= ", 1) for line in gbnf.splitlines())
+
+
+def test_glyphs_encode_without_unknowns():
+    codec = Gen3TextCodec()
+    glyphs = allowed_glyphs()
+    assert {"A", "z", "0", " ", "!", "é", "…"} <= set(glyphs)
+    assert not {"\n", "\f", "“", "”", "~"} & set(glyphs)
+    for glyph in glyphs:
+        encoded = codec.encode(glyph)
+        assert len(encoded) == 2 and encoded[0] != 0x50, glyph
+    assert placeholders() == ["{PLAYER}", "{RIVAL}"]
+    assert codec.encode("{PLAYER}") == b"\xfc\x10\xff"
+
+
+def test_grammar_rules():
+    rules = _rules(build_gbnf(5, 255))
+    assert rules["root"] == f'lead lead lead lead lead tail0 "{CLOSING_QUOTE}"'
+    solid = rules["solid"]
+    for glyph in allowed_glyphs():
+        escaped = f"\\u{ord(glyph):04X}"
+        if glyph == " ":
+            assert escaped not in solid and rules["space"] == f"[{escaped}]"
+        else:
+            assert escaped in solid
+    assert solid.endswith('| "{PLAYER}" | "{RIVAL}"')
+    # five leads of up to two glyphs, then up to 245 more
+    tails = [name for name in rules if name.startswith("tail")]
+    assert len(tails) == 245
+    assert rules["tail244"] == "glyph?"
+    assert not re.search(r"\{\d", "\n".join(rules.values()))
+
+
+def test_grammar_bounds():
+    assert "tail0" not in build_gbnf(3, 6)
+    with pytest.raises(ValueError):
+        build_gbnf(0, 10)
+    with pytest.raises(ValueError):
+        build_gbnf(10, 5)
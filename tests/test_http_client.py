@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.config.settings import LlmConfig
+from src.llm.http_client import HttpLlmClient
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """ Minimal /v1/completions: echoes the prompt reversed, word by word when streaming. """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.bodies.append(body)
+            server.ports.append(self.client_address[1])
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.header_delay)
+            if self.path != "/v1/completions":
+                self._send(404, b"not found")
+            elif body["prompt"] == "fail":
+                self._send(500, b"model crashed")
+            elif body["stream"]:
+                self._stream(body["prompt"][::-1].split(" "))
+            else:
+                time.sleep(server.delay)
+                reply = {"choices": [{"text": " " + body["prompt"][::-1] + " "}]}
+                self._send(200, json.dumps(reply).encode())
+        finally:
+            with server.lock:
+                server.active -= 1
+        if server.close_after:
+            self.close_connection = True
+
+    def _send(self, status, data):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, words):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [json.dumps({"choices": [{"text": w + " "}]}) for w in words] + ["[DONE]"]
+        try:
+            for event in events:
+                data = f"data: {event}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+                time.sleep(self.server.delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.bodies, httpd.ports = [], []
+    httpd.active = httpd.peak = 0
+    httpd.delay = httpd.header_delay = 0.0
+    httpd.close_after = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(server, **kwargs):
+    cfg = LlmConfig(model_path=Path("unused"), grammar=False,
+                    api_url=f"http://127.0.0.1:{server.server_address[1]}/v1", **kwargs)
+    return HttpLlmClient(cfg)
+
+
+def test_generate_reuses_the_connection(server):
+    client = _client(server, api_model="tiny", api_key="secret")
+    assert client.generate("olleh") == "hello"
+    assert client.generate("dlrow") == "world"
+    assert client.connections_opened == 1 and len(set(server.ports)) == 1
+    body = server.bodies[0]
+    assert body["model"] == "tiny" and body["stop"] == ["\n"] and not body["stream"]
+    assert body["temperature"] == 1.2 and "grammar" not in body
+    client.close()
+
+
+def test_stream_events(server):
+    client = _client(server)
+    assert list(client.stream("c b a")) == ["a ", "b ", "c "]
+    # the stream was read to the end, so its connection serves the next call
+    assert client.generate("ko") == "ok"
+    assert client.connections_opened == 1
+
+    # a stream closed early leaves its connection unusable
+    pieces = client.stream("c b a")
+    assert next(pieces) == "a "
+    pieces.close()
+    assert client.generate("ko") == "ok"
+    assert client.connections_opened == 2
+    client.close()
+
+
+def test_stream_stops_at_deadline(server):
+    server.delay = 0.05
+    client = _client(server)
+    start = time.monotonic()
+    text = client.generate(" ".join("x" * 100), deadline=start + 0.2)
+    assert time.monotonic() - start < 1.0
+    assert 0 < len(text.split()) < 20
+    assert list(client.stream("late", deadline=time.monotonic() - 1)) == []
+    client.close()
+
+
+def test_deadline_before_the_response(server):
+    server.header_delay = 0.5
+    client = _client(server)
+    start = time.monotonic()
+    assert client.generate("slow", deadline=start + 0.1) == ""
+    assert list(client.stream("slow", deadline=time.monotonic() + 0.1)) == []
+    assert time.monotonic() - start < 0.5
+    server.header_delay = 0.0
+    # a failing request ends the completion too, rather than raising
+    assert client.generate("fail", deadline=time.monotonic() + 5.0) == ""
+    assert client.generate("ko", deadline=time.monotonic() + 5.0) == "ok"
+    client.close()
+
+
+def test_errors_and_stale_connections(server):
+    client = _client(server)
+    with pytest.raises(RuntimeError, match="500"):
+        client.generate("fail")
+    # the server hangs up after each response; the pooled connection is retried
+    server.close_after = True
+    assert client.generate("a") == "a"
+    assert client.generate("b") == "b"
+    client.close()
+
+
+def test_concurrency_is_bounded(server):
+    server.delay = 0.05
+    client = _client(server, workers=2)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(client.generate(f"{i}")))
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [str(i) for i in range(6)]
+    assert server.peak == 2
+    assert client.connections_opened == 2
+    client.close()
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.cli.ipc_cmd import IpcPipeline, _Request
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import (CacheConfig, ExtractConfig, IpcConfig, LlmConfig,
+                                 PrefetchConfig, Settings)
+from src.ipc.service import IpcService
+from src.ipc.socket_client import SocketIpcClient
+from src.llm.prefetcher import Prefetcher
+from src.llm.rewrite_cache import RewriteCache
+from src.llm.rewriter import DialogueRewriter
+from src.store.dialogue_store import DialogueStore, DialogueStoreWriter
+
+codec = Gen3TextCodec()
+
+
+@pytest.fixture
+def client(make_client):
+    """ Streams its rewrite once `client.gate` is set. """
+    return make_client("Well well then", gate=threading.Event())
+
+
+@pytest.fixture
+def make_settings(tmp_path, card):
+    def make(workers=1, depth=4):
+        return Settings(
+            extract=ExtractConfig(Path("rom.gba"), Path("out.json"), 0, 0),
+            llm=LlmConfig(model_path=Path("model.gguf"), workers=workers),
+            character=card,
+            ipc=IpcConfig(ipc_dir=tmp_path / "ipc", backend="socket", pipeline_depth=depth),
+        )
+    return make
+
+
+@pytest.fixture
+def start(make_settings, client, make_rewriter, wait_for):
+    """ Run a pipeline over the socket backend on a thread. """
+    running = []
+
+    def start(workers=1, depth=4, model=None):
+        settings = make_settings(workers, depth)
+        service = IpcService.from_settings(settings)
+        pipeline = IpcPipeline(settings, service, make_rewriter(model or client))
+        thread = threading.Thread(target=asyncio.run, args=(pipeline.run(),))
+        thread.start()
+        running.append((pipeline, thread, service))
+        return pipeline, service._backend.address
+
+    yield start
+    client.gate.set()
+    for pipeline, thread, service in running:
+        wait_for(lambda: pipeline._task is not None)
+        pipeline.stop()
+        thread.join(5.0)
+        service.close()
+
+
+def test_generations_overlap(start, client, wait_for):
+    pipeline, address = start(workers=2)
+    with SocketIpcClient(address, timeout=5.0) as player:
+        ids = [player.send(codec.encode(f"Line {i}")) for i in range(4)]
+        wait_for(lambda: client.active == 2)
+        client.gate.set()
+        responses = [player.wait(req_id) for req_id in ids]
+    assert all(r.startswith(codec.encode("Well well then")[:-1]) for r in responses)
+    assert client.peak == 2
+    assert pipeline.deadlines.met == 4 and pipeline.generate_stats.items == 4
+
+
+def test_backpressure_and_expired_requests(start, client, wait_for):
+    pipeline, address = start(workers=1, depth=1)
+    with SocketIpcClient(address, timeout=5.0) as player:
+        first = player.send(codec.encode("First"))
+        wait_for(lambda: client.active == 1)
+        # its emulator already gave up: dropped instead of generated
+        player.send(codec.encode("Stale"), "1_stale")
+        later = [player.send(codec.encode(f"Later {i}")) for i in range(3)]
+        time.sleep(0.1)
+        # one request queued, one held by the reader, the rest left in the backend
+        assert pipeline.generate_stats.peak <= 1
+        assert pipeline.service._backend._requests.qsize() == 2
+        client.gate.set()
+        for req_id in [first, *later]:
+            player.wait(req_id)
+    assert pipeline.expired == 1 and client.calls == 4
+
+
+def test_failed_rewrite_answers_with_the_original(start, make_client):
+    def answer(prompt, call):
+        if "Broken" in prompt:
+            raise RuntimeError("model crashed")
+        return "Well well then"
+
+    pipeline, address = start(model=make_client(answer))
+    with SocketIpcClient(address, timeout=5.0) as player:
+        broken = codec.encode("Broken")
+        assert player.request(broken) == DialogueRewriter.original(broken)
+        assert player.request(codec.encode("Fine")).startswith(codec.encode("Well")[:-1])
+    assert pipeline.failed == 1 and pipeline.deadlines.met == 2
+
+
+def test_stop_finishes_running_generations(start, client, wait_for):
+    pipeline, address = start(workers=1, depth=4)
+    with SocketIpcClient(address, timeout=5.0) as player:
+        running = player.send(codec.encode("Running"))
+        wait_for(lambda: client.active == 1)
+        player.send(codec.encode("Queued"))
+        wait_for(lambda: pipeline.generate_stats.items == 2)
+        pipeline.stop()
+        time.sleep(0.05)
+        client.gate.set()
+        assert player.wait(running).startswith(codec.encode("Well")[:-1])
+    wait_for(lambda: pipeline.dropped == 1)
+    assert client.calls == 1
+
+
+@pytest.mark.parametrize("signum", [signal.SIGINT, signal.SIGTERM])
+def test_signal_finishes_running_generations(signum, make_settings, client, make_rewriter,
+                                              wait_for):
+    settings = make_settings(workers=1)
+    service = IpcService.from_settings(settings)
+    pipeline = IpcPipeline(settings, service, make_rewriter(client))
+    responses = []
+
+    def play():
+        with SocketIpcClient(service._backend.address, timeout=5.0) as player:
+            running = player.send(codec.encode("Running"))
+            wait_for(lambda: client.active == 1)
+            player.send(codec.encode("Queued"))
+            wait_for(lambda: pipeline.generate_stats.items == 2)
+            os.kill(os.getpid(), signum)
+            time.sleep(0.05)
+            client.gate.set()
+            responses.append(player.wait(running))
+
+    player = threading.Thread(target=play)
+    player.start()
+    try:
+        # in the main thread, where the pipeline handles signals itself
+        asyncio.run(pipeline.run())
+    finally:
+        client.gate.set()
+        player.join(5.0)
+        service.close()
+    assert responses[0].startswith(codec.encode("Well")[:-1])
+    assert pipeline.deadlines.met == 1 and pipeline.dropped == 1
+    assert client.calls == 1
+
+
+def test_second_signal_abandons_running_generations(make_settings, client, make_rewriter,
+                                                   wait_for):
+    settings = make_settings(workers=1)
+    service = IpcService.from_settings(settings)
+    pipeline = IpcPipeline(settings, service, make_rewriter(client))
+
+    def play():
+        with SocketIpcClient(service._backend.address, timeout=5.0) as player:
+            player.send(codec.encode("Running"))
+            wait_for(lambda: client.active == 1)
+            os.kill(os.getpid(), signal.SIGINT)
+            wait_for(lambda: pipeline._stopping)
+            os.kill(os.getpid(), signal.SIGINT)
+
+    player = threading.Thread(target=play)
+    player.start()
+    try:
+        t0 = time.monotonic()
+        # the generation stays blocked on the gate: run returns without it
+        asyncio.run(pipeline.run())
+        assert time.monotonic() - t0 < 2.0
+        assert client.active == 1
+    finally:
+        client.gate.set()
+        player.join(5.0)
+        service.close()
+    assert pipeline.abandoned == 1 and pipeline.deadlines.met == 0
+    # told to stop, it ends at its first piece
+    wait_for(lambda: client.active == 0)
+    assert client.produced <= 1
+
+
+def test_cache_hits_leave_prefetch_running(tmp_path, make_settings, make_client, make_rewriter,
+                                           wait_for):
+    path = tmp_path / "dialog.store"
+    with DialogueStoreWriter(path) as writer:
+        for i, line in enumerate(["Line one", "Line two"]):
+            writer.add(i * 16, codec.encode(line), line.encode("utf-8"))
+    client = make_client("Well well then", delay=0.05)
+    rewriter = make_rewriter(client, RewriteCache(CacheConfig(), "fp"))
+    hit = codec.encode("Seen before")
+    rewriter.cache.put(hit, b"cached\xff", 1.0)
+    with DialogueStore(path) as store:
+        prefetcher = Prefetcher(PrefetchConfig(depth=1), rewriter, store)
+        try:
+            # the pipeline is not running: _rewrite is called as a generation task would
+            pipeline = IpcPipeline(make_settings(), None, rewriter, store, prefetcher=prefetcher)
+            prefetcher.schedule(0)
+            assert client.started.wait(5)
+            request = _Request("1_hit", hit, time.monotonic() + 5, -1)
+            assert pipeline._rewrite(request) == b"cached\xff"
+            wait_for(lambda: prefetcher.prefetched == 1)
+            assert prefetcher.cancelled == 0 and client.calls == 1
+        finally:
+            prefetcher.close()
@@ -0,0 +1,192 @@
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("llama_cpp")
+from src.config.settings import LlmConfig  # noqa: E402
+from src.llm import llama_client  # noqa: E402
+from src.llm.llama_client import LlamaClient  # noqa: E402
+
+
+class FakeLlama:
+    """ Stand-in for llama_cpp.Llama: one token per word, echoing the prompt's words back. """
+
+    def __init__(self, **params):
+        self.params = params
+        self.input_ids = np.zeros(0, dtype=np.intc)
+        self.n_tokens = 0
+        self.evaluated = []
+        self.loaded = []
+        self.calls = []
+        self.streams = []
+
+    def tokenize(self, text):
+        return [zlib.crc32(word) % 32000 for word in text.split()]
+
+    def reset(self):
+        self.n_tokens = 0
+
+    def eval(self, tokens):
+        self.evaluated.append(list(tokens))
+        ids = list(self.input_ids[:self.n_tokens]) + list(tokens)
+        self.input_ids = np.array(ids, dtype=np.intc)
+        self.n_tokens = len(ids)
+
+    def save_state(self):
+        return llama_client.LlamaState(
+            input_ids=self.input_ids.copy(),
+            scores=np.ones((self.n_tokens, 4), dtype=np.single),
+            n_tokens=self.n_tokens,
+            llama_state=b"\x00kv\xff" * 4,
+            llama_state_size=16,
+            seed=7,
+        )
+
+    def load_state(self, state):
+        self.loaded.append(state)
+        self.input_ids = state.input_ids.copy()
+        self.n_tokens = state.n_tokens
+
+    def __call__(self, prompt, max_tokens=16, stop=None, stream=False, **kwargs):
+        self.calls.append({"prompt": prompt, "stream": stream, **kwargs})
+        # the context ends up holding the whole prompt
+        self.reset()
+        self.eval(self.tokenize(prompt.encode()))
+        words = [f" {word}" for word in prompt.split()]
+        if not stream:
+            return {"choices": [{"text": "".join(words)}]}
+        return self._stream(words)
+
+    def _stream(self, words):
+        record = {"produced": 0, "closed": False}
+        self.streams.append(record)
+        try:
+            for word in words:
+                record["produced"] += 1
+                yield {"choices": [{"text": word}]}
+        finally:
+            record["closed"] = True
+
+
+class FakeGrammar:
+    def __init__(self):
+        self.resets = 0
+
+    @classmethod
+    def from_string(cls, text, verbose=True):
+        return cls()
+
+    def reset(self):
+        self.resets += 1
+
+
+@pytest.fixture
+def make_llama(monkeypatch, tmp_path):
+    monkeypatch.setattr(llama_client, "Llama", FakeLlama)
+    monkeypatch.setattr(llama_client, "LlamaGrammar", FakeGrammar)
+
+    def make(**cfg):
+        cfg.setdefault("prefix_state_path", tmp_path / "prefix_state.bin")
+        return LlamaClient(LlmConfig(model_path=Path("model.gguf"), **cfg))
+    return make
+
+
+def test_prefix_is_evaluated_once_and_restored(make_llama):
+    client = make_llama()
+    llm = client.llm
+    client.prime("You are Tester.")
+    assert llm.evaluated == [llm.tokenize(b"You are Tester.")]
+
+    assert client.generate("You are Tester. Hi") == "You are Tester. Hi"
+    # still in the context: nothing to restore
+    assert client.generate("You are Tester. Bye") == "You are Tester. Bye"
+    assert llm.loaded == []
+    client.generate("Something else")
+    assert llm.loaded == []
+    client.generate("You are Tester. Again")
+    assert len(llm.loaded) == 1
+    assert list(llm.loaded[0].input_ids) == llm.tokenize(b"You are Tester.")
+
+
+def test_prefix_state_file_is_reused(make_llama, tmp_path):
+    first = make_llama()
+    first.prime("You are Tester.")
+    path = tmp_path / "prefix_state.bin"
+    # plain arrays, readable without unpickling anything
+    with np.load(path, allow_pickle=False) as saved:
+        assert saved["llama_state"].tobytes() == b"\x00kv\xff" * 4
+
+    second = make_llama()
+    second.prime("You are Tester.")
+    assert second.llm.evaluated == []
+    state = second.llm.loaded[0]
+    assert list(state.input_ids) == second.llm.tokenize(b"You are Tester.")
+    assert (state.n_tokens, state.llama_state, state.llama_state_size, state.seed) == \
+        (3, b"\x00kv\xff" * 4, 16, 7)
+    assert state.scores.shape == (3, 4)
+
+    # another prompt, or an unreadable file, is evaluated afresh
+    other = make_llama()
+    other.prime("You are Someone.")
+    assert other.llm.loaded == [] and len(other.llm.evaluated) == 1
+    path.write_bytes(b"\x80\x04garbage")
+    broken = make_llama()
+    broken.prime("You are Tester.")
+    assert broken.llm.loaded == [] and len(broken.llm.evaluated) == 1
+
+
+def test_no_prefix_cache(make_llama, tmp_path):
+    client = make_llama(prefix_cache=False)
+    client.prime("You are Tester.")
+    client.generate("You are Tester. Hi")
+    assert client.llm.evaluated == [client.llm.tokenize(b"You are Tester. Hi")]
+    assert not (tmp_path / "prefix_state.bin").exists()
+
+
+def test_closing_the_stream_stops_sampling(make_llama):
+    client = make_llama()
+    stream = client.stream("one two three four")
+    assert next(stream) == " one"
+    stream.close()
+    assert client.llm.streams == [{"produced": 1, "closed": True}]
+    # the context is free again
+    assert client.generate("five") == "five"
+
+
+def test_grammar_is_injected_fresh(make_llama):
+    client = make_llama()
+    grammar = client._grammar
+    client.generate("a b", temperature=0.5)
+    list(client.stream("c d"))
+    assert [call["grammar"] for call in client.llm.calls] == [grammar, grammar]
+    assert client.llm.calls[0]["temperature"] == 0.5
+    assert grammar.resets == 2
+    # a grammar given by the caller wins
+    client.generate("e", grammar=None)
+    assert client.llm.calls[-1]["grammar"] is None and grammar.resets == 2
+
+    plain = make_llama(grammar=False)
+    plain.generate("a b")
+    assert "grammar" not in plain.llm.calls[0]
+
+
+def test_stream_deadline(make_llama):
+    client = make_llama()
+    # the context is busy past the deadline: nothing generated
+    client._lock.acquire()
+    t0 = time.monotonic()
+    assert list(client.stream("a b", deadline=t0 + 0.05)) == []
+    assert time.monotonic() - t0 < 1.0 and client.llm.calls == []
+
+    # freed before the deadline, the stream goes ahead
+    threading.Timer(0.05, client._lock.release).start()
+    assert list(client.stream("a b", deadline=time.monotonic() + 5.0)) == [" a", " b"]
+
+    # reached while sampling, the completion stops there
+    assert list(client.stream("a b c", deadline=time.monotonic())) == [" a"]
+    assert client.llm.streams[-1] == {"produced": 1, "closed": True}
+    assert client.generate("a b c", deadline=time.monotonic()) == "a"
@@ -0,0 +1,54 @@
+import struct
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.extractors.pointers import GBA_ROM_BASE, PointerTextExtractor
+from src.loaders.mmap_loader import MmapRomLoader
+
+TEXT_START = 0x400
+
+
+@pytest.fixture
+def rom(tmp_path):
+    codec = Gen3TextCodec()
+    strings = [codec.encode(t) for t in ["Hello!", "Second line\nhere.", "Unused"]]
+    text = bytearray()
+    offsets = []
+    for raw in strings:
+        offsets.append(TEXT_START + len(text))
+        text += raw
+    data = bytearray(TEXT_START) + text + bytearray(0x100)
+
+    def put_pointer(at, target):
+        data[at: at + 4] = struct.pack("<I", GBA_ROM_BASE + target)
+
+    put_pointer(0x10, offsets[0])
+    put_pointer(0x20, offsets[1])
+    put_pointer(0x24, offsets[0])        # second reference to the same string
+    put_pointer(0x30, offsets[1] + 3)    # lands mid-string: ignored
+    put_pointer(0x40, 0x20)              # outside the text region: ignored
+    path = tmp_path / "rom.gba"
+    path.write_bytes(bytes(data))
+    return path, offsets, strings
+
+
+def test_build_index(rom):
+    path, offsets, _ = rom
+    with MmapRomLoader(str(path)) as loader:
+        extractor = PointerTextExtractor(loader, Gen3TextCodec(),
+                                         TEXT_START, TEXT_START + 0x80)
+        index = extractor.build_index()
+    assert index == {offsets[0]: [0x10, 0x24], offsets[1]: [0x20]}
+
+
+def test_extract_only_pointed_strings(rom):
+    path, _, strings = rom
+    with MmapRomLoader(str(path)) as loader:
+        extractor = PointerTextExtractor(loader, Gen3TextCodec(),
+                                         TEXT_START, TEXT_START + 0x80)
+        result = extractor.extract()
+    assert result == {
+        strings[0].hex(): "Hello!",
+        strings[1].hex(): "Second line\nhere.",
+    }
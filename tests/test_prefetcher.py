@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import CacheConfig, PrefetchConfig
+from src.llm.prefetcher import Prefetcher
+from src.llm.rewrite_cache import RewriteCache
+from src.store.dialogue_store import DialogueStore, DialogueStoreWriter
+
+ANSWER = "Well well well then"
+
+
+@pytest.fixture
+def store(tmp_path):
+    codec = Gen3TextCodec()
+    path = tmp_path / "dialog.store"
+    with DialogueStoreWriter(path) as writer:
+        for i, line in enumerate(["Line one", "Line two", "Line three", "Line four"]):
+            writer.add(i * 16, codec.encode(line), line.encode("utf-8"))
+    with DialogueStore(path) as opened:
+        yield opened
+
+
+@pytest.fixture
+def make_prefetcher(store, make_rewriter):
+    def make(client, depth=2):
+        rewriter = make_rewriter(client, RewriteCache(CacheConfig(), "fp"))
+        return rewriter, Prefetcher(PrefetchConfig(depth=depth), rewriter, store)
+    return make
+
+
+def test_neighbours_are_prefetched_into_cache(store, make_client, make_prefetcher, wait_for):
+    client = make_client(ANSWER)
+    rewriter, prefetcher = make_prefetcher(client)
+    try:
+        prefetcher.schedule(0)
+        wait_for(lambda: prefetcher.prefetched == 2)
+        assert client.calls == 2
+        # entries 1 and 2 are now answered without the model
+        for number in (1, 2):
+            key = store.entry(number).key
+            with prefetcher.live(key):
+                assert rewriter.rewrite(key) is not None
+        assert client.calls == 2
+        assert prefetcher.hits == 2
+        # already cached lines are not queued again
+        prefetcher.schedule(0)
+        time.sleep(0.05)
+        assert client.calls == 2
+    finally:
+        prefetcher.close()
+
+
+def test_live_request_preempts_prefetch(store, make_client, make_prefetcher, wait_for):
+    client = make_client(ANSWER, delay=0.05)
+    rewriter, prefetcher = make_prefetcher(client, depth=1)
+    try:
+        prefetcher.schedule(0)
+        assert client.started.wait(5)
+        key = store.entry(3).key
+        with prefetcher.live(key):
+            wait_for(lambda: prefetcher.cancelled == 1)
+            rewriter.rewrite(key)
+        assert prefetcher.prefetched == 0
+        assert not rewriter.cache.contains(store.entry(1).key)
+    finally:
+        prefetcher.close()
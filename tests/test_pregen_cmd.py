@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from src.cli.extract_cmd import run_extraction
+from src.cli.pregen_cmd import iter_lines, run_pregen
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import ExtractConfig, IpcConfig, LlmConfig, PregenConfig, Settings
+from src.store.dialogue_store import DialogueStore
+from src.utils.format import format_dialogue
+from src.utils.io import load_jsonl
+
+
+def shout(prompt, call):
+    """ Rewrites the line of the prompt as its uppercase. """
+    original = prompt.rsplit("Original: “", 1)[1].split("”", 1)[0]
+    return f"Now {original.upper()}"
+
+
+@pytest.fixture
+def settings(tmp_path, card):
+    rng = random.Random(3)
+    data = bytearray(b"\xff")
+    for _ in range(60):
+        data += bytes(rng.choice(range(0xBB, 0xEF)) for _ in range(rng.randint(3, 30)))
+        data.append(0xFF)
+    data += bytes(300)
+    rom_path = tmp_path / "rom.gba"
+    rom_path.write_bytes(bytes(data))
+    return Settings(
+        extract=ExtractConfig(rom_path, tmp_path / "dialog.json", 0, len(data) - 300,
+                              cache=False),
+        llm=LlmConfig(model_path=tmp_path / "model.gguf"),
+        character=card,
+        ipc=IpcConfig(ipc_dir=tmp_path / "ipc"),
+        pregen=PregenConfig(pack_path=tmp_path / "dialog.pack", workers=3),
+    )
+
+
+def test_pregen_resumes_and_packs(settings, make_client, make_rewriter):
+    codec = Gen3TextCodec()
+    with pytest.raises(RuntimeError):
+        run_pregen(settings, make_rewriter(make_client(shout, fail_after=20)))
+    checkpoint = settings.pregen.pack_path.with_name("dialog.pack.checkpoint.jsonl")
+    done = checkpoint.read_text(encoding="utf-8").splitlines()
+    assert 0 < len(done) <= 20
+    # a crash in the middle of a write leaves half a line behind
+    with open(checkpoint, "a", encoding="utf-8") as f:
+        f.write('{"offset": 1, "payl')
+
+    client = make_client(shout)
+    run_pregen(settings, make_rewriter(client))
+    with DialogueStore(settings.pregen.pack_path) as pack:
+        assert client.calls == len(pack) - len(done)
+        assert len(pack) == 60
+        for entry in pack:
+            original = codec.decode(entry.key)
+            expected = format_dialogue(f"Now {original.upper()}")
+            assert entry.value == codec.encode(expected)
+
+
+def test_pregen_reads_extraction_store(settings, tmp_path, make_client, make_rewriter):
+    settings.extract.store_path = tmp_path / "dialog.store"
+    run_extraction(settings.extract)
+    client = make_client(shout)
+    run_pregen(settings, make_rewriter(client))
+    with DialogueStore(settings.extract.store_path) as store, \
+            DialogueStore(settings.pregen.pack_path) as pack:
+        assert client.calls == len(store) == len(pack)
+        assert [e.key for e in store] == [e.key for e in pack]
+        assert [e.offset for e in store] == [e.offset for e in pack]
+
+
+def test_lines_without_a_rewrite_are_not_packed(settings, make_client, make_rewriter):
+    codec = Gen3TextCodec()
+
+    def short_for_some(prompt, call):
+        answer = shout(prompt, call)
+        # every third line only ever gets a too short rewrite
+        return "no" if len(answer) % 3 == 0 else answer
+
+    run_pregen(settings, make_rewriter(make_client(short_for_some)))
+    with DialogueStore(settings.pregen.pack_path) as pack:
+        packed = {entry.offset for entry in pack}
+    lines = {offset: key for offset, key in iter_lines(settings)}
+    short = {offset for offset, key in lines.items()
+             if len(f"Now {codec.decode(key).upper()}") % 3 == 0}
+    assert short and packed == set(lines) - short
+    checkpoint = settings.pregen.pack_path.with_name("dialog.pack.checkpoint.jsonl")
+    assert {row["offset"] for row in load_jsonl(checkpoint)} == packed
+
+    # a resumed run retries exactly those lines
+    client = make_client(shout)
+    run_pregen(settings, make_rewriter(client))
+    assert client.calls == len(short)
+    with DialogueStore(settings.pregen.pack_path) as pack:
+        assert {entry.offset for entry in pack} == set(lines)
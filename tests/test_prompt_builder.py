@@ -0,0 +1,12 @@
+from src.llm.prompt_builder import PromptBuilder
+
+
+def test_prompt_splits_into_static_prefix_and_line_suffix(card):
+    builder = PromptBuilder(few_shot="Example:\nOriginal: Hi\nRewrite: Yo\n")
+    prefix = builder.prefix(card)
+    for line in ("Hello there!", "Gotta catch ’em all!"):
+        prompt = builder.build(card, line)
+        assert prompt == prefix + builder.suffix(line)
+        assert line not in prefix
+    assert "Tester" in prefix and "Example:" in prefix
+    assert builder.suffix("Hi").endswith("Rewrite: ”")
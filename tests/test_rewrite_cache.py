@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.config.settings import CacheConfig, CharacterCard, LlmConfig
+from src.llm.prompt_builder import PromptBuilder
+from src.llm.rewrite_cache import RewriteCache, rewrite_fingerprint
+
+
+@pytest.fixture
+def builder():
+    return PromptBuilder(few_shot="Example")
+
+
+@pytest.fixture
+def counted_rewriter(builder, make_client, make_rewriter):
+    def make(cache):
+        client = make_client(lambda prompt, call: f"Rewrite number {call}")
+        return client, make_rewriter(client, cache, builder=builder)
+    return make
+
+
+def test_fingerprint_tracks_inputs(card, builder):
+    llm = LlmConfig(model_path="models/a.gguf")
+    base = rewrite_fingerprint(card, builder, llm)
+    assert base == rewrite_fingerprint(card, PromptBuilder(few_shot="Example"), llm)
+    assert base != rewrite_fingerprint(card, PromptBuilder(few_shot="Other"), llm)
+    assert base != rewrite_fingerprint(card, builder, LlmConfig("models/a.gguf", temperature=0.5))
+    other_card = CharacterCard("Tester", 31, "Pallet Town", ["blunt"], ["Test things"])
+    assert base != rewrite_fingerprint(other_card, builder, llm)
+
+
+def test_hits_skip_generation_and_survive_restart(counted_rewriter, tmp_path):
+    cfg = CacheConfig(path=tmp_path / "rewrites.sqlite")
+    payload = Gen3TextCodec().encode("Hello there!")[:-1]
+
+    cache = RewriteCache(cfg, "fp")
+    client, rewriter = counted_rewriter(cache)
+    first = rewriter.rewrite(payload)
+    assert rewriter.rewrite(payload) == first
+    assert client.calls == 1
+    assert (cache.memory_hits, cache.disk_hits, cache.misses) == (1, 0, 1)
+    assert cache.saved_secs > 0
+    cache.close()
+
+    cache = RewriteCache(cfg, "fp")
+    client, rewriter = counted_rewriter(cache)
+    assert rewriter.rewrite(payload) == first
+    assert client.calls == 0 and cache.disk_hits == 1
+    cache.close()
+
+    # another fingerprint does not see those entries
+    cache = RewriteCache(cfg, "other")
+    assert cache.get(payload) is None
+    cache.close()
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = RewriteCache(CacheConfig(max_entries=2, ttl=10), "fp")
+    cache.put(b"a", b"A", 1.0)
+    cache.put(b"b", b"B", 1.0)
+    assert cache.get(b"a") == b"A"
+    cache.put(b"c", b"C", 1.0)
+    # b was the least recently used
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == b"A" and cache.get(b"c") == b"C"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get(b"a") is None
+
+
+def test_disk_cap_keeps_newest(tmp_path, monkeypatch):
+    path = tmp_path / "rewrites.sqlite"
+    cache = RewriteCache(CacheConfig(path=path), "fp")
+    now = time.time()
+    for i in range(5):
+        monkeypatch.setattr(time, "time", lambda: now + i)
+        cache.put(bytes([i]), bytes([i]), 1.0)
+    cache.close()
+
+    cache = RewriteCache(CacheConfig(path=path, disk_max_entries=2), "fp")
+    assert [cache.get(bytes([i])) for i in range(5)] == [None, None, None, b"\x03", b"\x04"]
+    cache.close()
@@ -0,0 +1,89 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.config.settings import ExtractConfig, IpcConfig, LlmConfig, Settings
+from src.ipc.ring import MAX_PAYLOAD, RingFile
+from src.ipc.ring_backend import RingIpcBackend
+from src.ipc.ring_client import RingIpcClient
+from src.ipc.service import IpcService
+
+
+@pytest.fixture
+def settings(tmp_path, card):
+    return Settings(
+        extract=ExtractConfig(Path("rom.gba"), Path("out.json"), 0, 0),
+        llm=LlmConfig(model_path=Path("model.gguf")),
+        character=card,
+        ipc=IpcConfig(ipc_dir=tmp_path / "ipc", backend="ring", ring_slots=4),
+    )
+
+
+def test_round_trips_wrap_around_the_ring(settings):
+    service = IpcService.from_settings(settings)
+    client = RingIpcClient(settings.ipc.ipc_dir / "ipc_ring.bin")
+
+    def serve(count):
+        for _ in range(count):
+            req = service.wait_for_request(5.0)
+            assert req is not None
+            req_id, payload = req
+            service.write_response(req_id, payload[::-1] + b"\xff")
+
+    server = threading.Thread(target=serve, args=(50,))
+    server.start()
+    for i in range(50):
+        payload = bytes([0xBB + i % 26]) * (i % MAX_PAYLOAD + 1)
+        assert client.request(payload, 5.0) == payload[::-1] + b"\xff"
+    server.join()
+    assert service.read_request() is None
+    client.close()
+    service.close()
+
+
+def test_full_rings_and_stale_responses(settings):
+    backend = RingIpcBackend(settings)
+    backend.init()
+    client = RingIpcClient(backend.path)
+    ids = [client.send(bytes([i])) for i in range(4)]
+    with pytest.raises(BufferError):
+        client.send(b"one too many")
+    requests = [backend.read_request() for _ in range(4)]
+    assert requests == [(str(i), bytes([n])) for n, i in enumerate(ids)]
+
+    for req_id in ids:
+        backend.write_response(str(req_id), b"late")
+    backend.write_response("99", b"dropped")  # the emulator left the ring full
+    assert backend.list_pending() == [str(i) for i in ids]
+    # answers to requests the emulator gave up on are skipped
+    assert client.poll(ids[2]) == b"late"
+    assert backend.list_pending() == [str(ids[3])]
+    client.close()
+
+    # a client attaching later skips what is left over; the ring state survives
+    backend.close()
+    backend.init()
+    with RingIpcClient(backend.path) as client:
+        assert backend.list_pending() == []
+        assert client.send(b"next") == ids[-1] + 1
+        assert backend.read_request() == (str(ids[-1] + 1), b"next")
+    backend.close()
+
+
+def test_ring_file_validation(tmp_path):
+    path = tmp_path / "ring.bin"
+    path.write_bytes(b"garbage" * 100)
+    with pytest.raises(ValueError):
+        RingFile.open(path)
+    with pytest.raises(ValueError):
+        RingFile.create(path, 12)
+    ring = RingFile.create(path, 8)
+    assert ring.slots == 8
+    with pytest.raises(ValueError):
+        ring.publish(0, 0, 1, b"x" * (MAX_PAYLOAD + 1))
+    ring.close()
+    # another geometry starts a fresh ring
+    ring = RingFile.create(path, 16)
+    assert ring.slots == 16
+    ring.close()
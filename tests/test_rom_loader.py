@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from src.codecs.gen3 import Gen3TextCodec
+from src.extractors.dialog import DialogExtractor
+from src.loaders.mmap_loader import MmapRomLoader
+from src.loaders.rom_loader import RomLoader
+
+
+@pytest.fixture
+def rom_path(tmp_path):
+    data = bytes(range(256)) * 16 + b"\xc2\xd9\xe0\xe0\xe3\xff" * 50
+    path = tmp_path / "rom.gba"
+    path.write_bytes(data)
+    return path
+
+
+def test_mmap_loader_matches_rom_loader(rom_path):
+    ref = RomLoader(str(rom_path))
+    with MmapRomLoader(str(rom_path)) as loader:
+        assert loader.size() == ref.size()
+        view = loader.read(10, 40)
+        assert isinstance(view, memoryview)
+        assert view == ref.read(10, 40)
+        del view
+        for offset in (0, 1, 255, 4000):
+            assert loader.read_u8(offset) == ref.read_u8(offset)
+            assert loader.read_u16(offset) == ref.read_u16(offset)
+            assert loader.read_u16(offset, little_endian=False) == \
+                ref.read_u16(offset, little_endian=False)
+            assert loader.read_u32(offset) == ref.read_u32(offset)
+            assert loader.read_pointer(offset) == ref.read_pointer(offset)
+
+
+def test_mmap_loader_bounds(rom_path):
+    with MmapRomLoader(str(rom_path)) as loader:
+        with pytest.raises(IndexError):
+            loader.read(loader.size() - 1, 2)
+        with pytest.raises(IndexError):
+            loader.read_u32(loader.size() - 3)
+        with pytest.raises(IndexError):
+            loader.read(-1, 1)
+
+
+def test_extract_over_mmap(rom_path):
+    codec = Gen3TextCodec()
+    end = RomLoader(str(rom_path)).size() - 255
+    expected = DialogExtractor(RomLoader(str(rom_path)), codec, 0, end).extract()
+    with MmapRomLoader(str(rom_path)) as loader:
+        assert DialogExtractor(loader, codec, 0, end).extract() == expected
+    assert "c2d9e0e0e3ff" in expected
+
+
+@pytest.mark.parametrize("little_endian", [True, False])
+@pytest.mark.parametrize("stride", [2, 4, 7])
+def test_bulk_reads_match_scalar_reads(rom_path, little_endian, stride):
+    ref = RomLoader(str(rom_path))
+    with MmapRomLoader(str(rom_path)) as loader:
+        for source in (ref, loader):
+            u16 = source.read_u16_array(3, 100, stride=stride, little_endian=little_endian)
+            assert u16.dtype == np.uint16
+            assert u16.tolist() == [ref.read_u16(3 + i * stride, little_endian=little_endian)
+                                    for i in range(100)]
+            if stride >= 4:
+                u32 = source.read_u32_array(5, 100, stride=stride, little_endian=little_endian)
+                assert u32.dtype == np.uint32
+                assert u32.tolist() == [ref.read_u32(5 + i * stride, little_endian=little_endian)
+                                        for i in range(100)]
+                pointers = source.read_pointers(1, 50, stride=stride)
+                assert pointers.tolist() == [ref.read_pointer(1 + i * stride) for i in range(50)]
+
+
+def test_bulk_reads_bounds(rom_path):
+    with MmapRomLoader(str(rom_path)) as loader:
+        size = loader.size()
+        assert loader.read_u32_array(size - 8, 2).size == 2
+        assert loader.read_u16_array(size, 0).size == 0
+        with pytest.raises(IndexError):
+            loader.read_u32_array(size - 8, 3)
+        with pytest.raises(ValueError):
+            loader.read_u32_array(0, 4, stride=2)
@@ -0,0 +1,112 @@
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.config.settings import ExtractConfig, IpcConfig, LlmConfig, Settings
+from src.ipc.framing import FLAG_RESPONSE, HEADER, decode_body, encode_frame
+from src.ipc.service import IpcService
+from src.ipc.socket_client import SocketIpcClient
+
+
+@pytest.fixture
+def make_settings(tmp_path, card):
+    def make(**ipc):
+        return Settings(
+            extract=ExtractConfig(Path("rom.gba"), Path("out.json"), 0, 0),
+            llm=LlmConfig(model_path=Path("model.gguf")),
+            character=card,
+            ipc=IpcConfig(ipc_dir=tmp_path / "ipc", backend="socket", **ipc),
+        )
+    return make
+
+
+@pytest.fixture(params=["unix", "tcp"])
+def service(request, make_settings):
+    ipc = {"socket_port": 0} if request.param == "tcp" else {}
+    service = IpcService.from_settings(make_settings(**ipc))
+    yield service
+    service.close()
+
+
+def _serve(service, count):
+    for _ in range(count):
+        req = service.wait_for_request(5.0)
+        assert req is not None
+        req_id, payload = req
+        service.write_response(req_id, payload[::-1] + b"\xff")
+
+
+def test_frames():
+    frame = encode_frame("17_3", FLAG_RESPONSE, b"\xbb\xff")
+    id_len, flags, payload_len = HEADER.unpack_from(frame)
+    assert (flags, payload_len) == (FLAG_RESPONSE, 2)
+    assert decode_body(id_len, frame[HEADER.size:]) == ("17_3", b"\xbb\xff")
+    with pytest.raises(ValueError):
+        encode_frame("x" * 256, 0, b"")
+    with pytest.raises(ValueError):
+        encode_frame("x", 0, bytes(0x10000))
+
+
+def test_concurrent_connections(service):
+    address = service._backend.address
+    server = threading.Thread(target=_serve, args=(service, 8 * 20))
+    server.start()
+    results = {}
+
+    def play(n):
+        with SocketIpcClient(address, timeout=5.0) as client:
+            results[n] = [client.request(bytes([n, i])) for i in range(20)]
+
+    clients = [threading.Thread(target=play, args=(n,)) for n in range(8)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    server.join()
+    assert results == {n: [bytes([i, n, 0xFF]) for i in range(20)] for n in range(8)}
+    assert service.read_request() is None
+    assert service.list_pending() == []
+
+
+def test_responses_are_pushed_out_of_order(service):
+    with SocketIpcClient(service._backend.address, timeout=5.0) as client:
+        first = client.send(b"\x01", "1_a")
+        second = client.send(b"\x02", "1_b")
+        assert service.wait_for_request(5.0) == (first, b"\x01")
+        assert service.wait_for_request(5.0) == (second, b"\x02")
+        service.write_response(second, b"two")
+        assert client.receive() == (second, b"two")
+        service.write_response(first, b"one")
+        assert client.wait(first) == b"one"
+
+
+def test_disconnected_client(service):
+    client = SocketIpcClient(service._backend.address, timeout=5.0)
+    req_id = client.send(b"\x01")
+    assert service.wait_for_request(5.0) == (req_id, b"\x01")
+    client.close()
+    time.sleep(0.05)
+    # the answer has nowhere to go and is dropped
+    service.write_response(req_id, b"late")
+    with SocketIpcClient(service._backend.address, timeout=5.0) as other:
+        other_id = other.send(b"\x02")
+        assert service.wait_for_request(5.0) == (other_id, b"\x02")
+        service.write_response(other_id, b"ok")
+        assert other.wait(other_id) == b"ok"
+
+
+def test_socket_file_lifecycle(make_settings):
+    settings = make_settings()
+    path = settings.ipc.ipc_dir / "ipc.sock"
+    path.parent.mkdir(parents=True)
+    # left behind by a crashed session
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    service = IpcService.from_settings(settings)
+    assert path.is_socket() and service.wait_for_request(0.01) is None
+    service.close()
+    assert not path.exists()
@@ -0,0 +1,56 @@
+from src.codecs.gen3 import Gen3TextCodec
+from src.llm.dialogue_generator import take_until_overflow
+from src.llm.rewriter import DIALOG_BUFFER_LEN
+from src.utils.format import format_dialogue
+
+PAYLOAD = b"\xbb\xbc\xbd\xbe\xbf\xc0"
+
+
+def _words(count):
+    return " ".join(f"word{i}" for i in range(count))
+
+
+def test_take_until_overflow_keeps_crossing_piece():
+    pieces = (p for p in ["ab", "cd", "ef", "gh"])
+    assert take_until_overflow(pieces, lambda t: len(t) <= 3) == "abcd"
+    # the stream is closed, the rest is never pulled
+    assert list(pieces) == []
+    assert take_until_overflow(["ab", "cd"], lambda t: True) == "abcd"
+
+
+def test_stream_stops_at_dialog_buffer(make_client, make_rewriter):
+    codec = Gen3TextCodec()
+    text = _words(200)
+    client = make_client(text)
+    full = make_rewriter(client).rewrite(PAYLOAD)
+    # the same answer through the non-streaming path, truncated by encode
+    expected = codec.encode(format_dialogue(text), max_len=DIALOG_BUFFER_LEN)
+    assert full == expected
+
+    assert client.closed
+    assert client.produced < 200 / 2
+
+
+def test_short_rewrites_are_not_cut(make_client, make_rewriter):
+    client = make_client(_words(5))
+    rewriter = make_rewriter(client)
+    data = rewriter.rewrite(PAYLOAD)
+    assert Gen3TextCodec().decode(data) == format_dialogue(_words(5))
+    assert client.produced == 5 and rewriter.early_stops == 0
+
+
+def test_short_rewrites_are_retried(make_client, make_rewriter):
+    client = make_client(["", "Hey there"])
+    rewriter = make_rewriter(client)
+    data = rewriter.rewrite(PAYLOAD)
+    assert data == Gen3TextCodec().encode("Hey there")
+    assert client.calls == 2
+    assert (rewriter.lines, rewriter.generations, rewriter.fallbacks) == (1, 2, 0)
+
+
+def test_retries_are_bounded(make_client, make_rewriter):
+    client = make_client(["no"])
+    rewriter = make_rewriter(client, max_attempts=3)
+    assert rewriter.rewrite(PAYLOAD) == PAYLOAD + b"\xff"
+    assert client.calls == 3
+    assert (rewriter.lines, rewriter.generations, rewriter.fallbacks) == (1, 3, 1)
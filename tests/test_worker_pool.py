@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from src.llm.base import Priority, request_priority
+from src.llm.worker_pool import LlmWorkerPool, build_pool
+
+
+def shout(prompt, call):
+    if prompt == "boom":
+        raise ValueError("model error")
+    return prompt.upper()
+
+
+@pytest.fixture
+def gated(make_client):
+    """ Clients whose calls block until `gate` opens, logging their prompts to `log`. """
+    def gated(log, gate):
+        return make_client(shout, gate=gate, prompts=log)
+    return gated
+
+
+def _call(pool, prompt, priority, results):
+    def run():
+        request_priority.set(priority)
+        results[prompt] = pool.generate(prompt)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_live_jobs_jump_the_queue(gated, wait_for):
+    log, gate, results = [], threading.Event(), {}
+    pool = LlmWorkerPool([gated(log, gate)])
+    threads = [_call(pool, "first", Priority.BACKGROUND, results)]
+    wait_for(lambda: len(log) == 1)
+    threads += [_call(pool, f"bg{i}", Priority.BACKGROUND, results) for i in range(3)]
+    time.sleep(0.05)
+    threads.append(_call(pool, "live", Priority.LIVE, results))
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    pool.close()
+    assert log == ["first", "live", "bg0", "bg1", "bg2"]
+    assert results["live"] == "LIVE"
+
+
+def test_background_work_leaves_a_worker_for_live_requests(gated, wait_for):
+    log, gate, results = [], threading.Event(), {}
+    pool = LlmWorkerPool([gated(log, gate), gated(log, gate)])
+    threads = [_call(pool, f"bg{i}", Priority.BACKGROUND, results) for i in range(2)]
+    wait_for(lambda: len(log) == 1)
+    time.sleep(0.05)
+    # the second background job waits; a live one starts right away
+    assert len(log) == 1
+    threads.append(_call(pool, "live", Priority.LIVE, results))
+    wait_for(lambda: len(log) == 2)
+    assert log[1] == "live"
+    gate.set()
+    for thread in threads:
+        thread.join()
+    pool.close()
+    assert len(results) == 3
+
+
+def test_stream_errors_and_single_worker(gated):
+    log, gate = [], threading.Event()
+    gate.set()
+    pool = LlmWorkerPool([gated(log, gate), gated(log, gate)])
+    assert list(pool.stream("a b c")) == ["A", " B", " C"]
+    with pytest.raises(ValueError):
+        pool.generate("boom")
+    assert pool.generate("ok") == "OK"
+    pool.close()
+
+    single = gated(log, gate)
+    assert build_pool(lambda: single, 1) is single
+    pool = build_pool(lambda: gated(log, gate), 3)
+    assert isinstance(pool, LlmWorkerPool) and len(pool) == 3
+    pool.close()
+
+
+def test_queued_live_job_misses_its_deadline(gated, wait_for):
+    log, gate, results = [], threading.Event(), {}
+    pool = LlmWorkerPool([gated(log, gate)])
+    busy = _call(pool, "busy", Priority.BACKGROUND, results)
+    wait_for(lambda: len(log) == 1)
+    token = request_priority.set(Priority.LIVE)
+    try:
+        t0 = time.monotonic()
+        assert pool.generate("late", deadline=t0 + 0.1) == ""
+        assert list(pool.stream("later", deadline=time.monotonic() + 0.1)) == []
+        assert time.monotonic() - t0 < 1.0
+    finally:
+        request_priority.reset(token)
+    gate.set()
+    busy.join()
+    pool.close()
+    # both were dropped unstarted once the worker came free
+    assert log == ["busy"] and pool.expired == 2
+    assert results["busy"] == "BUSY"